@@ -9,6 +9,22 @@
 #
 # The program can walk a gradebook and do computations on the grades. Currently, it is for a course with 4 assigned that each have a certain maximum number of points.
 # Note that you have to manually add a short name for each assignment_id number.
+#
+# The rules for which grade to give are stated in grade_rules (see below). The submissions of all
+# students for the assignments with short names are fetched in one (paginated) listing and turned
+# into a student x assignment table of scores, from which each rule is evaluated for all students
+# at once. The result is the list of grades and Notes to store, which are then stored.
+#
+# With the option -g (or --graphql) the submissions are fetched via the GraphQL API instead.
+# With the option --mirror the assignments, submissions, and custom columns are read from the local
+# mirror of the gradebook (see canvas_mirror.py), which is first brought up to date by fetching only
+# what has changed since the last run.
+# With the option -n (or --dry-run) the grades and Notes to store are listed, but not stored.
+#
+# The custom columns are read once into an in-memory store keyed by (column title, user_id); each
+# Note that Canvas accepts is also applied to the store, so the columns are not fetched again.
+# With the option -b (or --bulk) the Notes are queued and stored together with bulk requests to
+# PUT /courses/:id/custom_gradebook_columns/data (see canvas_column_data.py), rather than one PUT per student.
 #  
 # 2021.04.12 G. Q. Maguire Jr.
 #
@@ -23,8 +39,15 @@ import argparse
 import os			# to make OS calls, here to get time zone info
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
+import canvas_graphql         # bulk access via the Canvas GraphQL API
+import canvas_mirror          # local mirror of the gradebook
+import canvas_column_data     # bulk writes of custom column entries
 import pprint
 
+# Use Python Pandas for the table of scores
+import pandas as pd
+
 import isodate                  # for parsing ISO 8601 dates and times
 import pytz                     # for time zones
 from dateutil.tz import tzlocal
@@ -47,6 +70,23 @@ def datetime_to_local_string(canvas_time):
 ###### EDIT THIS STUFF ######
 #############################
 
+# Each rule says which grade to give for the assignment grade_for to students who have passed all of
+# the assignments in requires (by short name), unless they already have this grade. An assignment
+# graded with points is passed with a score of at least points_possible - points_below_max.
+# If note_column is given, then for each student given the grade the date of their last submission
+# for the required assignments is stored in this custom column, using note as the format, unless the
+# column already says note_done.
+grade_rules=[{'grade_for': 'PRO1',
+              'grade': 'P',
+              'comment': 'test grade assignment',
+              'requires': ['ER', 'PE', 'ERH', 'SUSD'],
+              'points_below_max': 1.0,
+              'note_column': 'Notes',
+              'note': "Data ready for LADOK as of {}",
+              'note_done': 'P',
+              },
+             ]
+
 global baseUrl	# the base URL used for access to Canvas
 global header	# the header for all HTML requests
 global payload	# place to store additionally payload when needed for options to HTML requests
@@ -61,6 +101,8 @@ def initialize(args):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
+            canvas_mirror.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
 
             if args["containers"]:
@@ -77,40 +119,24 @@ def initialize(args):
         sys.exit()
 
 # Canvas related functions
-def list_gradebook_history_feed():
+def list_submissions(assignment_ids):
     global Verbose_Flag
     global course_id
-    
-    entries_found_thus_far=[]
-
-    # Use the Canvas API to get the grade information
 
-    url = "{0}/courses/{1}/gradebook_history/feed".format(baseUrl, course_id)
+    # Use the Canvas API to get the submissions of all students for the given assignments
+    #GET /api/v1/courses/:course_id/students/submissions
+    url = "{0}/courses/{1}/students/submissions".format(baseUrl, course_id)
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
-
+    extra_parameters={'student_ids[]': 'all',
+                      'assignment_ids[]': assignment_ids,
+                      'include[]': 'user',
+                      'per_page': '100'
+                      }
+    entries_found_thus_far=canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
     if Verbose_Flag:
-        print("result of getting gradebook feed: {}".format(r.text))
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-
-        for p_response in page_response:  
-            entries_found_thus_far.append(p_response)
-
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
-            if Verbose_Flag:
-                print("result of getting modules for a paginated response: {}".format(r.text))
-            page_response = r.json()  
-            for p_response in page_response:  
-                entries_found_thus_far.append(p_response)
+        print("submissions: {}".format(entries_found_thus_far))
 
     return entries_found_thus_far
 
@@ -125,7 +151,7 @@ def list_assignments():
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
 
@@ -139,7 +165,7 @@ def list_assignments():
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             if Verbose_Flag:
                 print("result of getting modules for a paginated response: {}".format(r.text))
             page_response = r.json()  
@@ -162,7 +188,7 @@ def list_custom_columns():
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom columns: {}".format(r.text))
 
@@ -176,7 +202,7 @@ def list_custom_columns():
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             if Verbose_Flag:
                 print("result of getting modules for a paginated response: {}".format(r.text))
             page_response = r.json()  
@@ -197,7 +223,7 @@ def list_custom_column_entries(column_number):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom columns: {}".format(r.text))
 
@@ -211,7 +237,7 @@ def list_custom_column_entries(column_number):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             if Verbose_Flag:
                 print("result of getting modules for a paginated response: {}".format(r.text))
             page_response = r.json()  
@@ -251,43 +277,37 @@ def assign_grade_for_assignment(assignment_id, user_id, grade, comment):
         payload={'submission[posted_grade]': grade,
                  }
 
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of put assign_grade_for_assignment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
         page_response=r.json()
         if Verbose_Flag:
             print("inserted grade for assignment")
+        canvas_mirror.note_grade(assignment_id, user_id, grade)
         return True
     return False
 
 
 def points_possible(short_name):
-    global assignments
-    for a in assignments:
-        if a['short_name'] == short_name:
-            return a['points_possible']
+    a=assignments_by_short_name.get(short_name)
+    if a:
+        return a['points_possible']
     return None
 
 def assignment_given_short_name(short_name):
-    global assignments
-    for a in assignments:
-        if a['short_name'] == short_name:
-            return a
-    return None
+    return assignments_by_short_name.get(short_name)
 
 def assignment_due_date(short_name):
-    global assignments
-    for a in assignments:
-        if a['short_name'] == short_name:
-            return isodate.parse_datetime(a['due_at'])
+    a=assignments_by_short_name.get(short_name)
+    if a:
+        return isodate.parse_datetime(a['due_at'])
     return None
 
 def assignment_grading_type(short_name):
-    global assignments
-    for a in assignments:
-        if a['short_name'] == short_name:
-            return a['grading_type']
+    a=assignments_by_short_name.get(short_name)
+    if a:
+        return a['grading_type']
     return None
 
 def grading_type_points(short_name):
@@ -297,90 +317,11 @@ def grading_type_points(short_name):
     return None
 
 def assignment_grading_standard_id(short_name):
-    global assignments
-    for a in assignments:
-        if a['short_name'] == short_name:
-            return a['grading_standard_id']
-    return None
-
-def get_a_grade(user_id, short_name):
-    global Verbose_Flag
-    g=get_asssignment_grade(user_id, short_name)
-    if g and len(g) > 1:
-        return g[0]['grade']             # by default the latest grade is first
-    return None
-
-def get_asssignment_grade(user_id, short_name):
-    global Verbose_Flag
-    global course_id
-    
-    assignment=assignment_given_short_name(short_name)
-    if assignment:
-        assignment_id=assignment['id']
-    else:
-        print("No such assignment named {0}".format(shrt_name))
-        return None
-
-    entries_found_thus_far=[]
-
-    # Use the Canvas API to get the grade information
-    # GET /api/v1/courses/:course_id/gradebook_history/feed
-
-    url = "{0}/courses/{1}/gradebook_history/feed".format(baseUrl, course_id)
-    if Verbose_Flag:
-        print("url: {}".format(url))
-
-    extra_parameters={'per_page': '100',
-             'assignment_id': assignment_id,
-             'user_id':  user_id
-             }
-    
-    r = requests.get(url, params=extra_parameters, headers = header)
-
-    if Verbose_Flag:
-        print("result of getting a grade from gradebook: {}".format(r.text))
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-
-        for p_response in page_response:  
-            entries_found_thus_far.append(p_response)
-
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
-            if Verbose_Flag:
-                print("result of getting modules for a paginated response: {}".format(r.text))
-            page_response = r.json()  
-            for p_response in page_response:  
-                entries_found_thus_far.append(p_response)
-
-    return entries_found_thus_far
-
-def grade(short_name, student):
-    global gradebook
-
-    assignment=assignment_given_short_name(short_name)
-    if assignment:
-        assignment_id=assignment['id']
-    else:
-        print("No such assignment named {0}".format(shrt_name))
-        return None
-
-    if gradebook.get(student, False):
-        students_assignments=gradebook[student].get('assignments', False)
-        if not students_assignments:
-            return None             # student has no assignments
-
-        this_assignment=students_assignments.get(assignment_id, False)
-        if this_assignment:
-            return this_assignment.get('entered_score', None)
-
+    a=assignments_by_short_name.get(short_name)
+    if a:
+        return a['grading_standard_id']
     return None
 
-
 def assign_grade(short_name,user_id, grade, comment):
     assignment=assignment_given_short_name(short_name)
     if assignment:
@@ -393,29 +334,6 @@ def assign_grade(short_name,user_id, grade, comment):
 
 
 
-def submission_date(short_name, student):
-    global gradebook
-
-    assignment=assignment_given_short_name(short_name)
-    if assignment:
-        assignment_id=assignment['id']
-    else:
-        print("No such assignment named {0}".format(shrt_name))
-        return None
-
-    if gradebook.get(student, False):
-        students_assignments=gradebook[student].get('assignments', False)
-        if not students_assignments:
-            return None             # student has no assignments
-
-        this_assignment=students_assignments.get(assignment_id, False)
-        if this_assignment:
-            td=this_assignment.get('submitted_at', None)
-            if td:
-                return isodate.parse_datetime(td)
-
-    return None
-
 # [{'id': 1684, 'title': 'Notes', 'position': 1, 'teacher_notes': True, 'read_only': False, 'hidden': False}]
 def custom_column_id(title):
     global custom_columns
@@ -424,22 +342,41 @@ def custom_column_id(title):
             return c['id']
     return None
 
-def custom_column_value(user_id, title):
-    global custom_column_data
-    slice=custom_column_data.get(title, False)
-    # slice is of the form: [ {'content': 'xxxx', 'user_id': ddd}, ...]
-    if slice:
-        for s in slice:
-            if s['user_id'] == user_id:
-                value=s['content']
-                return value
+def custom_column_title(column_id):
+    global custom_columns
+    for c in custom_columns:
+        if column_id == c['id']:
+            return c['title']
     return None
 
+# The contents of the custom columns are kept in custom_column_store, keyed by (title, user_id).
+# The store is filled once from Canvas and is then updated by each write that Canvas accepts, so
+# the columns never have to be fetched again to see the result of a write.
+custom_column_store=dict()
+
+def load_custom_column_store():
+    global custom_columns
+    custom_column_store.clear()
+    for c in custom_columns:
+        if canvas_mirror.enabled():
+            entries=canvas_mirror.custom_column_data(c['id'])
+        else:
+            entries=list_custom_column_entries(c['id'])
+        for e in entries:
+            custom_column_store[(c['title'], e['user_id'])]=e['content']
+
+def custom_column_value(user_id, title):
+    return custom_column_store.get((title, user_id))
+
+# return the contents of the column with the given title as a Series indexed by user_id
+def custom_column_series(title):
+    return pd.Series({user_id: content for (t, user_id), content in custom_column_store.items() if t == title},
+                     dtype=object)
+
 def put_custom_column_entries(column_id, user_id, data_to_store):
     global course_id
-    entries_found_thus_far=[]
 
-    # Use the Canvas API to get the list of custom column entries for a specific column for the course
+    # Use the Canvas API to set the custom column entry of a user
     #PUT /api/v1/courses/:course_id/custom_gradebook_columns/:id/data/:user_id
 
     url = "{0}/courses/{1}/custom_gradebook_columns/{2}/data/{3}".format(baseUrl,course_id, column_id, user_id)
@@ -447,25 +384,97 @@ def put_custom_column_entries(column_id, user_id, data_to_store):
         print("url: " + url)
 
     payload={'column_data[content]': data_to_store}
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
 
     if Verbose_Flag:
         print("result of putting data into custom_gradebook_column:  {}".format(r.text))
 
     if r.status_code == requests.codes.ok:
-        page_response=r.json()
+        custom_column_store[(custom_column_title(column_id), user_id)]=data_to_store
+        canvas_mirror.note_custom_column_entry(column_id, user_id, data_to_store)
+        return True
+    return False
 
-        for p_response in page_response:  
-            entries_found_thus_far.append(p_response)
+# queue a custom column entry to be stored by flush_custom_column_entries()
+def queue_custom_column_entry(column_id, user_id, data_to_store):
+    canvas_column_data.queue(column_id, user_id, data_to_store)
 
-    return entries_found_thus_far
+# store all of the queued custom column entries with bulk requests (see canvas_column_data.py)
+def flush_custom_column_entries():
+    global course_id
+    number_queued=canvas_column_data.pending()
+    stored=canvas_column_data.flush(baseUrl, header, course_id, Verbose_Flag)
+    for e in stored:
+        custom_column_store[(custom_column_title(e['column_id']), e['user_id'])]=e['content']
+        canvas_mirror.note_custom_column_entry(e['column_id'], e['user_id'], e['content'])
+    return len(stored) == number_queued
+
+# Grade rules
+# turn the submissions into tables indexed by user_id with a column per short name of an assignment:
+# the entered scores, the dates of submission, and the current grades
+def submission_tables(submissions):
+    short_names={a['id']: short_name for short_name, a in assignments_by_short_name.items()}
+    rows=[{'user_id': s['user_id'],
+           'short_name': short_names[s['assignment_id']],
+           'score': s.get('entered_score'),
+           'submitted_at': s.get('submitted_at'),
+           'grade': s.get('grade'),
+           }
+          for s in submissions if s['assignment_id'] in short_names]
+    submissions_df=pd.DataFrame(rows, columns=['user_id', 'short_name', 'score', 'submitted_at', 'grade'])
+    submissions_df['score']=pd.to_numeric(submissions_df['score'], errors='coerce')
+    submissions_df['submitted_at']=pd.to_datetime(submissions_df['submitted_at'], utc=True)
+
+    scores_df=submissions_df.pivot_table(index='user_id', columns='short_name', values='score', aggfunc='last', dropna=False)
+    submitted_df=submissions_df.pivot_table(index='user_id', columns='short_name', values='submitted_at', aggfunc='last', dropna=False)
+    grades_df=submissions_df.pivot_table(index='user_id', columns='short_name', values='grade', aggfunc='last', dropna=False)
+    users=submissions_df['user_id'].unique()
+    short_names=list(assignments_by_short_name)
+    return (scores_df.reindex(index=users, columns=short_names),
+            submitted_df.reindex(index=users, columns=short_names),
+            grades_df.reindex(index=users, columns=short_names))
+
+# evaluate the rules for all students, returning the list of writes to make - each a dict with the
+# user_id and either the short_name of the assignment and the grade and comment to give, or the
+# title of the custom column and the content to store
+def evaluate_grade_rules(rules, scores_df, submitted_df, grades_df):
+    writes=[]
+    for rule in rules:
+        passed=pd.Series(True, index=scores_df.index)
+        for short_name in rule['requires']:
+            if grading_type_points(short_name):
+                passed=passed & (scores_df[short_name] >= (points_possible(short_name) - rule['points_below_max']))
+            else:
+                passed=passed & False
+
+        to_grade=passed & (grades_df[rule['grade_for']] != rule['grade'])
+
+        if rule.get('note_column'):
+            notes=custom_column_series(rule['note_column']).reindex(scores_df.index)
+            all_submitted=submitted_df[rule['requires']].notna().all(axis=1)
+            last_submission=submitted_df[rule['requires']].max(axis=1)
+            to_note=to_grade & all_submitted & (notes != rule['note_done'])
+        else:
+            to_note=pd.Series(False, index=scores_df.index)
+
+        for user_id in scores_df.index[to_grade]:
+            writes.append({'user_id': user_id,
+                           'short_name': rule['grade_for'],
+                           'grade': rule['grade'],
+                           'comment': rule['comment'],
+                           })
+            if to_note[user_id]:
+                writes.append({'user_id': user_id,
+                               'column': rule['note_column'],
+                               'content': rule['note'].format(last_submission[user_id].to_pydatetime()),
+                               })
+    return writes
 
 def main(argv):
     global Verbose_Flag
     global assignments
     global custom_columns
-    global custom_column_data
-    global gradebook
+    global assignments_by_short_name
     global Use_local_time_for_output_flag
     global course_id
 
@@ -491,7 +500,26 @@ def main(argv):
                       action="store_true",
                       help="for the container enviroment in the virtual machine, uses http and not https")
 
+    argp.add_argument('-g', '--graphql',
+                      default=False,
+                      action="store_true",
+                      help="get the submissions using the GraphQL API")
+
+    argp.add_argument('-n', '--dry-run',
+                      default=False,
+                      action="store_true",
+                      help="only list the grades and Notes that would be stored")
+
+    argp.add_argument('-b', '--bulk',
+                      default=False,
+                      action="store_true",
+                      help="store the Notes with one bulk request")
+
+    canvas_client.add_options(argp)
+    canvas_mirror.add_options(argp)
+
     args = vars(argp.parse_args(argv))
+    canvas_client.set_options(args)
 
     Verbose_Flag=args["verbose"]
 
@@ -502,7 +530,11 @@ def main(argv):
     course_id=args["canvas_course_id"]
     print("course_id={}".format(course_id))
 
-    assignments=list_assignments()
+    if canvas_mirror.wanted(args):
+        canvas_mirror.start(args, baseUrl, header, course_id)
+        assignments=canvas_mirror.assignments()
+    else:
+        assignments=list_assignments()
     if Verbose_Flag:
         print("assignments={0}".format(assignments))
 
@@ -533,135 +565,61 @@ def main(argv):
         if Verbose_Flag:
             print("assignments={0}".format(assignments))
 
-    custom_columns=list_custom_columns()
-    print("custom_columns={}".format(custom_columns))
-
-    custom_column_data=dict()
-    for c in custom_columns:
-        custom_column_data[c['title']]=list_custom_column_entries(c['id'])
+    assignments_by_short_name=dict()
+    for a in assignments:
+        if a.get('short_name'):
+            assignments_by_short_name[a['short_name']]=a
 
+    if canvas_mirror.enabled():
+        custom_columns=canvas_mirror.custom_columns()
+    else:
+        custom_columns=list_custom_columns()
+    print("custom_columns={}".format(custom_columns))
 
+    load_custom_column_store()
 
-    grade_feed=list_gradebook_history_feed()
-    print("length of grade_feed={0}".format(len(grade_feed)))
+    # one listing of the submissions of all students for the assignments with short names
+    if canvas_mirror.enabled():
+        short_name_ids=set(a['id'] for a in assignments_by_short_name.values())
+        submissions=[s for s in canvas_mirror.submissions() if s['assignment_id'] in short_name_ids]
+    elif args["graphql"]:
+        submissions=canvas_graphql.course_submissions(baseUrl, header, course_id)
+    else:
+        submissions=list_submissions([a['id'] for a in assignments_by_short_name.values()])
+    scores_df, submitted_df, grades_df=submission_tables(submissions)
+    user_names={s['user_id']: s['user']['name'] for s in submissions if s.get('user')}
+    print("number of users in gradebook={0}".format(len(scores_df)))
     if Verbose_Flag:
-        print("grade_feed={0}".format(grade_feed))
-    gradebook=dict()
-
-    for e in grade_feed:
-        if Verbose_Flag:
-            pprint.pprint(e, indent=4)
-            print("{0}, {1}, {2}, {3}, {4}, {5}".format(e['user_id'], e['user_name'], e['assignment_id'], e['attempt'], e['submitted_at'], e['entered_score']))
-        gradebook_entry=gradebook.get(e['user_id'], False)
-        if not gradebook_entry:
-            gradebook_entry={'user_name': e['user_name'],
-                             'assignments': {},
-                             }
-
-        s_assignments=gradebook_entry.get('assignments', False)
-        if not s_assignments:
-            s_assignments=dict()
-    
-        this_assignment=s_assignments.get(e['assignment_id'], False)
-        if this_assignment:
-            print("previous value for assignment={}".format(this_assignment))
-
-        s_assignments[e['assignment_id']]={'attempt': e['attempt'],
-                                           'submitted_at': e['submitted_at'],
-                                           'entered_score': e['entered_score']
-                                           }
-
-        gradebook[e['user_id']]={'user_name': e['user_name'],
-                                 'assignments': s_assignments,
-                                 }
-
-        if Verbose_Flag:
-            print("gradebook[{0}]={1}".format(e['user_id'], gradebook[e['user_id']]))
-
-    pprint.pprint(gradebook, indent=4)
-    print("number of users in gradebook={0}".format(len(gradebook)))
-
+        print("scores={0}".format(scores_df))
+
+    writes=evaluate_grade_rules(grade_rules, scores_df, submitted_df, grades_df)
+    print("{0} grades and notes to store".format(len(writes)))
+    for w in writes:
+        if w.get('short_name'):
+            print("user_id={0}: {1} grade {2} ({3})".format(w['user_id'], w['short_name'], w['grade'], w['comment']))
+            if not args["dry_run"]:
+                assign_grade(w['short_name'], w['user_id'], w['grade'], w['comment'])
+        else:
+            print("user_id={0}: {1} = {2}".format(w['user_id'], w['column'], w['content']))
+            if args["dry_run"]:
+                continue
+            if args["bulk"]:
+                queue_custom_column_entry(custom_column_id(w['column']), w['user_id'], w['content'])
+            else:
+                put_custom_column_entries(custom_column_id(w['column']), w['user_id'], w['content'])
+    if args["bulk"] and not args["dry_run"]:
+        flush_custom_column_entries()
 
+    # Example of processing the date of the submssion and checking the assignment's due date
+    #
+    # if you want to check if the assignment was submitted after the due date
     er_due_date=assignment_due_date('ER')
-    pe_due_date=assignment_due_date('PE')
-    erh_due_date=assignment_due_date('ERH')
-    susd_due_date=assignment_due_date('SUSD')
-
-    # look at computing grades for each student s
-    for s in gradebook:
-        er_grade = pe_grade = erh_grade = susd_grade =False
-
-        # Example of an assignment with points and a passing threshold of all but one point
-        #
-        # 1. check that the grading type is points and get the grade
-        # 2. compare the points gotten with the points threshold for this assignment to pass
-        #    If the assignment passes er_grade is set to True
-        er_points=grading_type_points('ER') and grade('ER', s)
-        if er_points:
-            er_grade = er_points >= (points_possible('ER') - 1.0)
-
-        pe_points=grading_type_points('PE') and grade('PE', s)
-        if pe_points:
-            pe_grade= pe_points>= (points_possible('PE') - 1.0)
-
-        erh_points = grading_type_points('ERH') and grade('ERH', s)
-        if erh_points:
-            erh_grade= erh_points >= (points_possible('ERH') - 1.0)
-
-        susd_points=grading_type_points('SUSD') and grade('SUSD', s)
-        if susd_points:
-            susd_grade= susd_points >= (points_possible('SUSD') - 1.0)
-
-        print("er_grade={0}, pe_grade={1}, erh_grade={2}, susd_grade={3}".format(er_grade, pe_grade, erh_grade, susd_grade))
-
-        g1=grade('PRO1', s)
-        print("grade is currently {}".format(g1))
-        gt=assignment_grading_type('PRO1')
-        print("grading type is {0}".format(gt))
-        cg=get_a_grade(s, 'PRO1')
-        print("latest current grade is {}".format(cg))
-
-        # Example of assigning a grade for a student who has passed all for assignments
-        if er_grade and pe_grade and erh_grade and susd_grade and get_a_grade(s, 'PRO1') != 'P':
-            assign_grade('PRO1', s, 'P', 'test grade assignment')
-
-            # Example of getting a value from a custom column
-            s_note=custom_column_value(s, 'Notes')
-            print("s_note={}".format(s_note))                    
-            if s_note is None or s_note != 'P':
-                # for a studen who has passed all the assignments, compute the data the last one was submitted
-                er_submitted=submission_date('ER', s)
-                pe_submitted=submission_date('PE', s)
-                erh_submitted=submission_date('ERH', s)
-                susd_submitted=submission_date('SUSD', s)
-                if er_submitted and pe_submitted and erh_submitted and susd_submitted:
-                    submission_dates=[er_submitted,
-                                      pe_submitted,
-                                      erh_submitted,
-                                      susd_submitted
-                                      ]
-                    last_submission_date=max(submission_dates)
-                    # Example of storing a value into a custom column named 'Notes' for a student s
-                    data_to_store="Data ready for LADOK as of {}".format(last_submission_date)
-                    put_custom_column_entries(custom_column_id('Notes'), s, data_to_store)
-
-                # refresh the copy of the custom column data after changing it.
-                custom_column_data['Notes']=list_custom_column_entries(custom_column_id('Notes'))
-                s_note=custom_column_value(s, 'Notes')
-                if s_note:
-                    print("s_note={0}, len of string={1}".format(s_note, len(s_note)))
-
-
-        # Example of processing the date of the submssion and checking the assignment's due date
-        #
-        # if you want to check if the assignment was submitted after the due date
-        er_submitted=submission_date('ER', s)
-        if  er_submitted:
-            if er_submitted > er_due_date:
-                print("Late submission of ER by {0}".format(gradebook[s]['user_name']))
-            else:
-                er_early_submission=submission_date('ER', s) - er_due_date
-                print("early submission by {0}".format(er_early_submission))
+    er_submitted=submitted_df['ER']
+    for user_id, submitted in er_submitted[er_submitted.notna()].items():
+        if submitted > er_due_date:
+            print("Late submission of ER by {0}".format(user_names.get(user_id, user_id)))
+        else:
+            print("early submission by {0}".format(submitted - er_due_date))
 
 
 if __name__ == '__main__':
@@ -6,6 +6,12 @@
 # The goal is to avoid the need to have a separate spreadsheet for all of this and then needing to transfer information to the gradebook.
 # An additional benefit might be to encourage all of the teachers in the course keep similar notes.
 #
+# The entries of the Opponent and Oral presentation date/time columns are queued and stored together with a few
+# requests to PUT /courses/:id/custom_gradebook_columns/data (see canvas_column_data.py), rather than one PUT per entry.
+# All of the updates of an entry are merged before it is stored - each peer reviewer is appended to the Opponent
+# entry, while the last of the times given to a student is kept - and only the entries whose final content differs
+# from that in Canvas are stored.
+#
 # with the option '-C'or '--containers' use HTTP rather than HTTPS for access to Canvas
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
 #
@@ -21,6 +27,8 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
+import canvas_column_data     # bulk writes of custom column entries
 from pprint import pprint
 import optparse
 import sys
@@ -62,6 +70,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -106,7 +115,7 @@ def put_custom_column_entries(course_id, column_number, user_id, data_to_store):
         print("url: {}".format(url))
 
     payload={'column_data[content]': data_to_store}
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
 
     if Verbose_Flag:
         print("result of putting data into custom_gradebook_column:  {}".format(r.text))
@@ -129,7 +138,7 @@ def list_custom_column_entries(course_id, column_number):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -143,7 +152,7 @@ def list_custom_column_entries(course_id, column_number):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 entries_found_thus_far.append(p_response)
@@ -163,7 +172,7 @@ def list_custom_columns(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -177,7 +186,7 @@ def list_custom_columns(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 columns_found_thus_far.append(p_response)
@@ -201,7 +210,7 @@ def insert_column_name(course_id, column_name):
     if Verbose_Flag:
         print("url: {}".format(url))
     payload={'column[title]': column_name}
-    r = requests.post(url, headers = header, data=payload)
+    r = canvas_client.post(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         if Verbose_Flag:
             print("result of post creating custom column:  {}".format(r.text))
@@ -224,7 +233,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
 
@@ -238,7 +247,7 @@ def list_assignments(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 assignments_found_thus_far.append(p_response)
@@ -264,8 +273,8 @@ def list_peer_review_assignments(course_id, assignment_id):
         print("url: {}".format(url))
 
     payload={'include[]': "submission_comments"}
-    r = requests.get(url, headers = header, data=payload)
-    #r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header, data=payload)
+    #r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting peer review assignments: {}".format(r.text))
 
@@ -280,7 +289,7 @@ def list_peer_review_assignments(course_id, assignment_id):
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         if 'link' in r.headers:
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     peer_review_assignments_found_thus_far.append(p_response)
@@ -298,8 +307,8 @@ def users_in_course(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    extra_parameters={'enrollment_type[]': 'student', 'include[]': 'email'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    extra_parameters={'enrollment_type[]': 'student', 'include[]': 'email', 'per_page': '100'}
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -314,23 +323,18 @@ def users_in_course(course_id):
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         if 'link' in r.headers:
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     user_found_thus_far.append(p_response)
     return user_found_thus_far
 
-def name_of_student(user_id, users):
-    for u in users:
-        if u['user_id'] == user_id:
-            return u['user']['sortable_name']
-    return ''
+# index of the sortable names of the users, by user_id
+def names_of_students(users):
+    return {u['user_id']: u['user']['sortable_name'] for u in users}
 
-def existing_opponent(user_id, opponents):
-    for o in opponents:
-        if o['user_id'] == user_id:
-            return o['content']
-    return False
+def name_of_student(user_id, names):
+    return names.get(user_id, '')
 
 # https://kth.test.instructure.com:443/api/v1/calendar_events?start_date=2019-01-01&end_date=2019-02-01&all_events=false&context_codes[]=course_6434
 
@@ -349,7 +353,7 @@ def calendar_events_in_course(course_id, start_date, end_date):
                       'end_date':   end_date,
                       'all_events': 'false',
                       'context_codes[]': 'course_'+course_id}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting calendar events: {}".format(r.text))
 
@@ -364,7 +368,7 @@ def calendar_events_in_course(course_id, start_date, end_date):
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         if 'link' in r.headers:
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     events_found_thus_far.append(p_response)
@@ -381,7 +385,8 @@ def list_groups_in_course(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    extra_parameters={'per_page': '100'}
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting groups: {}".format(r.text))
 
@@ -396,7 +401,7 @@ def list_groups_in_course(course_id):
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         if 'link' in r.headers:
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     groups_found_thus_far.append(p_response)
@@ -413,7 +418,8 @@ def members_of_groups(group_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    extra_parameters={'per_page': '100'}
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting group info: {}".format(r.text))
 
@@ -428,7 +434,7 @@ def members_of_groups(group_id):
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         if 'link' in r.headers:
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     members_found_thus_far.append(p_response['id'])
@@ -466,7 +472,10 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -535,27 +544,27 @@ def main():
         opponents=list_custom_column_entries(course_id, opponent_column_number)
         if Verbose_Flag:
             print('{0} opponents is {1}'.format(len(opponents), opponents))
+        canvas_column_data.note_current_entries(opponent_column_number, opponents)
 
         users=users_in_course(course_id)
         if Verbose_Flag:
             print('{0} users is {1}'.format(len(users), users))
+        names=names_of_students(users)
 
         for pa in peer_review_assignments:
             user_id=pa['user_id']
             assessor_id=pa['assessor_id']
-            assessor_name=name_of_student(assessor_id, users)
-            opponent=existing_opponent(user_id, opponents)
+            assessor_name=name_of_student(assessor_id, names)
+            # the opponents in Canvas together with those added earlier in this run
+            opponent=canvas_column_data.final_content(opponent_column_number, user_id)
 
-            if not opponent:
-                put_custom_column_entries(course_id, opponent_column_number, user_id, assessor_name)
-                if Verbose_Flag:
+            # the assessor is appended to the opponents, unless they are already one of them
+            canvas_column_data.queue(opponent_column_number, user_id, assessor_name, canvas_column_data.append_merge)
+            if Verbose_Flag:
+                if not opponent:
                     print("{0} is reviewed by {1} named {2}".format(user_id, assessor_id, assessor_name))
-            else:
-                #if opponent != assessor_name:
-                if opponent.find(assessor_name) < 0:
-                    put_custom_column_entries(course_id, opponent_column_number, user_id, opponent + ';' + assessor_name)
-                    if Verbose_Flag:
-                        print("{0} is reviewed by multiple {1}".format(user_id, opponent + ';' + assessor_name))
+                else:
+                    print("{0} is reviewed by multiple {1}".format(user_id, canvas_column_data.final_content(opponent_column_number, user_id)))
 
         # get group information
         groups=list_groups_in_course(course_id)
@@ -563,9 +572,10 @@ def main():
             print("{0} groups are {1}".format(len(groups), groups))
         group_members_by_group=dict()
         group_by_member=dict()
-        for g in groups:
+        # get the members of all of the groups concurrently
+        members=canvas_client.check_results(canvas_client.fan_out(members_of_groups, [(g['id'],) for g in groups]))
+        for g, m in zip(groups, members):
             group_id=g['id']
-            m=members_of_groups(group_id)
             if Verbose_Flag:
                 print("members of group {0} {1} are {2}".format(group_id, g['name'], m))
             group_members_by_group[group_id]=m
@@ -577,6 +587,7 @@ def main():
         if Verbose_Flag:
             print("{0} events are {1}".format(len(events), events))
         date_time_column_number=lookup_column_number("Oral presentation date/time", list_of_columns)
+        canvas_column_data.note_current_entries(date_time_column_number, list_custom_column_entries(course_id, date_time_column_number))
 
         user_prefix="user_"
         group_prefix="group_"
@@ -593,15 +604,18 @@ def main():
                 if cc.startswith(user_prefix): # process the event for the user who booked it
                     user_id=int(cc[len(user_prefix):])
                     if Verbose_Flag:
-                        print("context_code {0} for user_id {1} named {2}".format(cc, user_id, name_of_student(user_id, users)))
+                        print("context_code {0} for user_id {1} named {2}".format(cc, user_id, name_of_student(user_id, names)))
                     group_id=group_by_member[user_id]
                     for m in group_members_by_group[group_id]: # add timestamp for all group members
-                        put_custom_column_entries(course_id, date_time_column_number, m, time_stamp_local)
+                        canvas_column_data.queue(date_time_column_number, m, time_stamp_local)
                 else:
                     if cc.startswith(group_prefix): # process the event for the group who booked it
                         group_id=int(cc[len(group_prefix):])
                         for m in group_members_by_group[group_id]: # add timestamp for all group members
-                            put_custom_column_entries(course_id, date_time_column_number, m, time_stamp_local)
+                            canvas_column_data.queue(date_time_column_number, m, time_stamp_local)
+
+        # store the final opponents and presentation times that differ from those in Canvas with a few bulk requests
+        canvas_column_data.flush(baseUrl, header, course_id, Verbose_Flag)
 
 if __name__ == "__main__": main()
 
@@ -23,6 +23,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -51,6 +52,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -79,7 +81,7 @@ def details_of_external_tools_for_course(course_id, external_tool_id):
     if Verbose_Flag:
         print(url)
     payload={}
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         tool_response = r.json()  
         pprint(tool_response)
@@ -99,7 +101,7 @@ def list_external_tools_for_course(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting list of external tools: {}".format(r.text))
 
@@ -117,7 +119,7 @@ def list_external_tools_for_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             tool_response = r.json()  
             for t_response in tool_response:  
                 list_of_all_tools.append(t_response)
@@ -140,7 +142,7 @@ def add_course_navigation_url(course_id, external_tool_id, navigation_text, navi
         print(url)
     payload={}
     # get the existing tool information
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if Verbose_Flag:
         print("r.status_code={}".format(r.status_code))
 
@@ -170,7 +172,7 @@ def add_course_navigation_url(course_id, external_tool_id, navigation_text, navi
     }
 
     # set the tool information
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         tool_response = r.json()  
         pprint(tool_response)
@@ -181,7 +183,7 @@ def add_course_navigation_url(course_id, external_tool_id, navigation_text, navi
 
     payload={}
     # get the updated tool information
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         tool_response = r.json()  
         print("Existing tool information for tool_id {}".format(external_tool_id))
@@ -200,7 +202,7 @@ def add_user_navigation_url(account_id, external_tool_id, navigation_text):
         print(url)
     payload={}
     # get the existing tool information
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if Verbose_Flag:
         print("r.status_code={}".format(r.status_code))
 
@@ -226,7 +228,7 @@ def add_user_navigation_url(account_id, external_tool_id, navigation_text):
     }
 
     # set the tool information
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         tool_response = r.json()  
         pprint(tool_response)
@@ -237,7 +239,7 @@ def add_user_navigation_url(account_id, external_tool_id, navigation_text):
 
     payload={}
     # get the updated tool information
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         tool_response = r.json()  
         print("Existing tool information for tool_id {}".format(external_tool_id))
@@ -258,7 +260,7 @@ def add_editor_icon_url(course_id, external_tool_id, icon_url):
         print(url)
     payload={}
     # get the existing tool information
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if Verbose_Flag:
         print("r.status_code=%d".format(r.status_code))
 
@@ -284,7 +286,7 @@ def add_editor_icon_url(course_id, external_tool_id, icon_url):
     }
 
     # set the tool information
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         tool_response = r.json()  
         pprint(tool_response)
@@ -295,7 +297,7 @@ def add_editor_icon_url(course_id, external_tool_id, icon_url):
 
     payload={}
     # get the updated tool information
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         tool_response = r.json()  
         print("Existing tool information for tool_id %s" % (external_tool_id))
@@ -338,7 +340,10 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -11,6 +11,10 @@
 #
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
 #
+# The existing course codes of all students are fetched with one listing of the submissions for the administrative
+# assignment, the course code of each student is found from their section via a dict, and only the course codes
+# that differ from the existing ones are written (concurrently).
+#
 # Can also be called with an alternative configuration file:
 # ./add_students_to_examiners_section_in_course.py --config config-test.json 22156
 #
@@ -30,6 +34,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -62,6 +67,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
             
@@ -86,7 +92,7 @@ def users_in_course(course_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -100,7 +106,7 @@ def users_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             if r.status_code == requests.codes.ok:
                 for p_response in page_response:  
@@ -139,7 +145,7 @@ def sections_in_course(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting sections: {}".format(r.text))
 
@@ -153,7 +159,7 @@ def sections_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 sections_found_thus_far.append(p_response)
@@ -175,7 +181,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
 
@@ -189,7 +195,7 @@ def list_assignments(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of assignments
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 if Verbose_Flag:
                     print("result of getting assignments for a paginated response: {}".format(r.text))
                 page_response = r.json()  
@@ -198,6 +204,18 @@ def list_assignments(course_id):
 
     return assignments_found_thus_far
 
+def submissions_for_assignment(course_id, assignment_id):
+    global Verbose_Flag
+    # Use the Canvas API to get the submissions of all students for an assignment
+    #GET /api/v1/courses/:course_id/assignments/:assignment_id/submissions
+
+    url = "{0}/courses/{1}/assignments/{2}/submissions".format(baseUrl,course_id, assignment_id)
+    if Verbose_Flag:
+        print("url: " + url)
+
+    extra_parameters={'per_page': '100'}
+    return canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
+
 def get_grade_for_assignment(course_id, assignment_id, user_id):
     global Verbose_Flag
     # Use the Canvas API to assign a grade for an assignment
@@ -214,7 +232,7 @@ def get_grade_for_assignment(course_id, assignment_id, user_id):
 
     payload={'include[]': 'submission_comments'}
 
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of getting assignment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -252,7 +270,7 @@ def assign_grade_for_assignment(course_id, assignment_id, user_id, grade, commen
         payload={'submission[posted_grade]': grade,
         }
 
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of put assign_grade_for_assignment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -284,7 +302,10 @@ def main():
                       )
 
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -344,7 +365,8 @@ def main():
     enrollments=users_in_course(course_id)
 
     number_of_students_processed=0
-    # get the "grade" of the administrative assignment
+    # find the students whose section determines a course code
+    students_to_check=[]                # list of (students_userid, students_name, course_code)
     student_ids=set()
     for e in enrollments:
         if e['type'] == 'StudentEnrollment':
@@ -364,18 +386,39 @@ def main():
 
                 course_code=section_to_course_code_mapping.get(course_section_id, False)
                 if course_code:
-                    # check for existing "grade" i.e., course code
-                    grade_info=get_grade_for_assignment(course_id, assignment_id, students_userid)
-                    existing_course_code=grade_info.get('grade', False)
-                    if not existing_course_code:
-                        print("{0}: course code is {1}".format(students_name, course_code))
-                        assign_grade_for_assignment(course_id, assignment_id, students_userid, course_code, False)
-                        continue
-
-                    if existing_course_code != course_code:
-                        # need to change the student's course code
-                        assign_grade_for_assignment(course_id, assignment_id, students_userid, course_code, False)
-                        print("{0}: changed course code from {1} to {2}".format(students_name, existing_course_code, course_code))
-                        
+                    students_to_check.append((students_userid, students_name, course_code))
+
+    # a student in several sections with a course code gets the code of the last of these enrollments (as when
+    # the codes were set one after another), and is only written once - so the concurrent writes below never race
+    students_to_check=list({students_userid: (students_userid, students_name, course_code)
+                            for students_userid, students_name, course_code in students_to_check}.values())
+
+    # get the "grade" of the administrative assignment, i.e., the existing course code, of all students with one listing
+    existing_course_codes={s['user_id']: s.get('grade') for s in submissions_for_assignment(course_id, assignment_id)}
+
+    # only the students whose course code differs from their existing one are written
+    grades_to_assign=[]                 # list of (students_userid, students_name, course_code, existing_course_code)
+    for students_userid, students_name, course_code in students_to_check:
+        existing_course_code=existing_course_codes.get(students_userid)
+        if existing_course_code != course_code:
+            grades_to_assign.append((students_userid, students_name, course_code, existing_course_code))
+
+    # assign the course codes concurrently - the results are in the same order as grades_to_assign
+    results=canvas_client.fan_out(assign_grade_for_assignment,
+                                  [(course_id, assignment_id, students_userid, course_code, False)
+                                   for students_userid, students_name, course_code, existing_course_code in grades_to_assign])
+
+    for (students_userid, students_name, course_code, existing_course_code), result in zip(grades_to_assign, results):
+        if isinstance(result, Exception):
+            print("{0}: unable to set course code to {1}: {2}: {3}".format(students_name, course_code, type(result).__name__, result))
+        elif not result:
+            print("{0}: unable to set course code to {1}".format(students_name, course_code))
+        elif not existing_course_code:
+            print("{0}: course code is {1}".format(students_name, course_code))
+        else:
+            # changed the student's course code
+            print("{0}: changed course code from {1} to {2}".format(students_name, existing_course_code, course_code))
+    print("{0} of {1} students needed their course code to be set".format(len(grades_to_assign), len(students_to_check)))
+
 
 if __name__ == "__main__": main()
@@ -9,6 +9,12 @@
 #
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
 #
+# The grades of all students for the administrative assignment are fetched with one listing of its submissions,
+# and the students who are not yet in the section of their teacher are added to it concurrently.
+# With the option "--csv FILE" these enrollments are instead written to FILE in the form of the enrollments.csv of
+# a SIS import (using the SIS ids of the users and sections), so that they can be made with a single SIS import.
+# Students who are in the section of a teacher other than the one given in the assignment are reported.
+#
 # Can also be called with an alternative configuration file:
 # ./add_students_to_examiners_section_in_course.py --config config-test.json 22156
 #
@@ -28,10 +34,12 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
 import json
+import csv
 
 # Import urlopen() for either Python 2 or 3.
 try:
@@ -60,6 +68,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
             
@@ -84,7 +93,7 @@ def users_in_course(course_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -98,12 +107,21 @@ def users_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 user_found_thus_far.append(p_response)
     return user_found_thus_far
 
+# return dicts indexed by user_id of the name of each user and the set of the sections that the user is enrolled in
+def enrollment_indexes(enrollments):
+    users_name=dict()
+    users_sections=dict()
+    for e in enrollments:
+        users_name.setdefault(e['user_id'], e['user']['name'])
+        users_sections.setdefault(e['user_id'], set()).add(e['course_section_id'])
+    return users_name, users_sections
+
 def user_name_from_user_id(enrollments, id):
     for i in enrollments:
         if i['user_id'] == id:
@@ -136,7 +154,7 @@ def sections_in_course(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting sections: {}".format(r.text))
 
@@ -150,7 +168,7 @@ def sections_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 sections_found_thus_far.append(p_response)
@@ -171,7 +189,7 @@ def create_sections_in_course(course_id, section_names):
     for section_name in section_names:
         #course_section[name]
         payload={'course_section[name]': section_name}
-        r = requests.post(url, headers = header, data=payload)
+        r = canvas_client.post(url, headers = header, data=payload)
 
         if Verbose_Flag:
             print("result of creating section: {}".format(r.text))
@@ -199,7 +217,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
 
@@ -213,7 +231,7 @@ def list_assignments(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of assignments
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 if Verbose_Flag:
                     print("result of getting assignments for a paginated response: {}".format(r.text))
                 page_response = r.json()  
@@ -222,6 +240,18 @@ def list_assignments(course_id):
 
     return assignments_found_thus_far
 
+def submissions_for_assignment(course_id, assignment_id):
+    global Verbose_Flag
+    # Use the Canvas API to get the submissions of all students for an assignment
+    #GET /api/v1/courses/:course_id/assignments/:assignment_id/submissions
+
+    url = "{0}/courses/{1}/assignments/{2}/submissions".format(baseUrl,course_id, assignment_id)
+    if Verbose_Flag:
+        print("url: " + url)
+
+    extra_parameters={'per_page': '100'}
+    return canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
+
 def get_grade_for_assignment(course_id, assignment_id, user_id):
     global Verbose_Flag
     # Use the Canvas API to assign a grade for an assignment
@@ -238,7 +268,7 @@ def get_grade_for_assignment(course_id, assignment_id, user_id):
 
     payload={'include[]': 'submission_comments'}
 
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of getting assignment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -260,7 +290,7 @@ def enroll_student_in_section(course_id, user_id, section_id):
     payload={'enrollment[user_id]': user_id, 
              'enrollment[type]': 'StudentEnrollment',
              'enrollment[course_section_id]': section_id }
-    r = requests.post(url, headers = header, data=payload)
+    r = canvas_client.post(url, headers = header, data=payload)
 
     if Verbose_Flag:
         print("result of enrolling student in section: {}".format(r.text))
@@ -271,6 +301,30 @@ def enroll_student_in_section(course_id, user_id, section_id):
 
     return None
 
+# write the enrollments to make (a list of (user_id, section_id, teacher)) as an enrollments.csv file for a SIS import
+# see https://canvas.instructure.com/doc/api/file.sis_csv.html
+# the users and sections are identified by their SIS ids, so enrollments of users or into sections without a SIS id are left out
+def write_sis_enrollments_csv(filename, enrollments, sections, enrollments_to_make):
+    users_sis_id=dict()
+    for e in enrollments:
+        if e.get('sis_user_id'):
+            users_sis_id[e['user_id']]=e['sis_user_id']
+    sections_sis_id={s['id']: s.get('sis_section_id') for s in sections}
+
+    number_written=0
+    with open(filename, 'w', newline='') as f:
+        writer=csv.writer(f)
+        writer.writerow(['course_id', 'user_id', 'role', 'section_id', 'status'])
+        for user_id, section_id, teacher in enrollments_to_make:
+            user_sis_id=users_sis_id.get(user_id)
+            section_sis_id=sections_sis_id.get(section_id)
+            if not user_sis_id or not section_sis_id:
+                print("Unable to include user {0} in the section for {1} in the SIS import, as the user or section has no SIS id".format(user_id, teacher))
+                continue
+            writer.writerow(['', user_sis_id, 'student', section_sis_id, 'active'])
+            number_written=number_written+1
+    print("wrote {0} enrollments to {1}".format(number_written, filename))
+
 def main():
     global Verbose_Flag
 
@@ -285,7 +339,13 @@ def main():
     parser.add_option("--config", dest="config_filename",
                       help="read configuration from FILE", metavar="FILE")
 
+    parser.add_option("--csv", dest="csv_filename",
+                      help="write the enrollments to make as a SIS import enrollments.csv FILE rather than making them", metavar="FILE")
+
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -332,10 +392,10 @@ def main():
 
     new_sections_needed=list()
     list_of_section=sections_in_course(course_id)
-    
+    section_ids_by_name={s['name']: s['id'] for s in list_of_section}
+
     for t in teacher_names_sortable_sorted:
-        section_id=section_id_from_section_name(list_of_section, t)
-        if not section_id:
+        if t not in section_ids_by_name:
             new_sections_needed.append(t)
 
     # if necessary create the missing sections
@@ -344,9 +404,10 @@ def main():
 
     teacher_to_section_mapping=dict()
     list_of_section=sections_in_course(course_id)
-    
+    section_ids_by_name={s['name']: s['id'] for s in list_of_section}
+
     for t in teacher_names_sortable_sorted:
-        section_id=section_id_from_section_name(list_of_section, t)
+        section_id=section_ids_by_name.get(t, False)
         if not section_id:
             print("Missing section for {0}".format(t))
         else:
@@ -373,28 +434,59 @@ def main():
         print("assignment_id={}".format(assignment_id))
 
     # get the "grade" of the administrative assignment and use this to get the teacher's name and then lookup the section based on this name
+    users_name, users_sections=enrollment_indexes(enrollments)
     student_ids=set()
     for e in enrollments:
         if e['type'] == 'StudentEnrollment':
             student_ids.add(e['user_id'])
 
-    for s in student_ids:
-        grade_info=get_grade_for_assignment(course_id, assignment_id, s)
-        grade=grade_info.get('grade', False)
-        if grade:
-            user_name=user_name_from_user_id(enrollments, s)
+    # the grades of all of the students, from one listing of the submissions for the assignment
+    grades={s['user_id']: s.get('grade') for s in submissions_for_assignment(course_id, assignment_id)}
 
-            teacher_section_id=teacher_to_section_mapping.get(grade, False)
+    teacher_section_ids={section_id: t for t, section_id in teacher_to_section_mapping.items()}
+    enrollments_to_make=list()
+    stale_memberships=list()
+    for s in sorted(student_ids):
+        grade=grades.get(s, False)
+        teacher_section_id=teacher_to_section_mapping.get(grade, False) if grade else False
+        existing_sections_for_user=users_sections.get(s, set())
+
+        # a student in the section of a teacher who is not (or no longer) their examiner
+        for section_id in existing_sections_for_user:
+            if section_id in teacher_section_ids and section_id != teacher_section_id:
+                stale_memberships.append((s, section_id))
+
+        if not grade:
+            continue
+        if Verbose_Flag:
+            print("teacher_section_id={}".format(teacher_section_id))
+        if not teacher_section_id:
+            print("No section for {0}, the {1} of {2}".format(grade, admin_assignment_name, users_name.get(s, s)))
+            continue
+        if teacher_section_id in existing_sections_for_user:
             if Verbose_Flag:
-                print("teacher_section_id={}".format(teacher_section_id))
+                print("Nothing to do - the user is already in the teacher's section")
+            continue
+        enrollments_to_make.append((s, teacher_section_id, grade))
 
-            existing_sections_for_user=users_sections_from_user_id(enrollments, s)
-            if existing_sections_for_user and (teacher_section_id in existing_sections_for_user):
-                if Verbose_Flag:
-                    print("Nothing to do - the user is already in the teacher's section")
+    if options.csv_filename:
+        write_sis_enrollments_csv(options.csv_filename, enrollments, list_of_section, enrollments_to_make)
+    else:
+        # add the students to their sections concurrently - the results are in the same order as enrollments_to_make
+        results=canvas_client.fan_out(enroll_student_in_section,
+                                      [(course_id, s, section_id) for s, section_id, grade in enrollments_to_make])
+        for (s, section_id, grade), result in zip(enrollments_to_make, results):
+            if isinstance(result, Exception):
+                print("Unable to add {0} to section for {1}: {2}: {3}".format(users_name.get(s, s), grade, type(result).__name__, result))
+            elif result:
+                print("Added {0} to section for {1}".format(users_name.get(s, s), grade))
             else:
-                # add the student to this section
-                enroll_student_in_section(course_id, s, teacher_section_id)
-                print("Added {0} to section for {1}".format(user_name, grade))
+                print("Unable to add {0} to section for {1}".format(users_name.get(s, s), grade))
+
+    for s, section_id in stale_memberships:
+        print("{0} is in the section for {1}, but their {2} is {3}".format(users_name.get(s, s), teacher_section_ids[section_id],
+                                                                          admin_assignment_name, grades.get(s) or 'not set'))
+    if stale_memberships:
+        print("{} students are in the section of a teacher who is not their examiner".format(len(stale_memberships)))
 
 if __name__ == "__main__": main()
@@ -28,6 +28,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -56,6 +57,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -80,7 +82,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
 
@@ -94,7 +96,7 @@ def list_assignments(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of assignments
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 if Verbose_Flag:
                     print("result of getting assignments for a paginated response: {}".format(r.text))
                 page_response = r.json()  
@@ -124,7 +126,10 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
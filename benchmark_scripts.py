@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# ./benchmark_scripts.py [--students 10,1000,20000] [--latency MS] [--output FILE] [--cache] [script ...]
+#
+# Run programs from this directory against the local mock Canvas server (mock_canvas_server.py)
+# and record, for each program and course size, the number of HTTP calls, the number of bytes
+# returned by the server, and the wall time. The per endpoint numbers are also recorded, so that
+# a change in the number of calls for a given endpoint (for example, an N+1 loop) shows up directly.
+#
+# By default each program is run with --no-cache, so that the numbers are those of a first run;
+# with the option --cache the programs use a cache directory that is kept for all of the runs
+# of a given course size.
+#
+# If one or more names of programs are given, only the scenarios for these programs are run.
+#
+# Output: a table on stdout and (with --output) a JSON file with all of the numbers
+#
+# Example:
+# ./benchmark_scripts.py --students 10,1000 --latency 20 --output bench.json
+#
+# ./benchmark_scripts.py --students 1000 users-in-course.py
+#
+# 2026.10.18
+#
+
+import optparse
+import sys
+import os
+import json
+import time
+import subprocess
+import tempfile
+
+import requests
+
+import mock_canvas_server
+
+course_id='1'
+
+# (program, arguments) - the arguments follow the program's own options
+scenarios=[
+    ('users-in-course.py', [course_id]),
+    ('users-in-course.py', ['--graphql', '--avatar', course_id]),
+    ('list_sections_in_course.py', [course_id]),
+    ('assignments-in-course.py', [course_id]),
+    ('custom-columns-in-course.py', [course_id]),
+    ('list-all-custom-column-entries.py', [course_id]),
+    ('teachers-in-course.py', [course_id]),
+    ('modules-in-course.py', [course_id]),
+    ('cgetall.py', [course_id, '.']),
+    ('list_user_page_views_for_a_course.py', [course_id, '2021-01-01', '2021-12-31']),
+    ('list_ungraded_submissions_in_your_courses_JSON.py', ['--sectionnames', 'sections.json']),
+    ('II2210-grades_to_report.py', ['-c', course_id]),
+    ('II2210-grades_to_report.py', ['--graphql', '-c', course_id]),
+    ('get_status-for-users-in-course.py', [course_id]),
+    ('add_course_codes_for_students_in_course.py', [course_id]),
+    ('add_students_to_examiners_section_in_course.py', [course_id]),
+    ('insert-group_column_in_gradebook.py', [course_id, 'Group', 'Project Groups']),
+    ('add-columns-for-II2202-final-presentation.py', [course_id, '2021-01-01', '2021-12-31']),
+    ('some_canvas_stats.py', []),
+]
+
+def write_configuration(directory, port, cache_directory):
+    configuration={'canvas': {'access_token': 'mock',
+                              'host': "127.0.0.1:{}".format(port)},
+                   'client': {'http_only': 1},
+                   'cache': {'directory': cache_directory},
+                   }
+    config_file=os.path.join(directory, 'config.json')
+    with open(config_file, 'w') as f:
+        json.dump(configuration, f, indent=4)
+
+    # the list of courses and sections used by list_ungraded_submissions_in_your_courses_JSON.py
+    with open(os.path.join(directory, 'sections.json'), 'w') as f:
+        json.dump({'courses_to_ignore': {},
+                   'courses_without_specific_sections': {course_id: {'name': 'Mock course'}},
+                   'courses_with_sections': {}}, f)
+    return config_file
+
+def server_statistics(base_url):
+    return requests.get(base_url+'/__stats').json()
+
+def reset_statistics(base_url):
+    requests.post(base_url+'/__reset')
+
+def run_scenario(program, arguments, config_file, directory, base_url, use_cache, timeout):
+    command=[sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), program),
+             '--config', config_file]
+    if not use_cache:
+        command.append('--no-cache')
+    command.extend(arguments)
+
+    reset_statistics(base_url)
+    start=time.perf_counter()
+    try:
+        completed=subprocess.run(command, cwd=directory, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 timeout=timeout)
+        returncode=completed.returncode
+        stderr=completed.stderr.decode('utf-8', errors='replace')
+    except subprocess.TimeoutExpired:
+        returncode=None
+        stderr='timeout'
+    wall_time=time.perf_counter()-start
+
+    endpoints=server_statistics(base_url)
+    return {'program': program,
+            'arguments': arguments,
+            'returncode': returncode,
+            'error': stderr.strip().split('\n')[-1] if returncode != 0 else '',
+            'wall_time': round(wall_time, 3),
+            'calls': sum(e['calls'] for e in endpoints.values()),
+            'bytes': sum(e['bytes'] for e in endpoints.values()),
+            'endpoints': endpoints,
+            }
+
+def main():
+    parser = optparse.OptionParser()
+
+    parser.add_option('-v', '--verbose',
+                      dest="verbose",
+                      default=False,
+                      action="store_true",
+                      help="Print the per endpoint numbers for each program"
+    )
+
+    parser.add_option('-s', '--students',
+                      dest="students",
+                      default="10,1000",
+                      help="comma separated list of the numbers of students in the course"
+    )
+
+    parser.add_option('-l', '--latency',
+                      dest="latency",
+                      default=0,
+                      type="float",
+                      help="added latency of each request in milliseconds"
+    )
+
+    parser.add_option('-o', '--output',
+                      dest="output",
+                      help="write the results as JSON to FILE", metavar="FILE")
+
+    parser.add_option('--cache',
+                      dest="cache",
+                      default=False,
+                      action="store_true",
+                      help="let the programs use the response cache"
+    )
+
+    parser.add_option('-t', '--timeout',
+                      dest="timeout",
+                      default=1800,
+                      type="float",
+                      help="maximum time in seconds for one program"
+    )
+
+    options, remainder = parser.parse_args()
+
+    selected=[s for s in scenarios if not remainder or s[0] in remainder]
+    results=[]
+    for number_of_students in [int(n) for n in options.students.split(',')]:
+        server=mock_canvas_server.start_server(0, number_of_students, options.latency/1000.0)
+        base_url="http://127.0.0.1:{}".format(server.server_port)
+        with tempfile.TemporaryDirectory() as directory:
+            config_file=write_configuration(directory, server.server_port, os.path.join(directory, 'cache'))
+            for program, arguments in selected:
+                result=run_scenario(program, arguments, config_file, directory, base_url, options.cache, options.timeout)
+                result['students']=number_of_students
+                results.append(result)
+
+                print("{0:>6} {1:<52} {2:>8} calls {3:>12} bytes {4:>9.2f} s {5}".format(
+                    number_of_students, program, result['calls'], result['bytes'], result['wall_time'],
+                    '' if result['returncode'] == 0 else "(exit {0}: {1})".format(result['returncode'], result['error'])))
+                if options.verbose:
+                    for endpoint, e in sorted(result['endpoints'].items(), key=lambda x: -x[1]['calls']):
+                        print("{0:>15} {1:<70} {2:>8} {3:>12}".format('', endpoint, e['calls'], e['bytes']))
+        server.shutdown()
+
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__": main()
@@ -0,0 +1,238 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# canvas_cache.py
+#
+# On-disk cache of the responses to GET requests made via canvas_client.py
+#
+# Each cached response is stored as a JSON file in the cache directory, named by a hash of the
+# URL (including the query parameters) and of the access token used. A cached response is used
+# without contacting Canvas while it is younger than the TTL of its endpoint; after that it is
+# revalidated with a conditional request (If-None-Match/If-Modified-Since), so that an unchanged
+# collection costs a 304 rather than the full payload. The TTL is 0 for every endpoint unless the
+# configuration file sets a longer one, i.e., by default every use is revalidated - a longer TTL
+# means that a change made by another program (or another run) may not be seen until it expires.
+#
+# Once the program has made a successful PUT/POST/DELETE, all cached responses are revalidated
+# before being used, so a program never sees its own changes hidden by the cache.
+#
+# The cache is bounded in size; when it grows too large the least recently used entries are
+# removed (the modification time of an entry's file is updated each time the entry is used).
+#
+# The cache can be configured in the configuration file, for example:
+# {
+#     "canvas":{ ... },
+#     "cache":{
+#         "directory": "/tmp/canvas-cache",
+#         "max_megabytes": 100,
+#         "default_ttl": 0,
+#         "ttl": {
+#             "/courses/:id/sections": 3600
+#         }
+#     }
+# }
+#
+# Every program accepts the options --no-cache (neither use nor store cached responses) and
+# --refresh (revalidate every cached response, ignoring the TTLs).
+#
+# 2026.10.18
+#
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+default_directory=os.path.join(os.path.expanduser('~'), '.cache', 'canvas-tools')
+default_max_megabytes=100
+default_ttl=0                   # seconds
+
+# TTLs in seconds by endpoint template, none by default - as the flag set by note_write() only
+# lasts for the current program, an entry used without revalidation could hide the changes made
+# by an earlier run (for example, sections just created by create_sections_in_course.py)
+default_ttls={}
+
+# headers that are kept with a cached response
+headers_to_keep=['Content-Type', 'Link', 'ETag', 'Last-Modified']
+
+cache_configuration={'directory': default_directory,
+                     'max_megabytes': default_max_megabytes,
+                     'default_ttl': default_ttl,
+                     'ttl': dict(default_ttls),
+                     }
+
+# mode is one of 'use', 'refresh', or 'off'
+mode='use'
+
+# set once a write has been made, after which every cached response is revalidated
+_written=False
+
+# approximate size of the cache in bytes, None until the cache directory has been scanned
+_cache_bytes=None
+
+def initialize(configuration):
+    cache_config=configuration.get("cache", {}) if configuration else {}
+    if 'directory' in cache_config:
+        cache_configuration['directory']=os.path.expanduser(cache_config['directory'])
+    if 'max_megabytes' in cache_config:
+        cache_configuration['max_megabytes']=float(cache_config['max_megabytes'])
+    if 'default_ttl' in cache_config:
+        cache_configuration['default_ttl']=float(cache_config['default_ttl'])
+    for endpoint, ttl in cache_config.get('ttl', {}).items():
+        cache_configuration['ttl'][endpoint]=float(ttl)
+
+def set_mode(new_mode):
+    global mode
+    mode=new_mode
+
+def enabled():
+    return mode != 'off'
+
+def note_write():
+    global _written
+    _written=True
+
+# the key is computed from the full URL and a hash of the Authorization header, so that
+# users with different tokens do not share entries; it does not cover a request body, so
+# canvas_client.py does not use the cache for a GET with a body
+def cache_key(url, params, headers):
+    full_url=requests.Request('GET', url, params=params).prepare().url
+    authorization=(headers or {}).get('Authorization', '')
+    h=hashlib.sha256()
+    h.update(full_url.encode('utf-8'))
+    h.update(b'\0')
+    h.update(authorization.encode('utf-8'))
+    return h.hexdigest()
+
+def entry_filename(key):
+    return os.path.join(cache_configuration['directory'], key[0:2], key+'.json')
+
+def lookup(key):
+    try:
+        with open(entry_filename(key)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def fresh(entry, endpoint):
+    if mode == 'refresh' or _written:
+        return False
+    ttl=cache_configuration['ttl'].get(endpoint, cache_configuration['default_ttl'])
+    return (time.time() - entry['stored_at']) < ttl
+
+# return the headers for a conditional request to revalidate entry
+def conditional_headers(entry):
+    conditions={}
+    if entry['headers'].get('ETag'):
+        conditions['If-None-Match']=entry['headers']['ETag']
+    if entry['headers'].get('Last-Modified'):
+        conditions['If-Modified-Since']=entry['headers']['Last-Modified']
+    return conditions
+
+def write_entry(key, entry):
+    filename=entry_filename(key)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    # write to a temporary file and rename, so that concurrent readers never see a partial entry
+    temporary_filename="{0}.{1}.{2}.tmp".format(filename, os.getpid(), threading.get_ident())
+    with open(temporary_filename, 'w') as f:
+        json.dump(entry, f)
+    os.replace(temporary_filename, filename)
+
+# store the response r, if it is something worth caching
+def store(key, r):
+    if r.status_code != requests.codes.ok:
+        return
+    if 'json' not in r.headers.get('Content-Type', ''):
+        return
+    try:
+        body=r.content.decode('utf-8')
+    except UnicodeDecodeError:
+        return
+
+    entry={'url': r.url,
+           'stored_at': time.time(),
+           'headers': {h: r.headers[h] for h in headers_to_keep if h in r.headers},
+           'body': body,
+           }
+    try:
+        write_entry(key, entry)
+    except OSError as e:
+        print("unable to write cache entry for {0}: {1}".format(r.url, e))
+        return
+
+    global _cache_bytes
+    if _cache_bytes is None:
+        _cache_bytes=evict()
+    else:
+        _cache_bytes=_cache_bytes+len(body)
+        if _cache_bytes > cache_configuration['max_megabytes']*1024*1024:
+            _cache_bytes=evict()
+
+# the entry is still valid (Canvas answered 304), so restart its TTL
+def revalidated(key, entry):
+    entry['stored_at']=time.time()
+    try:
+        write_entry(key, entry)
+    except OSError:
+        pass
+
+# make a requests.Response from a cached entry, marking it as coming from the cache
+def to_response(key, entry):
+    try:
+        os.utime(entry_filename(key))           # most recently used
+    except OSError:
+        pass
+    r=requests.Response()
+    r.status_code=requests.codes.ok
+    r.url=entry['url']
+    r.headers=CaseInsensitiveDict(entry['headers'])
+    r._content=entry['body'].encode('utf-8')
+    r.encoding='utf-8'
+    r.from_cache=True
+    return r
+
+# remove the least recently used entries until the cache fits in max_megabytes
+# returns the resulting size of the cache in bytes
+def evict():
+    max_bytes=cache_configuration['max_megabytes']*1024*1024
+    entries=[]
+    total=0
+    for dirpath, dirnames, filenames in os.walk(cache_configuration['directory']):
+        for name in filenames:
+            if not name.endswith('.json'):
+                continue
+            path=os.path.join(dirpath, name)
+            try:
+                st=os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total=total+st.st_size
+
+    if total <= max_bytes:
+        return total
+
+    entries.sort()
+    for mtime, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total=total-size
+        except OSError:
+            pass
+    return total
+
+def clear():
+    for dirpath, dirnames, filenames in os.walk(cache_configuration['directory']):
+        for name in filenames:
+            if name.endswith('.json'):
+                try:
+                    os.remove(os.path.join(dirpath, name))
+                except OSError:
+                    pass
@@ -0,0 +1,577 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# canvas_client.py
+#
+# Shared client for the Canvas RESTful API used by the programs in this directory.
+#
+# The programs used to call requests.get(), requests.put(), etc. directly - each of these calls
+# opens a new TCP (and TLS) connection to the Canvas server. Instead the programs now call
+# canvas_client.get(), canvas_client.put(), canvas_client.post(), and canvas_client.delete(),
+# which take the same arguments as the requests functions but send the request via a single
+# requests.Session - so that the connections are kept alive and reused across calls.
+#
+# The size of the connection pool can be set in the configuration file, for example:
+# {
+#     "canvas":{
+#         "access_token": "xxx",
+#         "host": "yyy.instructure.com"
+#     },
+#     "client":{
+#         "pool_connections": 10,
+#         "pool_maxsize": 20,
+#         "page_workers": 4,
+#         "max_in_flight": 8,
+#         "max_retries": 5,
+#         "rate_limit_low_water": 200,
+#         "fan_out_workers": 8
+#     }
+# }
+#
+# If there is no "client" entry, the defaults below are used.
+# With "http_only": 1 all requests use HTTP rather than HTTPS, for use with a local test server such
+# as mock_canvas_server.py (the programs that do not have the -C option always use HTTPS).
+#
+# get_all_pages() returns all of the entries of a paginated list endpoint. When Canvas returns a
+# numeric "last" link (i.e., page=N) the URLs of the remaining pages are computed and these pages
+# are fetched concurrently by up to page_workers threads; otherwise (for example, when Canvas uses
+# bookmarks for the pagination) the "next" links are followed one page at a time. In both cases the
+# entries are returned in the same order as walking the "next" links would return them.
+# Setting page_workers to 1 always walks the "next" links.
+# iterate_pages() is a generator that yields the entries as the pages arrive (fetching at most
+# page_workers pages at a time), so that very long lists need not be held in memory; its output
+# can be written as it arrives with write_json_lines().
+# If any page (including the first) cannot be fetched, both raise requests.HTTPError rather than
+# returning a short list that would look complete.
+#
+# All requests pass through a shared throttle. Canvas reports the state of the user's request
+# quota in the X-Rate-Limit-Remaining and X-Request-Cost headers of every response. While the
+# remaining quota covers rate_limit_low_water plus the cost of the requests that may be in flight,
+# the number of requests allowed to be in flight at the same time grows by one (up to
+# max_in_flight); otherwise this number is halved.
+# When Canvas throttles a request (HTTP 403 "Rate Limit Exceeded" or HTTP 429) the request is
+# retried after an exponential back off with jitter, up to max_retries times, rather than the
+# program failing. Idempotent requests (GET, PUT, DELETE) are also retried in the same way after a
+# connection error, a timeout, or a transient server error (HTTP 500, 502, 503, or 504); POSTs, and
+# requests made with idempotent=False, are not, as they might be carried out twice.
+# For details of the Canvas throttling see https://canvas.instructure.com/doc/api/file.throttling.html
+#
+# fan_out() runs a function (typically one making a request per student or per assignment) for
+# each of a list of argument tuples, with up to fan_out_workers calls running concurrently. It is
+# driven by an asyncio event loop, but the calls themselves run in worker threads, so that they
+# use the same pooled session, throttle, and cache as all other requests. The results are returned
+# in the order of the argument tuples, so the caller can handle and print them in the same order as
+# a sequential loop would. To report progress while the calls are running, a function can be given
+# as on_done; it is called with the argument tuple and the result of each call as the call finishes
+# (always from the same thread, so it need not be thread safe).
+# An exception raised by one of the calls does not stop the others: it is returned (and passed to
+# on_done) as the result of that call, so that a program making writes can report which of them
+# were made. A program that reads data with fan_out() passes the results to check_results(), which
+# raises the first such exception.
+#
+# GET requests are answered from the on-disk cache in canvas_cache.py when possible (GETs that
+# send a body with data= or json= are never cached).
+# Each program should call add_options(parser) before parsing its command line and
+# set_options(options) afterwards, to provide the --no-cache and --refresh options.
+#
+# Functions added with add_hook() are called after each request with the method, endpoint
+# template, status, latency, response size, number of retries, and cache status of the request.
+# The option --profile uses such a hook (see canvas_profile.py) to report per endpoint statistics
+# when the program exits - rather than using the Verbose_Flag output to find the slow endpoints.
+#
+# Canvas carries out some bulk requests (such as update_grades() and the bulk update of custom
+# column data in canvas_column_data.py) as asynchronous jobs and returns a Progress object for the
+# job; wait_for_progress() polls it until the job has completed or failed.
+#
+# 2026.10.18
+#
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import random
+import time
+import asyncio
+import re
+import json
+
+import canvas_cache
+import canvas_profile
+
+# defaults for the connection pool
+default_pool_connections=10     # number of distinct hosts to keep pools for
+default_pool_maxsize=10         # number of connections to keep alive per host
+default_page_workers=4          # number of pages of a paginated response to fetch concurrently
+default_fan_out_workers=8       # number of calls of fan_out() to run concurrently
+
+# defaults for the throttle
+default_max_in_flight=8         # upper limit on the number of concurrent requests
+default_max_retries=5           # number of times to retry a throttled (or, if idempotent, failed) request
+default_rate_limit_low_water=200 # remaining quota below which the concurrency is reduced
+backoff_base=1.0                # seconds
+backoff_cap=60.0                # seconds
+
+# requests that can safely be sent again when it is unknown whether Canvas carried them out
+idempotent_methods=['GET', 'HEAD', 'PUT', 'DELETE']
+transient_status_codes=[500, 502, 503, 504]
+
+client_configuration={'pool_connections': default_pool_connections,
+                      'pool_maxsize': default_pool_maxsize,
+                      'page_workers': default_page_workers,
+                      'max_in_flight': default_max_in_flight,
+                      'max_retries': default_max_retries,
+                      'rate_limit_low_water': default_rate_limit_low_water,
+                      'fan_out_workers': default_fan_out_workers,
+                      'http_only': 0,
+                      }
+
+_session=None
+
+# functions called after each request, see add_hook()
+_hooks=[]
+
+# state of the throttle
+_throttle=threading.Condition()
+_in_flight=0
+_allowed_in_flight=default_max_in_flight
+
+# Based upon the configuration read by the program, set up the pooled session
+# configuration is the dict read from the JSON configuration file
+def initialize(configuration):
+    global _session, _allowed_in_flight
+
+    client_config=configuration.get("client", {}) if configuration else {}
+    for k in client_configuration:
+        if k in client_config:
+            client_configuration[k]=int(client_config[k])
+
+    with _throttle:
+        _allowed_in_flight=client_configuration['max_in_flight']
+
+    canvas_cache.initialize(configuration)
+
+    # throw away any existing session, so that the next request uses the new settings
+    if _session is not None:
+        _session.close()
+        _session=None
+
+def new_session():
+    s=requests.Session()
+    adapter=HTTPAdapter(pool_connections=client_configuration['pool_connections'],
+                        pool_maxsize=client_configuration['pool_maxsize'])
+    s.mount('https://', adapter)
+    s.mount('http://', adapter)
+    return s
+
+def session():
+    global _session
+    if _session is None:
+        _session=new_session()
+    return _session
+
+# Throttling
+def throttle_acquire():
+    global _in_flight
+    with _throttle:
+        while _in_flight >= _allowed_in_flight:
+            _throttle.wait()
+        _in_flight=_in_flight+1
+
+def header_value(r, name):
+    if r is None:
+        return None
+    try:
+        return float(r.headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+# adjust the number of requests that may be in flight based upon the response r (None if the request failed)
+def throttle_release(r):
+    global _in_flight, _allowed_in_flight
+    with _throttle:
+        _in_flight=_in_flight-1
+        if r is not None:
+            remaining=header_value(r, 'X-Rate-Limit-Remaining')
+            cost=header_value(r, 'X-Request-Cost')
+            if rate_limited(r):
+                _allowed_in_flight=max(1, _allowed_in_flight // 2)
+            elif remaining is not None:
+                # keep enough quota for the requests that are in flight, each costing about what this one did
+                needed=client_configuration['rate_limit_low_water'] + (cost or 0) * _allowed_in_flight
+                if remaining < needed:
+                    _allowed_in_flight=max(1, _allowed_in_flight // 2)
+                elif _allowed_in_flight < client_configuration['max_in_flight']:
+                    _allowed_in_flight=_allowed_in_flight+1
+        _throttle.notify_all()
+
+def rate_limited(r):
+    if r.status_code == 429:
+        return True
+    return r.status_code == 403 and 'Rate Limit Exceeded' in r.text
+
+# exponential back off with jitter, unless Canvas said how long to wait
+def backoff_delay(attempt, r):
+    retry_after=header_value(r, 'Retry-After')
+    if retry_after is not None:
+        return retry_after
+    delay=min(backoff_cap, backoff_base * (2 ** (attempt - 1)))
+    return random.uniform(delay/2, delay)
+
+# send a request, taking the throttle into account
+# A request that was throttled is retried. An idempotent request (by default, one whose method is in
+# idempotent_methods) is also retried after a connection error, a timeout, or a transient server
+# error; a non-idempotent one is not, as Canvas may already have carried it out - pass
+# idempotent=False for a PUT that is not idempotent (for example, one that adds a comment).
+def send(method, url, idempotent=None, **kwargs):
+    if client_configuration['http_only'] and url.startswith('https://'):
+        url='http://'+url[len('https://'):]
+    if idempotent is None:
+        idempotent=method in idempotent_methods
+    attempt=0
+    while True:
+        throttle_acquire()
+        r=None
+        error=None
+        try:
+            r=session().request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if not idempotent or attempt >= client_configuration['max_retries']:
+                raise
+            error=e
+        finally:
+            throttle_release(r)
+
+        if error is not None:
+            reason="{0} for".format(type(error).__name__)
+        elif rate_limited(r):
+            reason="rate limit exceeded for"
+        elif idempotent and r.status_code in transient_status_codes:
+            reason="status {0} for".format(r.status_code)
+        else:
+            reason=None
+        if reason is None or attempt >= client_configuration['max_retries']:
+            r.canvas_retries=attempt
+            return r
+        attempt=attempt+1
+        delay=backoff_delay(attempt, r)
+        print("{0} {1} {2}, retrying in {3:.1f} seconds".format(reason, method, url, delay))
+        time.sleep(delay)
+
+def request(method, url, **kwargs):
+    if not _hooks:
+        return uninstrumented_request(method, url, **kwargs)
+
+    start=time.perf_counter()
+    r=None
+    try:
+        r=uninstrumented_request(method, url, **kwargs)
+    finally:
+        elapsed=time.perf_counter()-start
+        call_hooks(method, url, r, elapsed, kwargs.get('stream', False))
+    return r
+
+def uninstrumented_request(method, url, **kwargs):
+    # a GET that sends a body is not cached, as the cache key only covers the URL and the token
+    if method == 'GET' and canvas_cache.enabled() and kwargs.get('data') is None and kwargs.get('json') is None:
+        return cached_get(url, **kwargs)
+
+    r=send(method, url, **kwargs)
+    # GraphQL queries (see canvas_graphql.py) are POSTs, but they do not change anything
+    if method != 'GET' and r.status_code < 400 and not url.endswith('/api/graphql'):
+        canvas_cache.note_write()
+    return r
+
+# Instrumentation
+# A hook is a function that is called after each request with a dict describing the request:
+# method, url, endpoint (the template from endpoint_template()), status (None if the request raised
+# an exception), seconds, bytes (of the response body, 0 for streamed responses), retries (after
+# throttling), and cache ('hit', 'revalidated', 'miss', or None when the cache was not used).
+def add_hook(hook):
+    if hook not in _hooks:
+        _hooks.append(hook)
+
+def remove_hook(hook):
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+def call_hooks(method, url, r, elapsed, stream):
+    event={'method': method,
+           'url': url,
+           'endpoint': endpoint_template(url),
+           'status': r.status_code if r is not None else None,
+           'seconds': elapsed,
+           'bytes': len(r.content) if r is not None and not stream else 0,
+           'retries': getattr(r, 'canvas_retries', 0),
+           'cache': getattr(r, 'cache_status', None),
+           }
+    for hook in _hooks:
+        hook(event)
+
+def cached_get(url, params=None, headers=None, **kwargs):
+    key=canvas_cache.cache_key(url, params, headers)
+    entry=canvas_cache.lookup(key)
+    if entry and canvas_cache.fresh(entry, endpoint_template(url)):
+        r=canvas_cache.to_response(key, entry)
+        r.cache_status='hit'
+        return r
+
+    request_headers=dict(headers or {})
+    if entry:
+        request_headers.update(canvas_cache.conditional_headers(entry))
+
+    r=send('GET', url, params=params, headers=request_headers, **kwargs)
+    if entry and r.status_code == requests.codes.not_modified:
+        canvas_cache.revalidated(key, entry)
+        retries=r.canvas_retries
+        r=canvas_cache.to_response(key, entry)
+        r.cache_status='revalidated'
+        r.canvas_retries=retries
+        return r
+
+    canvas_cache.store(key, r)
+    r.cache_status='miss'
+    return r
+
+# return the path of the API endpoint with the numeric ids replaced by :id
+# for example, https://canvas.example.com/api/v1/courses/11/assignments/22 gives /courses/:id/assignments/:id
+def endpoint_template(url):
+    path=urlsplit(url).path
+    i=path.find('/api/v1')
+    if i >= 0:
+        path=path[i+len('/api/v1'):]
+    return re.sub(r'/\d+(?=/|$)', '/:id', path.rstrip('/'))
+
+# Command line options common to all programs
+# parser can be either an optparse.OptionParser or an argparse.ArgumentParser
+def add_options(parser):
+    if hasattr(parser, 'add_option'):
+        add=parser.add_option
+    else:
+        add=parser.add_argument
+
+    add('--no-cache',
+        dest="no_cache",
+        default=False,
+        action="store_true",
+        help="do not use or store cached responses from Canvas")
+
+    add('--refresh',
+        dest="refresh_cache",
+        default=False,
+        action="store_true",
+        help="revalidate all cached responses with Canvas")
+
+    add('--profile',
+        dest="profile",
+        default=False,
+        action="store_true",
+        help="record per endpoint statistics of the requests and report them at exit")
+
+# options can be the result of an optparse or argparse parser, or the dict vars() of the latter
+def set_options(options):
+    if isinstance(options, dict):
+        option=options.get
+    else:
+        option=lambda name: getattr(options, name, None)
+
+    if option('no_cache'):
+        canvas_cache.set_mode('off')
+    elif option('refresh_cache'):
+        canvas_cache.set_mode('refresh')
+    else:
+        canvas_cache.set_mode('use')
+
+    if option('profile'):
+        canvas_profile.enable()
+        add_hook(canvas_profile.record)
+
+def get(url, params=None, **kwargs):
+    return request('GET', url, params=params, **kwargs)
+
+def put(url, data=None, **kwargs):
+    return request('PUT', url, data=data, **kwargs)
+
+def post(url, data=None, json=None, **kwargs):
+    return request('POST', url, data=data, json=json, **kwargs)
+
+def delete(url, **kwargs):
+    return request('DELETE', url, **kwargs)
+
+def close():
+    global _session
+    if _session is not None:
+        _session.close()
+        _session=None
+
+# Pagination
+# see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
+#
+# if the "last" link has a numeric page number, return the list of URLs for pages 2 .. last
+# otherwise return None
+def remaining_page_urls(r):
+    last=r.links.get('last', False)
+    if not last:
+        return None
+
+    parts=urlsplit(last['url'])
+    query=parse_qsl(parts.query, keep_blank_values=True)
+    page_numbers=[v for k, v in query if k == 'page']
+    if len(page_numbers) != 1 or not page_numbers[0].isdigit():
+        return None
+
+    last_page=int(page_numbers[0])
+    urls=[]
+    for page in range(2, last_page+1):
+        new_query=[(k, str(page) if k == 'page' else v) for k, v in query]
+        urls.append(urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(new_query), parts.fragment)))
+    return urls
+
+# a page that could not be fetched ends the listing with an exception, so that a truncated list is
+# never mistaken for the complete one
+def check_page(r):
+    if r.status_code != requests.codes.ok:
+        raise requests.HTTPError("error when getting page {0}: {1}".format(r.url, r.status_code), response=r)
+
+# yield the entries of a paginated list endpoint page by page, so that the caller never needs
+# to hold more than a few pages in memory
+def iterate_pages(url, params=None, headers=None):
+    r = get(url, params=params, headers=headers)
+    check_page(r)
+
+    yield from r.json()
+
+    page_urls=None
+    if client_configuration['page_workers'] > 1 and r.links.get('next', False):
+        page_urls=remaining_page_urls(r)
+
+    if page_urls:
+        # the pages are requested concurrently in groups of page_workers pages, map() returns
+        # the results of each group in the order of page_urls
+        workers=client_configuration['page_workers']
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for i in range(0, len(page_urls), workers):
+                for r in executor.map(lambda u: get(u, headers=headers), page_urls[i:i+workers]):
+                    check_page(r)
+                    yield from r.json()
+        return
+
+    while r.links.get('next', False):
+        r = get(r.links['next']['url'], headers=headers)
+        check_page(r)
+        yield from r.json()
+
+def get_all_pages(url, params=None, headers=None):
+    return list(iterate_pages(url, params=params, headers=headers))
+
+# JSON Lines output, one JSON object per line - see https://jsonlines.org/
+# write the entries to the file as they are produced, returns the number of entries written
+def write_json_lines(entries, filename):
+    count=0
+    with open(filename, 'w', encoding='utf-8') as f:
+        for e in entries:
+            f.write(json.dumps(e, ensure_ascii=False))
+            f.write('\n')
+            count=count+1
+    return count
+
+# Fan out
+# call function(*arguments) for each tuple in list_of_arguments, with up to max_workers calls in
+# progress at the same time, and return the list of the results in the order of list_of_arguments
+# an exception raised by a call is caught and becomes the result of that call, so that the other
+# calls still run and the caller gets a result for every argument tuple (see check_results())
+# if on_done is given, on_done(arguments, result) is called as each call finishes
+def fan_out(function, list_of_arguments, max_workers=None, on_done=None):
+    list_of_arguments=list(list_of_arguments)
+    if max_workers is None:
+        max_workers=client_configuration['fan_out_workers']
+
+    def call(arguments):
+        try:
+            return function(*arguments)
+        except Exception as e:
+            return e
+
+    if max_workers <= 1 or len(list_of_arguments) <= 1:
+        results=[]
+        for arguments in list_of_arguments:
+            results.append(call(arguments))
+            if on_done:
+                on_done(arguments, results[-1])
+        return results
+
+    async def run_all():
+        loop=asyncio.get_running_loop()
+        limit=asyncio.Semaphore(max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            async def run_one(arguments):
+                async with limit:
+                    result=await loop.run_in_executor(executor, lambda: call(arguments))
+                if on_done:
+                    on_done(arguments, result)
+                return result
+            return await asyncio.gather(*[run_one(arguments) for arguments in list_of_arguments])
+
+    return asyncio.run(run_all())
+
+# for the results of fan_out() calls that read data: raise the first exception among the results,
+# as the program cannot go on with only part of the data, otherwise return the results
+def check_results(results):
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return results
+
+# Asynchronous jobs
+# poll the progress until the job is no longer queued or running, returns the final progress (or None)
+def wait_for_progress(base_url, header, progress, verbose=False):
+    # Use the Canvas API to get the progress of an asynchronous job
+    #GET /api/v1/progress/:id
+
+    url = "{0}/progress/{1}".format(base_url, progress['id'])
+    delay=0.5
+    while progress['workflow_state'] in ['queued', 'running']:
+        time.sleep(delay)
+        delay=min(2*delay, 5.0)
+        r = get(url, headers = header)
+        if verbose:
+            print("result of getting progress: {}".format(r.text))
+        if r.status_code != requests.codes.ok:
+            print("unable to get the progress of job {0}, status_code={1}".format(progress['id'], r.status_code))
+            return None
+        progress=r.json()
+        print("progress of job {0}: {1} {2}%".format(progress['id'], progress['workflow_state'], progress['completion']))
+    return progress
+
+# grade_data is a dict of user_id to {'grade': ..., 'comment': ...} (the comment may be None)
+# returns the Progress object of the job that sets the grades, or None if the request failed
+def update_grades(base_url, header, course_id, assignment_id, grade_data, verbose=False):
+    # Use the Canvas API to grade or comment on multiple submissions for an assignment
+    #POST /api/v1/courses/:course_id/assignments/:assignment_id/submissions/update_grades
+
+    # Request Parameters:
+    # grade_data[<student_id>][posted_grade]	string	See documentation for the posted_grade argument in the Submissions Update documentation
+    # grade_data[<student_id>][text_comment]	string	See documentation for the text_comment argument in the Submissions Update documentation
+    #
+    # The grades are set by a background job, the response is a Progress object for it
+
+    url = "{0}/courses/{1}/assignments/{2}/submissions/update_grades".format(base_url, course_id, assignment_id)
+    if verbose:
+       print("url: " + url)
+
+    payload=dict()
+    for user_id, g in grade_data.items():
+        payload["grade_data[{}][posted_grade]".format(user_id)]=g['grade']
+        if g['comment']:
+            payload["grade_data[{}][text_comment]".format(user_id)]=g['comment']
+
+    r = post(url, headers = header, data=payload)
+    if verbose:
+        print("result of post update_grades: {}".format(r.text))
+    if r.status_code == requests.codes.ok:
+        return r.json()
+    print("update_grades for {0} students produced status_code={1}".format(len(grade_data), r.status_code))
+    return None
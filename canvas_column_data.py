@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# canvas_column_data.py
+#
+# Bulk writes of the entries of custom gradebook columns
+#
+# A program that fills in custom columns would otherwise make one request per entry
+#   PUT /courses/:course_id/custom_gradebook_columns/:id/data/:user_id
+# so filling four columns for 300 students takes 1200 requests. Instead, the program calls
+# queue(column_id, user_id, content) for each entry and then flush(), which stores the queued
+# entries with
+#   PUT /courses/:course_id/custom_gradebook_columns/data
+# sending up to entries_per_bulk_request entries in each request. Canvas stores the entries of
+# each request in an asynchronous job, so flush() then follows the Progress of each job (with
+# canvas_client.wait_for_progress()) until it has completed or failed.
+#
+# All of the updates of an entry (column_id, user_id) are merged in the buffer and only the final
+# content is sent. How an update is merged is given by the merge argument of queue():
+#   last_writer_wins  (the default) the later content replaces the earlier one
+#   append_merge      the later content is appended to the earlier one, separated by
+#                     append_separator, unless it is already one of its parts
+# If the program has given the current entries of a column (as returned by
+#   GET /courses/:course_id/custom_gradebook_columns/:id/data
+# ) with note_current_entries(), the first update of an entry is merged with its current content,
+# and flush() only sends the entries whose final content differs from the current content.
+# As only the final contents are written, the students and teachers never see intermediate values.
+#
+# flush() returns the list of entries (dicts with column_id, user_id, and content) that have been
+# stored - leaving out those of a request that was refused or whose job did not complete - so that
+# the program can record them, for example in its journal (see canvas_journal.py) or in the mirror
+# (see canvas_mirror.py). A program that must record each chunk as soon as it is stored (so that an
+# interrupted run does not lose the record of the chunks already stored) gives flush() an on_stored
+# function, which is called with the entries of each chunk once its job has completed.
+#
+# 2026.10.18
+#
+
+import requests
+
+import canvas_client          # pooled access to the Canvas API
+
+# number of entries sent in one request
+entries_per_bulk_request=1000
+
+# separator between the parts of an entry built with append_merge
+append_separator=';'
+
+# the entries waiting to be stored, keyed by (column_id, user_id) and in the order they were queued
+_pending=dict()
+
+# the current content of the entries, keyed by (column_id, user_id), see note_current_entries()
+_current=dict()
+
+# merge policies, each returns the content of an entry with the content earlier updated by later
+def last_writer_wins(earlier, later):
+    return later
+
+def append_merge(earlier, later):
+    if not earlier:
+        return later
+    if later in earlier.split(append_separator):
+        return earlier
+    return earlier+append_separator+later
+
+# remember the current entries of column_id, entries is a list of dicts with user_id and content
+def note_current_entries(column_id, entries):
+    for e in entries:
+        _current[(int(column_id), int(e['user_id']))]=e['content']
+
+# the content of the entry of user_id in column_id once the queued updates have been stored
+def final_content(column_id, user_id):
+    key=(int(column_id), int(user_id))
+    if key in _pending:
+        return _pending[key]
+    return _current.get(key)
+
+# queue the content of the entry of user_id in column_id, to be stored by flush()
+def queue(column_id, user_id, content, merge=last_writer_wins):
+    key=(int(column_id), int(user_id))
+    if key in _pending:
+        earlier=_pending.pop(key)       # an entry queued again goes at the end, with its merged content
+    else:
+        earlier=_current.get(key)
+    if earlier is None:
+        _pending[key]=content
+    else:
+        _pending[key]=merge(earlier, content)
+
+# number of entries waiting to be stored
+def pending():
+    return len(_pending)
+
+def clear():
+    _pending.clear()
+    _current.clear()
+
+# store all of the queued entries, returning the list of those that have been stored
+# on_stored (if given) is called with the list of entries of each chunk as soon as it has been stored
+def flush(base_url, header, course_id, verbose=False, on_stored=None):
+    entries=[{'column_id': column_id, 'user_id': user_id, 'content': content}
+             for (column_id, user_id), content in _pending.items()
+             if _current.get((column_id, user_id)) != content]
+    unchanged=len(_pending)-len(entries)
+    _pending.clear()
+    if unchanged > 0:
+        print("{0} custom column entries are unchanged".format(unchanged))
+    if not entries:
+        return []
+
+    # Use the Canvas API to set the custom column entries of many users at once
+    #PUT /api/v1/courses/:course_id/custom_gradebook_columns/data
+    # column_data[][column_id], column_data[][user_id], column_data[][content]
+    # the result is a Progress object for the asynchronous job that stores the entries
+
+    url = "{0}/courses/{1}/custom_gradebook_columns/data".format(base_url, course_id)
+    if verbose:
+        print("url: " + url)
+
+    # send all of the requests first, so that the jobs of Canvas can run while the later chunks are sent
+    jobs=[]
+    for i in range(0, len(entries), entries_per_bulk_request):
+        some_entries=entries[i:i+entries_per_bulk_request]
+        r = canvas_client.put(url, headers = header, json={'column_data': some_entries})
+        if verbose:
+            print("result of putting data into custom_gradebook_columns:  {}".format(r.text))
+        if r.status_code != requests.codes.ok:
+            print("unable to store {0} custom column entries, status_code={1}".format(len(some_entries), r.status_code))
+            continue
+        jobs.append((r.json(), some_entries))
+
+    stored=[]
+    for progress, some_entries in jobs:
+        progress=canvas_client.wait_for_progress(base_url, header, progress, verbose)
+        if not progress or progress['workflow_state'] != 'completed':
+            print("storing {0} custom column entries did not complete: {1}".format(len(some_entries), progress))
+            continue
+        stored.extend(some_entries)
+        for e in some_entries:
+            _current[(e['column_id'], e['user_id'])]=e['content']
+        if on_stored:
+            on_stored(some_entries)
+
+    print("stored {0} of {1} custom column entries".format(len(stored), len(entries)))
+    return stored
@@ -0,0 +1,299 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# canvas_graphql.py
+#
+# Bulk fetching of course data via the Canvas GraphQL API (POST /api/graphql)
+#
+# Using the REST API, a program that needs the roster of a course together with the sections,
+# avatars, or submissions makes one paginated request per collection and often one request per
+# user (for example, GET /users/:id/profile to get an avatar). A GraphQL query can ask for the
+# enrollments together with the user and section of each enrollment, so the same data arrives in
+# a few paginated queries (each page of up to graphql_page_size nodes).
+#
+# The functions below return their results in the same form as the corresponding REST endpoints
+# (ids as integers, snake_case keys), so that a program can use either path and process the
+# results in the same way:
+#   course_enrollments()  - as GET /courses/:id/enrollments (optionally with user.avatar_url)
+#   course_sections()     - as GET /courses/:id/sections
+#   course_submissions()  - as GET /courses/:id/students/submissions (plus the user's name)
+# Fields that the GraphQL API does not provide are None.
+# If the query for any page fails, they raise RuntimeError rather than returning part of the nodes.
+#
+# The queries are sent via canvas_client, so they use the pooled session and the throttle;
+# however, as they are POSTs, their results are not cached.
+#
+# For details see https://canvas.instructure.com/doc/api/file.graphql.html
+#
+# 2026.10.18
+#
+
+import requests
+import canvas_client          # pooled access to the Canvas API
+
+graphql_page_size=100
+
+enrollments_query="""
+query CourseEnrollments($courseId: ID!, $first: Int, $after: String, $avatars: Boolean!) {
+  course(id: $courseId) {
+    _id
+    sisId
+    enrollmentsConnection(first: $first, after: $after) {
+      nodes {
+        _id
+        type
+        state
+        createdAt
+        updatedAt
+        startAt
+        endAt
+        lastActivityAt
+        totalActivityTime
+        limitPrivilegesToCourseSection
+        htmlUrl
+        associatedUser { _id }
+        section { _id sisId }
+        grades {
+          htmlUrl
+          currentGrade
+          currentScore
+          finalGrade
+          finalScore
+          unpostedCurrentGrade
+          unpostedCurrentScore
+          unpostedFinalGrade
+          unpostedFinalScore
+        }
+        user {
+          _id
+          name
+          sortableName
+          shortName
+          sisId
+          loginId
+          integrationId
+          createdAt
+          avatarUrl @include(if: $avatars)
+        }
+      }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+}
+"""
+
+sections_query="""
+query CourseSections($courseId: ID!, $first: Int, $after: String) {
+  course(id: $courseId) {
+    _id
+    sisId
+    sectionsConnection(first: $first, after: $after) {
+      nodes {
+        _id
+        name
+        sisId
+        integrationId
+        startAt
+        endAt
+      }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+}
+"""
+
+submissions_query="""
+query CourseSubmissions($courseId: ID!, $first: Int, $after: String) {
+  course(id: $courseId) {
+    submissionsConnection(first: $first, after: $after) {
+      nodes {
+        _id
+        attempt
+        state
+        score
+        grade
+        enteredScore
+        enteredGrade
+        submittedAt
+        gradedAt
+        late
+        missing
+        excused
+        assignment { _id name }
+        user { _id name sortableName }
+      }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+}
+"""
+
+# the programs' baseUrl ends with /api/v1, the GraphQL endpoint is /api/graphql on the same host
+def graphql_url(base_url):
+    if base_url.endswith('/api/v1'):
+        base_url=base_url[:-len('/api/v1')]
+    return base_url+'/api/graphql'
+
+def legacy_id(value):
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+# send one query, returning its data or None if the query failed
+def query(base_url, header, query_text, variables):
+    # Use the Canvas GraphQL API
+    # POST /api/graphql
+    url=graphql_url(base_url)
+    # a query changes nothing, so it can be retried like a GET
+    r=canvas_client.post(url, json={'query': query_text, 'variables': variables}, headers=header, idempotent=True)
+    if r.status_code != requests.codes.ok:
+        print("GraphQL query failed with status {0}: {1}".format(r.status_code, r.text))
+        return None
+
+    result=r.json()
+    if result.get('errors'):
+        print("GraphQL query returned errors: {}".format(result['errors']))
+        return None
+    return result.get('data')
+
+# yield the nodes of the connection found by following path in the result of the query,
+# sending the query once per page
+def connection_nodes(base_url, header, query_text, variables, path):
+    cursor=None
+    page_number=0
+    while True:
+        page_variables=dict(variables)
+        page_variables['first']=graphql_page_size
+        page_variables['after']=cursor
+        data=query(base_url, header, query_text, page_variables)
+        # a page that cannot be fetched ends the listing with an exception, so that the caller never
+        # works with only part of the nodes
+        if data is None:
+            raise RuntimeError("GraphQL query for {0} failed after {1} pages".format('.'.join(path), page_number))
+        connection=data
+        for name in path:
+            connection=connection.get(name) if connection else None
+        if not connection:
+            raise RuntimeError("GraphQL result has no {0}".format('.'.join(path)))
+        page_number=page_number+1
+
+        for node in connection['nodes']:
+            yield node
+
+        page_info=connection['pageInfo']
+        if not page_info['hasNextPage']:
+            return
+        cursor=page_info['endCursor']
+
+def enrollment_from_node(course_id, node, avatars):
+    section=node.get('section') or {}
+    user=node.get('user') or {}
+    grades=node.get('grades') or {}
+    associated_user=node.get('associatedUser') or {}
+    user_id=legacy_id(user.get('_id'))
+    enrollment={'id': legacy_id(node['_id']),
+                'user_id': user_id,
+                'course_id': legacy_id(course_id),
+                'type': node.get('type'),
+                'role': node.get('type'),
+                'role_id': None,
+                'enrollment_state': node.get('state'),
+                'course_section_id': legacy_id(section.get('_id')),
+                'sis_section_id': section.get('sisId'),
+                'sis_user_id': user.get('sisId'),
+                'section_integration_id': None,
+                'course_integration_id': None,
+                'associated_user_id': legacy_id(associated_user.get('_id')),
+                'created_at': node.get('createdAt'),
+                'updated_at': node.get('updatedAt'),
+                'start_at': node.get('startAt'),
+                'end_at': node.get('endAt'),
+                'sis_course_id': None,
+                'sis_account_id': None,
+                'root_account_id': None,
+                'limit_privileges_to_course_section': node.get('limitPrivilegesToCourseSection'),
+                'last_activity_at': node.get('lastActivityAt'),
+                'last_attended_at': None,
+                'total_activity_time': node.get('totalActivityTime'),
+                'html_url': node.get('htmlUrl'),
+                'grades': {'html_url': grades.get('htmlUrl'),
+                           'current_grade': grades.get('currentGrade'),
+                           'current_score': grades.get('currentScore'),
+                           'final_grade': grades.get('finalGrade'),
+                           'final_score': grades.get('finalScore'),
+                           'unposted_current_grade': grades.get('unpostedCurrentGrade'),
+                           'unposted_current_score': grades.get('unpostedCurrentScore'),
+                           'unposted_final_grade': grades.get('unpostedFinalGrade'),
+                           'unposted_final_score': grades.get('unpostedFinalScore'),
+                           },
+                'user': {'id': user_id,
+                         'created_at': user.get('createdAt'),
+                         'name': user.get('name'),
+                         'sortable_name': user.get('sortableName'),
+                         'short_name': user.get('shortName'),
+                         'login_id': user.get('loginId'),
+                         'sis_user_id': user.get('sisId'),
+                         'integration_id': user.get('integrationId'),
+                         },
+                }
+    if avatars:
+        enrollment['user']['avatar_url']=user.get('avatarUrl')
+    return enrollment
+
+# return the enrollments in the course, with avatars=True each user also has an avatar_url
+def course_enrollments(base_url, header, course_id, avatars=False):
+    variables={'courseId': str(course_id), 'avatars': avatars}
+    return [enrollment_from_node(course_id, node, avatars)
+            for node in connection_nodes(base_url, header, enrollments_query, variables,
+                                         ['course', 'enrollmentsConnection'])]
+
+def course_sections(base_url, header, course_id):
+    sections=[]
+    variables={'courseId': str(course_id)}
+    for node in connection_nodes(base_url, header, sections_query, variables, ['course', 'sectionsConnection']):
+        sections.append({'id': legacy_id(node['_id']),
+                         'name': node.get('name'),
+                         'sis_section_id': node.get('sisId'),
+                         'course_id': legacy_id(course_id),
+                         'start_at': node.get('startAt'),
+                         'end_at': node.get('endAt'),
+                         'integration_id': node.get('integrationId'),
+                         'nonxlist_course_id': None,
+                         'sis_course_id': None,
+                         'sis_import_id': None,
+                         })
+    return sections
+
+# return the submissions of all students for all assignments in the course
+# each submission also has a 'user' with the id, name, and sortable_name of the student
+def course_submissions(base_url, header, course_id):
+    submissions=[]
+    variables={'courseId': str(course_id)}
+    for node in connection_nodes(base_url, header, submissions_query, variables, ['course', 'submissionsConnection']):
+        assignment=node.get('assignment') or {}
+        user=node.get('user') or {}
+        submissions.append({'id': legacy_id(node['_id']),
+                            'assignment_id': legacy_id(assignment.get('_id')),
+                            'assignment_name': assignment.get('name'),
+                            'user_id': legacy_id(user.get('_id')),
+                            'workflow_state': node.get('state'),
+                            'attempt': node.get('attempt'),
+                            'score': node.get('score'),
+                            'grade': node.get('grade'),
+                            'entered_score': node.get('enteredScore'),
+                            'entered_grade': node.get('enteredGrade'),
+                            'submitted_at': node.get('submittedAt'),
+                            'graded_at': node.get('gradedAt'),
+                            'late': node.get('late'),
+                            'missing': node.get('missing'),
+                            'excused': node.get('excused'),
+                            'user': {'id': legacy_id(user.get('_id')),
+                                     'name': user.get('name'),
+                                     'sortable_name': user.get('sortableName'),
+                                     },
+                            })
+    return submissions
@@ -0,0 +1,126 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# canvas_journal.py
+#
+# Journal of the writes made by a program, so that an interrupted run can be resumed
+#
+# A program that makes a long series of writes (for example, one PUT per student to set a grade or
+# the content of a custom column) records each write that Canvas has accepted in a journal file, in
+# JSON Lines format, one line per write:
+#   {"course": "11", "endpoint": "PUT /courses/:id/custom_gradebook_columns/:id/data/:id",
+#    "item": "17/12345", "payload": "<sha256 of the data written>", "at": "2026-10-18T10:00:00"}
+#
+# When the program is run again with the option --resume, the journal of the earlier run is read
+# and the program skips each write that it finds there with the same payload - so if a run fails
+# after 1800 of 2000 writes, the second run only makes the remaining 200. If the data to be written
+# for an item has changed, the write is made again. Without --resume the journal is started afresh.
+#
+# The journal is named PROGRAM-COURSE_ID-journal.jsonl in the current directory, unless another name
+# is given with the option --journal FILE.
+#
+# Each line is flushed to disk before the program continues, so that the journal is complete up to
+# the last write, whatever the reason the program stopped.
+#
+# 2026.10.18
+#
+
+import os
+import sys
+import json
+import hashlib
+import datetime
+import threading
+
+_journal_file=None
+_journal_lock=threading.Lock()
+_completed=set()
+journal_filename=None
+
+# parser can be either an optparse.OptionParser or an argparse.ArgumentParser
+def add_options(parser):
+    if hasattr(parser, 'add_option'):
+        add=parser.add_option
+    else:
+        add=parser.add_argument
+
+    add('--resume',
+        dest="resume",
+        default=False,
+        action="store_true",
+        help="skip the writes recorded in the journal of an earlier run")
+
+    add('--journal',
+        dest="journal_filename",
+        default=None,
+        help="record the writes made in the journal FILE", metavar="FILE")
+
+def payload_hash(payload):
+    h=hashlib.sha256()
+    h.update(json.dumps(payload, sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+def journal_key(course_id, endpoint, item, payload):
+    return (str(course_id), endpoint, str(item), payload_hash(payload))
+
+# open the journal for the writes to course_id
+# options can be the result of an optparse or argparse parser, or the dict vars() of the latter
+def start(options, course_id):
+    global _journal_file, journal_filename
+    if isinstance(options, dict):
+        option=options.get
+    else:
+        option=lambda name: getattr(options, name, None)
+
+    journal_filename=option('journal_filename')
+    if not journal_filename:
+        program=os.path.splitext(os.path.basename(sys.argv[0]))[0]
+        journal_filename="{0}-{1}-journal.jsonl".format(program, course_id)
+
+    _completed.clear()
+    if option('resume'):
+        complete_last_line=True
+        try:
+            with open(journal_filename) as f:
+                for line in f:
+                    complete_last_line=line.endswith('\n')
+                    try:
+                        e=json.loads(line)
+                    except ValueError:
+                        continue        # a line that was cut short when the program stopped
+                    _completed.add((e['course'], e['endpoint'], e['item'], e['payload']))
+            print("resuming: {0} writes recorded in {1}".format(len(_completed), journal_filename))
+        except OSError:
+            print("no journal named {} to resume from, starting from the beginning".format(journal_filename))
+        _journal_file=open(journal_filename, 'a')
+        if not complete_last_line:
+            _journal_file.write('\n')
+    else:
+        _journal_file=open(journal_filename, 'w')
+
+# return True if the write of payload for item was recorded in the journal being resumed
+def completed(course_id, endpoint, item, payload):
+    return journal_key(course_id, endpoint, item, payload) in _completed
+
+# record that Canvas has accepted the write of payload for item
+def record(course_id, endpoint, item, payload):
+    key=journal_key(course_id, endpoint, item, payload)
+    line=json.dumps({'course': key[0],
+                     'endpoint': key[1],
+                     'item': key[2],
+                     'payload': key[3],
+                     'at': datetime.datetime.now().isoformat(timespec='seconds'),
+                     })
+    with _journal_lock:
+        _completed.add(key)
+        if _journal_file is not None:
+            _journal_file.write(line+'\n')
+            _journal_file.flush()
+            os.fsync(_journal_file.fileno())
+
+def close():
+    global _journal_file
+    if _journal_file is not None:
+        _journal_file.close()
+        _journal_file=None
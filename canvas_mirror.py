@@ -0,0 +1,311 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# canvas_mirror.py
+#
+# Local mirror (an SQLite database) of the gradebook of a course, refreshed incrementally
+#
+# A program that reports on the gradebook of a big course would otherwise fetch all of the
+# submissions of all students each time it is run. With the mirror, the first run fetches the
+# assignments, the submissions, and the custom columns (with their data) and stores them in the
+# database; each later run only fetches what has changed since the last refresh:
+#   - the grades given since then, from the gradebook history feed (GET /courses/:id/gradebook_history/feed),
+#     which lists the most recent gradings first, so it is only read back to the time of the last refresh
+#   - the submissions made since then (GET /courses/:id/students/submissions with submitted_since)
+#   - the assignments and the custom columns, which are small, are fetched again (and usually come
+#     from the cache in canvas_cache.py after a 304); the custom column data is fetched again, as
+#     Canvas has no way to ask for only the entries that have changed
+# The refresh starts from a little (sync_overlap seconds) before the time of the last refresh, so
+# that a change made while the last refresh was in progress is not missed.
+#
+# The programs then read the gradebook with assignments(), submissions(), submission(),
+# custom_columns(), and custom_column_data(), which return the same form as the REST API, and
+# call note_grade() and note_custom_column_entry() after each write that Canvas has accepted so
+# that the mirror stays up to date during the run.
+#
+# The database of a course is named HOST-COURSE_ID.sqlite in the directory given in the
+# configuration file, for example:
+# {
+#     "canvas":{ ... },
+#     "mirror":{
+#         "directory": "/tmp/canvas-mirror"
+#     }
+# }
+# by default this is the directory mirror in the cache directory of canvas_cache.py.
+#
+# A program that uses the mirror accepts the options --mirror (use the mirror rather than fetching
+# the whole gradebook) and --rebuild-mirror (throw away the mirror and fetch everything again).
+#
+# 2026.10.18
+#
+
+import os
+import json
+import sqlite3
+import datetime
+from urllib.parse import urlsplit
+
+import canvas_client          # pooled access to the Canvas API
+import canvas_cache
+
+sync_overlap=300                # seconds
+
+mirror_configuration={'directory': None}
+
+schema="""
+CREATE TABLE IF NOT EXISTS sync (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS assignments (id INTEGER PRIMARY KEY, name TEXT, json TEXT);
+CREATE TABLE IF NOT EXISTS submissions (assignment_id INTEGER, user_id INTEGER,
+                                        workflow_state TEXT, grade TEXT, score REAL,
+                                        submitted_at TEXT, graded_at TEXT, json TEXT,
+                                        PRIMARY KEY (assignment_id, user_id));
+CREATE TABLE IF NOT EXISTS custom_columns (id INTEGER PRIMARY KEY, title TEXT, json TEXT);
+CREATE TABLE IF NOT EXISTS custom_column_data (column_id INTEGER, user_id INTEGER, content TEXT,
+                                               PRIMARY KEY (column_id, user_id));
+"""
+
+# the fields of a submission that a gradebook history feed entry gives new values for
+feed_fields=['grade', 'score', 'entered_grade', 'entered_score', 'graded_at', 'grader_id',
+             'submitted_at', 'attempt', 'workflow_state']
+
+_connection=None
+_base_url=None
+_header=None
+_course_id=None
+mirror_filename=None
+
+def initialize(configuration):
+    mirror_config=configuration.get("mirror", {}) if configuration else {}
+    if 'directory' in mirror_config:
+        mirror_configuration['directory']=os.path.expanduser(mirror_config['directory'])
+
+# parser can be either an optparse.OptionParser or an argparse.ArgumentParser
+def add_options(parser):
+    if hasattr(parser, 'add_option'):
+        add=parser.add_option
+    else:
+        add=parser.add_argument
+
+    add('--mirror',
+        dest="use_mirror",
+        default=False,
+        action="store_true",
+        help="read the gradebook from the local mirror, after refreshing it with the changes since the last run")
+
+    add('--rebuild-mirror',
+        dest="rebuild_mirror",
+        default=False,
+        action="store_true",
+        help="throw away the local mirror of the gradebook and fetch it again")
+
+# options can be the result of an optparse or argparse parser, or the dict vars() of the latter
+def wanted(options):
+    if isinstance(options, dict):
+        option=options.get
+    else:
+        option=lambda name: getattr(options, name, None)
+    return bool(option('use_mirror') or option('rebuild_mirror'))
+
+def enabled():
+    return _connection is not None
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def iso(t):
+    return t.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def parse_iso(s):
+    return datetime.datetime.fromisoformat(s.replace('Z', '+00:00'))
+
+# open (creating if needed) the mirror of the course and bring it up to date
+def start(options, base_url, header, course_id):
+    global _connection, _base_url, _header, _course_id, mirror_filename
+    if isinstance(options, dict):
+        option=options.get
+    else:
+        option=lambda name: getattr(options, name, None)
+
+    directory=mirror_configuration['directory'] or os.path.join(canvas_cache.cache_configuration['directory'], 'mirror')
+    os.makedirs(directory, exist_ok=True)
+    host=urlsplit(base_url).netloc.replace(':', '_')
+    mirror_filename=os.path.join(directory, "{0}-{1}.sqlite".format(host, course_id))
+    if option('rebuild_mirror') and os.path.exists(mirror_filename):
+        os.remove(mirror_filename)
+
+    _connection=sqlite3.connect(mirror_filename)
+    _connection.row_factory=sqlite3.Row
+    _connection.executescript(schema)
+    _base_url=base_url
+    _header=header
+    _course_id=course_id
+    refresh()
+
+def close():
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection=None
+
+def last_sync():
+    row=_connection.execute("SELECT value FROM sync WHERE name='last_sync'").fetchone()
+    if row:
+        return parse_iso(row['value'])
+    return None
+
+def refresh():
+    started=utc_now()
+    since=last_sync()
+    if since is not None:
+        since=since-datetime.timedelta(seconds=sync_overlap)
+
+    with _connection:
+        refresh_assignments()
+        refresh_custom_columns()
+        if since is None:
+            number=refresh_all_submissions()
+            print("mirror: fetched {0} submissions into {1}".format(number, mirror_filename))
+        else:
+            graded=refresh_graded_since(since)
+            submitted=refresh_submitted_since(since)
+            print("mirror: {0} grades and {1} submissions changed since {2}".format(graded, submitted, iso(since)))
+        _connection.execute("INSERT OR REPLACE INTO sync (name, value) VALUES ('last_sync', ?)", (iso(started),))
+
+def refresh_assignments():
+    # Use the Canvas API to get the list of assignments for the course
+    #GET /api/v1/courses/:course_id/assignments
+    url = "{0}/courses/{1}/assignments".format(_base_url, _course_id)
+    assignments=canvas_client.get_all_pages(url, params={'per_page': '100'}, headers=_header)
+    _connection.execute("DELETE FROM assignments")
+    _connection.executemany("INSERT INTO assignments (id, name, json) VALUES (?, ?, ?)",
+                            [(a['id'], a['name'], json.dumps(a)) for a in assignments])
+
+def refresh_custom_columns():
+    # Use the Canvas API to get the list of custom columns for the course and the data of each column
+    #GET /api/v1/courses/:course_id/custom_gradebook_columns
+    #GET /api/v1/courses/:course_id/custom_gradebook_columns/:id/data
+    url = "{0}/courses/{1}/custom_gradebook_columns".format(_base_url, _course_id)
+    columns=canvas_client.get_all_pages(url, params={'per_page': '100'}, headers=_header)
+    _connection.execute("DELETE FROM custom_columns")
+    _connection.execute("DELETE FROM custom_column_data")
+    _connection.executemany("INSERT INTO custom_columns (id, title, json) VALUES (?, ?, ?)",
+                            [(c['id'], c['title'], json.dumps(c)) for c in columns])
+    for c in columns:
+        url = "{0}/courses/{1}/custom_gradebook_columns/{2}/data".format(_base_url, _course_id, c['id'])
+        data=canvas_client.get_all_pages(url, params={'per_page': '100'}, headers=_header)
+        _connection.executemany("INSERT OR REPLACE INTO custom_column_data (column_id, user_id, content) VALUES (?, ?, ?)",
+                                [(c['id'], e['user_id'], e['content']) for e in data])
+
+def store_submission(s):
+    _connection.execute("INSERT OR REPLACE INTO submissions (assignment_id, user_id, workflow_state, grade, score, submitted_at, graded_at, json) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (s['assignment_id'], s['user_id'], s.get('workflow_state'), s.get('grade'), s.get('score'),
+                         s.get('submitted_at'), s.get('graded_at'), json.dumps(s)))
+
+def refresh_all_submissions():
+    # Use the Canvas API to get the submissions of all students for all assignments
+    #GET /api/v1/courses/:course_id/students/submissions
+    url = "{0}/courses/{1}/students/submissions".format(_base_url, _course_id)
+    extra_parameters={'student_ids[]': 'all',
+                      'include[]': 'user',
+                      'per_page': '100'
+                      }
+    _connection.execute("DELETE FROM submissions")
+    number=0
+    for s in canvas_client.iterate_pages(url, params=extra_parameters, headers=_header):
+        store_submission(s)
+        number=number+1
+    return number
+
+# apply the entries of the gradebook history feed made since the given time
+def refresh_graded_since(since):
+    # Use the Canvas API to get the gradebook history, most recent first
+    #GET /api/v1/courses/:course_id/gradebook_history/feed
+    url = "{0}/courses/{1}/gradebook_history/feed".format(_base_url, _course_id)
+    applied=set()
+    for e in canvas_client.iterate_pages(url, params={'per_page': '100'}, headers=_header):
+        if not e.get('graded_at'):
+            continue
+        if parse_iso(e['graded_at']) < since:
+            break
+        key=(e['assignment_id'], e['user_id'])
+        if key in applied:      # only the most recent version of a submission counts
+            continue
+        applied.add(key)
+        s=submission(e['assignment_id'], e['user_id']) or {'assignment_id': e['assignment_id'], 'user_id': e['user_id']}
+        for field in feed_fields:
+            if field in e:
+                s[field]=e[field]
+        store_submission(s)
+    return len(applied)
+
+def refresh_submitted_since(since):
+    # Use the Canvas API to get the submissions made since the given time
+    #GET /api/v1/courses/:course_id/students/submissions
+    url = "{0}/courses/{1}/students/submissions".format(_base_url, _course_id)
+    extra_parameters={'student_ids[]': 'all',
+                      'submitted_since': iso(since),
+                      'include[]': 'user',
+                      'per_page': '100'
+                      }
+    number=0
+    for s in canvas_client.iterate_pages(url, params=extra_parameters, headers=_header):
+        store_submission(s)
+        number=number+1
+    return number
+
+# Queries
+def assignments():
+    return [json.loads(row['json']) for row in _connection.execute("SELECT json FROM assignments ORDER BY id")]
+
+# the submissions of all students, or only those for the given assignment or student
+def submissions(assignment_id=None, user_id=None):
+    query="SELECT json FROM submissions WHERE 1=1"
+    values=[]
+    if assignment_id is not None:
+        query=query+" AND assignment_id=?"
+        values.append(int(assignment_id))
+    if user_id is not None:
+        query=query+" AND user_id=?"
+        values.append(int(user_id))
+    return [json.loads(row['json']) for row in _connection.execute(query+" ORDER BY user_id, assignment_id", values)]
+
+def submission(assignment_id, user_id):
+    row=_connection.execute("SELECT json FROM submissions WHERE assignment_id=? AND user_id=?",
+                            (int(assignment_id), int(user_id))).fetchone()
+    if row:
+        return json.loads(row['json'])
+    return None
+
+def custom_columns():
+    return [json.loads(row['json']) for row in _connection.execute("SELECT json FROM custom_columns ORDER BY id")]
+
+# the entries of a custom column in the form returned by GET /courses/:id/custom_gradebook_columns/:id/data
+def custom_column_data(column_id):
+    return [{'content': row['content'], 'user_id': row['user_id']}
+            for row in _connection.execute("SELECT user_id, content FROM custom_column_data WHERE column_id=? ORDER BY user_id",
+                                           (int(column_id),))]
+
+# Writes made by the program
+def note_grade(assignment_id, user_id, grade):
+    if _connection is None:
+        return
+    s=submission(assignment_id, user_id) or {'assignment_id': int(assignment_id), 'user_id': int(user_id)}
+    s['grade']=None if grade is None else str(grade)
+    s['entered_grade']=s['grade']
+    try:
+        s['score']=float(grade)
+    except (TypeError, ValueError):
+        s['score']=None
+    s['entered_score']=s['score']
+    s['workflow_state']='graded'
+    s['graded_at']=iso(utc_now())
+    with _connection:
+        store_submission(s)
+
+def note_custom_column_entry(column_id, user_id, content):
+    if _connection is None:
+        return
+    with _connection:
+        _connection.execute("INSERT OR REPLACE INTO custom_column_data (column_id, user_id, content) VALUES (?, ?, ?)",
+                            (int(column_id), int(user_id), content))
@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# canvas_profile.py
+#
+# Per endpoint statistics of the requests made via canvas_client.py
+#
+# When a program is run with the option --profile, canvas_client calls record() after each request.
+# The requests are grouped by method and endpoint template (for example,
+# GET /courses/:id/assignments/:id/submissions/:id) and for each group the number of calls, a
+# histogram of the latencies, the number of bytes in the responses, the number of retries after
+# throttling, and the number of responses that came from the cache (directly or after a 304) are
+# recorded. When the program exits, the statistics are written as JSON to PROGRAM-profile.json
+# and a summary, with the groups that took the most time first, is printed.
+#
+# 2026.10.18
+#
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+
+# upper bounds of the buckets of the latency histograms, in milliseconds
+latency_buckets=[10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+statistics=dict()
+statistics_lock=threading.Lock()
+start_time=None
+output_filename=None
+
+def new_entry():
+    return {'calls': 0,
+            'total_seconds': 0.0,
+            'max_seconds': 0.0,
+            'bytes': 0,
+            'retries': 0,
+            'cache_hits': 0,
+            'not_modified': 0,
+            'errors': 0,
+            'latency_ms_histogram': {str(b): 0 for b in latency_buckets+['inf']},
+            }
+
+def bucket(seconds):
+    ms=seconds*1000.0
+    for b in latency_buckets:
+        if ms <= b:
+            return str(b)
+    return 'inf'
+
+# event is a dict with the method, endpoint, status, seconds, bytes, retries, and cache
+# (one of 'hit', 'revalidated', 'miss', or None) of a request
+def record(event):
+    key="{0} {1}".format(event['method'], event['endpoint'])
+    with statistics_lock:
+        e=statistics.get(key)
+        if e is None:
+            e=new_entry()
+            statistics[key]=e
+        e['calls']=e['calls']+1
+        e['total_seconds']=e['total_seconds']+event['seconds']
+        e['max_seconds']=max(e['max_seconds'], event['seconds'])
+        e['bytes']=e['bytes']+event['bytes']
+        e['retries']=e['retries']+event['retries']
+        if event['cache'] == 'hit':
+            e['cache_hits']=e['cache_hits']+1
+        elif event['cache'] == 'revalidated':
+            e['not_modified']=e['not_modified']+1
+        if event['status'] is None or event['status'] >= 400:
+            e['errors']=e['errors']+1
+        e['latency_ms_histogram'][bucket(event['seconds'])]+=1
+
+def enable(filename=None):
+    global start_time, output_filename
+    if start_time is not None:
+        return
+    start_time=time.time()
+    if filename is None:
+        program=os.path.splitext(os.path.basename(sys.argv[0]))[0] or 'canvas'
+        filename="{}-profile.json".format(program)
+    output_filename=filename
+    atexit.register(report)
+
+def enabled():
+    return start_time is not None
+
+def report():
+    with statistics_lock:
+        entries=sorted(statistics.items(), key=lambda x: -x[1]['total_seconds'])
+        wall_time=time.time()-start_time
+        output={'program': sys.argv[0],
+                'wall_seconds': round(wall_time, 3),
+                'endpoints': dict(entries),
+                }
+
+    try:
+        with open(output_filename, 'w') as f:
+            json.dump(output, f, indent=4)
+    except OSError as e:
+        print("unable to write profile to {0}: {1}".format(output_filename, e))
+
+    total_calls=sum(e['calls'] for k, e in entries)
+    print("\nCanvas API profile: {0} requests in {1:.2f} seconds (details in {2})".format(total_calls, wall_time, output_filename))
+    print("{0:>7} {1:>9} {2:>8} {3:>8} {4:>12} {5:>6} {6:>6} {7:>6}  {8}".format(
+        'calls', 'total s', 'mean ms', 'max ms', 'bytes', 'retry', 'cache', '304', 'endpoint'))
+    for k, e in entries:
+        print("{0:>7} {1:>9.2f} {2:>8.1f} {3:>8.1f} {4:>12} {5:>6} {6:>6} {7:>6}  {8}".format(
+            e['calls'], e['total_seconds'], 1000.0*e['total_seconds']/e['calls'], 1000.0*e['max_seconds'],
+            e['bytes'], e['retries'], e['cache_hits'], e['not_modified'], k))
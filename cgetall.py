@@ -24,6 +24,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -50,6 +51,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -69,8 +71,6 @@ def initialize(options):
 log_file = 'log.txt' # a log file. it will log things
 
 def list_pages(course_id):
-    list_of_all_pages=[]
-
     # Use the Canvas API to get the list of pages for this course
     #GET /api/v1/courses/:course_id/pages
 
@@ -78,25 +78,13 @@ def list_pages(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-
-        for p_response in page_response:  
-            list_of_all_pages.append(p_response)
-
-            # the following is needed when the reponse has been paginated
-            # i.e., when the response is split into pieces - each returning only some of the list of modules
-            # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-            while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
-                page_response = r.json()  
-                for p_response in page_response:  
-                    list_of_all_pages.append(p_response)
+    extra_parameters={'per_page': '100'}
+    # the pages of the response are fetched concurrently using the "last" link
+    list_of_all_pages=canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
 
-            if Verbose_Flag:
-                for p in list_of_all_pages:
-                    print("{}".format(p["title"]))
+    if Verbose_Flag:
+        for p in list_of_all_pages:
+            print("{}".format(p["title"]))
 
     return list_of_all_pages
 
@@ -106,7 +94,7 @@ def getall_course_pages(course_id, destination_directory):
         if Verbose_Flag:
             print(url)
         payload={}
-        r = requests.get(url, headers = header, data=payload)
+        r = canvas_client.get(url, headers = header, data=payload)
         if Verbose_Flag:
             print("r.status_code: {}".format(r.status_code))
         if r.status_code == requests.codes.ok:
@@ -163,7 +151,10 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
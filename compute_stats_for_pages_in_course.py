@@ -23,6 +23,7 @@
 
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -56,6 +57,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -77,7 +79,7 @@ def compute_stats_for_pages_in_course(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if r.status_code == requests.codes.ok:
         page_response=r.json()
     else:
@@ -92,7 +94,7 @@ def compute_stats_for_pages_in_course(course_id):
     # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
     if r.links.get('current', []):
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 list_of_all_pages.append(p_response)
@@ -106,7 +108,7 @@ def compute_stats_for_pages_in_course(course_id):
         if Verbose_Flag:
             print(url)
         payload={}
-        r = requests.get(url, headers = header, data=payload)
+        r = canvas_client.get(url, headers = header, data=payload)
         if r.status_code == requests.codes.ok:
             page_response = r.json()  
             if Verbose_Flag:
@@ -158,7 +160,7 @@ def list_pages(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if r.status_code == requests.codes.ok:
         page_response=r.json()
 
@@ -169,7 +171,7 @@ def list_pages(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 list_of_all_pages.append(p_response)
@@ -192,7 +194,10 @@ def main():
     parser.add_option("--config", dest="config_filename",
                       help="read configuration from FILE", metavar="FILE")
     
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
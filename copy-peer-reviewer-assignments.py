@@ -15,6 +15,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -49,6 +50,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -84,7 +86,7 @@ def list_assignments(course_id):
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting assignments: {}".format(r.text))
 
@@ -98,7 +100,7 @@ def list_assignments(course_id):
        # i.e., when the response is split into pieces - each returning only some of the list of modules
        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
        while r.links['current']['url'] != r.links['last']['url']:  
-              r = requests.get(r.links['next']['url'], headers=header)  
+              r = canvas_client.get(r.links['next']['url'], headers=header)  
               page_response = r.json()  
               for p_response in page_response:  
                      assignments_found_thus_far.append(p_response)
@@ -115,7 +117,7 @@ def list_peer_reviews(course_id, assignment_id):
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting peer reviews: {}".format(r.text))
 
@@ -130,7 +132,7 @@ def list_peer_reviews(course_id, assignment_id):
        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
        if 'link' in r.headers:
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             reviews_found_thus_far.append(p_response)
@@ -152,7 +154,7 @@ def students_in_course(course_id):
        # enrollment_type[] should be set to 'student'
        # include[] perhaps include email, enrollments, avatar_url
        extra_parameters={'enrollment_type[]': 'student', 'include[]': 'email, enrollments, avatar_url'}
-       r = requests.get(url, params=extra_parameters, headers = header)
+       r = canvas_client.get(url, params=extra_parameters, headers = header)
        if Verbose_Flag:
               print("result of getting student enrollments: {}".format(r.text))
 
@@ -167,7 +169,7 @@ def students_in_course(course_id):
        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
        if 'link' in r.headers:
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             students_found_thus_far.append(p_response)
@@ -183,8 +185,8 @@ def submission_for_assignment_by_user(course_id, assignment_id, user_id):
               print("url: {}".format(url))
 
        #extra_parameters={'student_ids[]': 'all'}
-       #r = requests.get(url, params=extra_parameters, headers = header)
-       r = requests.get(url, headers = header)
+       #r = canvas_client.get(url, params=extra_parameters, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting submissions: {}".format(r.text))
 
@@ -221,7 +223,7 @@ def assign_peer_reviewer(course_id, assignment_id, user_id, submission_id):
 
        payload={'user_id': user_id}
 
-       r = requests.post(url, headers = header, data=payload)
+       r = canvas_client.post(url, headers = header, data=payload)
        if Verbose_Flag:
               print("result of post assigning peer reviwer: {}".format(r.text))
        if r.status_code == requests.codes.ok:
@@ -292,7 +294,10 @@ def main():
                          help="for the container enviroment in the virtual machine"
        )
 
+       canvas_client.add_options(parser)
+
        options, remainder = parser.parse_args()
+       canvas_client.set_options(options)
 
        Verbose_Flag=options.verbose
        if Verbose_Flag:
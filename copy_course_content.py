@@ -27,6 +27,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -56,6 +57,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -84,14 +86,14 @@ def migrateContents(old_course, new_course):
 	     'copy[all_rubrics]':'1',
 	     'copy[all_attachments]':'1'}
     url = "{0}/courses/{1}/content_migrations".format(baseUrl, new_course)
-    r = requests.post(url, params=payload, headers = header)
+    r = canvas_client.post(url, params=payload, headers = header)
     data = r.json()
     print("response is {}".format(data))
     progress_url = data[u'progress_url']
     print("Migration URL is: {}".format(progress_url))
     progress = 0
     while progress != 100:
-        progress_check = requests.get(progress_url, headers = header)
+        progress_check = canvas_client.get(progress_url, headers = header)
         progress_result = progress_check.json()
         print("Migration Status is: {0}  | progress: {1}" .format(data[u'workflow_state'], progress_result[u'completion']))
         #print(progress_result)
@@ -109,7 +111,7 @@ def migrateContents(old_course, new_course):
 def checkMigration(migration_id):
     #GET /api/v1/courses/:course_id/content_migrations/:content_migration_id/migration_issues
     url = "{0}/courses/{1}/content_migrations/{2}/migration_issues".format(migration_id)
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     data = r.json()
     print("response is {}".format(data))
     return data
@@ -138,7 +140,10 @@ def main():
                       help="testing mode for skipping files for some courses"
     )
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -21,6 +21,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -47,6 +48,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -70,7 +72,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
 
@@ -84,7 +86,7 @@ def list_assignments(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of assignments
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links.get('next', False):
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 if Verbose_Flag:
                     print("result of getting assignments for a paginated response: {}".format(r.text))
                 page_response = r.json()  
@@ -119,7 +121,7 @@ def create_assignment_with_textual_submission(course_id, name, max_points, gradi
 
 
 
-    r = requests.post(url, headers = header, data=payload)
+    r = canvas_client.post(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of post making an assignment: {}".format(r.text))
         print("r.status_code={}".format(r.status_code))
@@ -167,7 +169,10 @@ def main():
     parser.add_option("--config", dest="config_filename",
                       help="read configuration from FILE", metavar="FILE")
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
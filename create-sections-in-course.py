@@ -24,6 +24,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -50,6 +51,7 @@ def initialize(options):
        try:
               with open(config_file) as json_data_file:
                      configuration = json.load(json_data_file)
+                     canvas_client.initialize(configuration)
                      access_token=configuration["canvas"]["access_token"]
                      baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -70,7 +72,7 @@ def sections_in_course(course_id):
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting sections: {}".format(r.text))
 
@@ -84,7 +86,7 @@ def sections_in_course(course_id):
               # i.e., when the response is split into pieces - each returning only some of the list of modules
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             sections_found_thus_far.append(p_response)
@@ -104,7 +106,7 @@ def create_sections_in_course(course_id, section_names):
        for section_name in section_names:
               #course_section[name]
               payload={'course_section[name]': section_name}
-              r = requests.post(url, headers = header, data=payload)
+              r = canvas_client.post(url, headers = header, data=payload)
               if Verbose_Flag:
                      print("status code: {0}, result of creating section: {1}".format(r.status_code, r.text))
 
@@ -133,7 +135,10 @@ def main():
        parser.add_option("--config", dest="config_filename",
                   help="read configuration from FILE", metavar="FILE")
 
+       canvas_client.add_options(parser)
+
        options, remainder = parser.parse_args()
+       canvas_client.set_options(options)
 
        Verbose_Flag=options.verbose
        if Verbose_Flag:
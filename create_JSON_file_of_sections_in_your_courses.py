@@ -32,6 +32,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -58,6 +59,7 @@ def initialize(options):
        try:
               with open(config_file) as json_data_file:
                      configuration = json.load(json_data_file)
+                     canvas_client.initialize(configuration)
                      access_token=configuration["canvas"]["access_token"]
                      baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -77,7 +79,7 @@ def list_your_courses():
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting courses: {}".format(r.text))
 
@@ -91,7 +93,7 @@ def list_your_courses():
               # i.e., when the response is split into pieces - each returning only some of the list of modules
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      if Verbose_Flag:
                             print("result of getting courses for a paginated response: {}".format(r.text))
                      page_response = r.json()  
@@ -108,7 +110,7 @@ def your_user_info():
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting your own user information: {}".format(r.text))
 
@@ -126,7 +128,7 @@ def sections_in_course(course_id):
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting sections: {}".format(r.text))
 
@@ -140,7 +142,7 @@ def sections_in_course(course_id):
               # i.e., when the response is split into pieces - each returning only some of the list of modules
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             sections_found_thus_far.append(p_response)
@@ -159,7 +161,7 @@ def students_in_course(course_id):
        extra_parameters={'per_page': '100',
                          'type': ['StudentEnrollment']
        }
-       r = requests.get(url, params=extra_parameters, headers = header)
+       r = canvas_client.get(url, params=extra_parameters, headers = header)
        if Verbose_Flag:
               print("result of getting enrollments: {}".format(r.text))
 
@@ -173,7 +175,7 @@ def students_in_course(course_id):
               # i.e., when the response is split into pieces - each returning only some of the list of modules
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             users_found_thus_far.append(p_response)
@@ -189,7 +191,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
 
@@ -203,7 +205,7 @@ def list_assignments(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of assignments
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 if Verbose_Flag:
                     print("result of getting assignments for a paginated response: {}".format(r.text))
                 page_response = r.json()  
@@ -222,8 +224,8 @@ def submission_for_assignment_by_user(course_id, assignment_id, user_id):
               print("url: {}".format(url))
 
        #extra_parameters={'student_ids[]': 'all'}
-       #r = requests.get(url, params=extra_parameters, headers = header)
-       r = requests.get(url, headers = header)
+       #r = canvas_client.get(url, params=extra_parameters, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting submissions: {}".format(r.text))
 
@@ -308,7 +310,10 @@ def main():
        parser.add_option("--config", dest="config_filename",
                   help="read configuration from FILE", metavar="FILE")
 
+       canvas_client.add_options(parser)
+
        options, remainder = parser.parse_args()
+       canvas_client.set_options(options)
 
        Verbose_Flag=options.verbose
        if Verbose_Flag:
@@ -22,6 +22,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -65,6 +66,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -120,7 +122,7 @@ def create_calendar_event(user_id, cal_date, title, description):
              'calendar_event[start_at]': date_time_start,
              'calendar_event[end_at]':   date_time_end
     }
-    r = requests.post(url, headers = header, data=payload)
+    r = canvas_client.post(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of creating a calendar event: {}".format(r.text))
 
@@ -138,7 +140,7 @@ def get_calendar_event(calendar_event_id):
        if Verbose_Flag:
               print("url: " + url)
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting a single calendar event: {}".format(r.text))
 
@@ -158,7 +160,7 @@ def get_calendar_events_for_user(user_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting a user's calendar events: {}".format(r.text))
 
@@ -179,7 +181,7 @@ def get_calendar_events_for_user(user_id):
     # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
     if 'link' in r.headers:
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 if p_response['start_at'] is not None:
@@ -216,7 +218,10 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -29,6 +29,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -61,6 +62,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
             
@@ -85,7 +87,7 @@ def users_in_course(course_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -99,7 +101,7 @@ def users_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 user_found_thus_far.append(p_response)
@@ -120,7 +122,7 @@ def sections_in_course(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting sections: {}".format(r.text))
 
@@ -134,7 +136,7 @@ def sections_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 sections_found_thus_far.append(p_response)
@@ -154,7 +156,7 @@ def create_sections_in_course(course_id, section_names):
     for section_name in section_names:
         #course_section[name]
         payload={'course_section[name]': section_name}
-        r = requests.post(url, headers = header, data=payload)
+        r = canvas_client.post(url, headers = header, data=payload)
 
         if Verbose_Flag:
             print("result of creating section: {}".format(r.text))
@@ -181,7 +183,10 @@ def main():
     parser.add_option("--config", dest="config_filename",
                       help="read configuration from FILE", metavar="FILE")
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
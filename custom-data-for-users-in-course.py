@@ -26,6 +26,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -54,6 +55,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -82,7 +84,7 @@ def users_in_course(course_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -96,7 +98,7 @@ def users_in_course(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of modules
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     user_found_thus_far.append(p_response)
@@ -109,7 +111,7 @@ def user_profile_url(user_id):
     if Verbose_Flag:
         print("user url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting profile: {}".format(r.text))
 
@@ -137,7 +139,7 @@ def put_user_custom_data_by_sis_id(user_id, name_space, scope, data):
     payload={'ns': name_space,
              'data': data
     }
-    r = requests.put(url, headers = header, json=payload)
+    r = canvas_client.put(url, headers = header, json=payload)
     if Verbose_Flag:
         print("result of setting custom data: {}".format(r.text))
 
@@ -156,7 +158,7 @@ def put_user_custom_data_by_user_id(user_id, name_space, scope, data):
     payload={'ns': name_space,
              'data': data
     }
-    r = requests.put(url, headers = header, json=payload)
+    r = canvas_client.put(url, headers = header, json=payload)
     if Verbose_Flag:
         print("result of setting custom data: {}".format(r.text))
 
@@ -174,7 +176,7 @@ def get_user_custom_data_by_sis_id(user_id, name_space, scope):
 
     payload={'ns': name_space }
 
-    r = requests.get(url, headers = header, json=payload)
+    r = canvas_client.get(url, headers = header, json=payload)
     if Verbose_Flag:
         print("result of getting custom data: {}".format(r.text))
 
@@ -192,7 +194,7 @@ def get_user_custom_data_by_user_id(user_id, name_space, scope):
 
     payload={'ns': name_space }
 
-    r = requests.get(url, headers = header, json=payload)
+    r = canvas_client.get(url, headers = header, json=payload)
     if Verbose_Flag:
         print("result of getting custom data: {}".format(r.text))
 
@@ -217,7 +219,7 @@ def sections_in_course(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting sections: {}".format(r.text))
 
@@ -231,7 +233,7 @@ def sections_in_course(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of modules
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     sections_found_thus_far.append(p_response)
@@ -247,7 +249,7 @@ def list_your_courses():
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting courses: {}".format(r.text))
 
@@ -261,7 +263,7 @@ def list_your_courses():
             # i.e., when the response is split into pieces - each returning only some of the list of modules
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 if Verbose_Flag:
                     print("result of getting courses for a paginated response: {}".format(r.text))
                 page_response = r.json()  
@@ -280,7 +282,7 @@ def users_in_account(account_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting users for account: {}".format(r.text))
 
@@ -294,7 +296,7 @@ def users_in_account(account_id):
             # i.e., when the response is split into pieces - each returning only some of the list of modules
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     user_found_thus_far.append(p_response)
@@ -407,7 +409,7 @@ def create_user(account_id, user_name, short_name, sortable_name, time_zone, loc
              'force_validations': 'false',
              'enable_sis_reactivation': 'false',
     }
-    r = requests.post(url, headers = header, data=payload)
+    r = canvas_client.post(url, headers = header, data=payload)
     if Verbose_Flag:
         print("status code: {0}, result of creating a user: {1}".format(r.status_code, r.text))
 
@@ -428,7 +430,7 @@ def enrollments_in_course(course_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -442,7 +444,7 @@ def enrollments_in_course(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of modules
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     user_found_thus_far.append(p_response)
@@ -479,7 +481,7 @@ def enroll_user_with_sis_id(course_id, sis_id, role, section_id):
     if section_id:              # if there is a section_id then add the users to section
         payload['enrollment[course_section_id]']=section_id
 
-    r = requests.post(url, headers = header, data=payload)
+    r = canvas_client.post(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of posting an enrollment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -526,7 +528,7 @@ def v1_get_programmes():
     if Verbose_Flag:
         print("url: " + url)
     #
-    r = requests.get(url)
+    r = canvas_client.get(url)
     if Verbose_Flag:
         print("result of getting v1 programme: {}".format(r.text))
     #
@@ -586,7 +588,10 @@ def main():
 
 
     
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -6,6 +6,10 @@
 # Output: XLSX spreadsheet with custom columns in course
 #
 # with the option "-a" or "--all" deletes all existing custom columns
+# with the option "-n" or "--dry-run" only lists the columns that would be deleted
+#
+# The columns are deleted concurrently (by up to fan_out_workers requests at a time, see canvas_client.py),
+# and each column is reported as it is deleted or fails to be deleted.
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
 #
 # Can also be called with an alternative configuration file:
@@ -15,6 +19,8 @@
 # ./delete-custom-columns-in-course.py 12683
 #
 # ./delete-custom-columns-in-course.py --config config-test.json 12683 1118
+# ./delete-custom-columns-in-course.py --config config-test.json 12683 1118 1119 1120
+# ./delete-custom-columns-in-course.py --dry-run --all 12683
 #
 # 
 # documentation about using xlsxwriter to insert images can be found at:
@@ -28,6 +34,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -54,6 +61,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -74,7 +82,7 @@ def list_custom_columns(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -88,16 +96,16 @@ def list_custom_columns(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 columns_found_thus_far.append(p_response)
 
     return columns_found_thus_far
 
+# returns True if the column was deleted
 def delete_custom_column_entries(course_id, column_id):
     global Verbose_Flag
-    entries_found_thus_far=[]
 
     # Use the Canvas API to Delete a custom gradebook column
     #DELETE /api/v1/courses/:course_id/custom_gradebook_columns/:id
@@ -106,14 +114,37 @@ def delete_custom_column_entries(course_id, column_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.delete(url, headers = header)
+    r = canvas_client.delete(url, headers = header)
     if Verbose_Flag:
         print("result of deleting custom_gradebook_column: {}".format(r.text))
 
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-        return page_response
-    return []
+    return r.status_code == requests.codes.ok
+
+# delete the columns concurrently, reporting the progress as each deletion finishes
+# returns the list of the columns that could not be deleted
+def delete_custom_columns(course_id, columns_to_delete):
+    number_done=0
+    failures=[]
+
+    def report(arguments, result):
+        nonlocal number_done
+        number_done=number_done+1
+        c=columns_by_id[arguments[1]]
+        # an exception raised by a deletion is returned by fan_out() as its result
+        if isinstance(result, Exception):
+            reason="{0}: {1}".format(type(result).__name__, result)
+        else:
+            reason="not deleted by Canvas"
+        if result is True:
+            print("deleted column id={0} with title={1} ({2} of {3})".format(c['id'], c['title'], number_done, len(columns_to_delete)))
+        else:
+            failures.append(c)
+            print("failed to delete column id={0} with title={1} ({2} of {3}): {4}".format(c['id'], c['title'], number_done, len(columns_to_delete), reason))
+
+    columns_by_id={c['id']: c for c in columns_to_delete}
+    canvas_client.fan_out(delete_custom_column_entries, [(course_id, c['id']) for c in columns_to_delete], on_done=report)
+    print("deleted {0} of {1} columns".format(len(columns_to_delete)-len(failures), len(columns_to_delete)))
+    return failures
 
 def main():
     global Verbose_Flag
@@ -138,7 +169,17 @@ def main():
                       help="Delete all existing custom columns"
     )
 
+    parser.add_option('-n', '--dry-run',
+                      dest="dry_run",
+                      default=False,
+                      action="store_true",
+                      help="only list the columns that would be deleted"
+    )
+
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -149,30 +190,34 @@ def main():
 
     initialize(options)
 
-    if (len(remainder) < 2):
-        print("Insuffient arguments - must provide course_id column_id\n")
+    if (len(remainder) < 1) or ((len(remainder) < 2) and not options.all):
+        print("Insuffient arguments - must provide course_id column_id [column_id ...] or course_id with --all\n")
     else:
         course_id=remainder[0]
         columns=list_custom_columns(course_id)
         if Verbose_Flag:
             print("columns={}".format(columns))
-            
-        if (len(remainder) > 1):
-            column_id=remainder[1]
-            print("column_id={}".format(column_id))
-            
-            if (columns):
-                for c in columns:
-                    if Verbose_Flag:
-                        print("column is={0} with id={1}".format(c, c['id']))
-                    if c['id'] == int(column_id): # note that the column id return in the list is an integer
-                        if Verbose_Flag:
-                            print("found matching column: {}".format(c))
-                        delete_custom_column_entries(course_id, column_id)
+
+        if options.all:
+            columns_to_delete=columns
         else:
-            if (options.all) and columns:
-                for c in columns:
-                    delete_custom_column_entries(course_id, c['id'])
+            columns_by_id={c['id']: c for c in columns} # note that the column id return in the list is an integer
+            columns_to_delete=[]
+            for column_id in remainder[1:]:
+                print("column_id={}".format(column_id))
+                if int(column_id) in columns_by_id:
+                    if Verbose_Flag:
+                        print("found matching column: {}".format(columns_by_id[int(column_id)]))
+                    columns_to_delete.append(columns_by_id[int(column_id)])
+                else:
+                    print("No column with id={}".format(column_id))
+
+        if options.dry_run:
+            for c in columns_to_delete:
+                print("would delete column id={0} with title={1}".format(c['id'], c['title']))
+            print("{} columns would be deleted".format(len(columns_to_delete)))
+        elif columns_to_delete:
+            delete_custom_columns(course_id, columns_to_delete)
 
 if __name__ == "__main__": main()
 
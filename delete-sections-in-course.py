@@ -1,11 +1,16 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 #
-# ./delete-sections-in-course.py course_id [section_name]  [section_name]  [section_name] ...
+# ./delete-sections-in-course.py course_id [section_id]  [section_id]  [section_id] ...
 #
 # Output: none
 #
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
+# with the option "-a" or "--all" deletes all of the sections (except those with an id below 15000)
+# with the option "-n" or "--dry-run" only lists the sections that would be deleted
+#
+# The sections are deleted concurrently (by up to fan_out_workers requests at a time, see canvas_client.py),
+# and each section is reported as it is deleted or fails to be deleted.
 #
 # Can also be called with an alternative configuration file:
 # ./create_sections_in_course.py --config config-test.json
@@ -23,6 +28,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -49,6 +55,7 @@ def initialize(options):
        try:
               with open(config_file) as json_data_file:
                      configuration = json.load(json_data_file)
+                     canvas_client.initialize(configuration)
                      access_token=configuration["canvas"]["access_token"]
                      baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -69,7 +76,7 @@ def sections_in_course(course_id):
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting sections: {}".format(r.text))
 
@@ -83,7 +90,7 @@ def sections_in_course(course_id):
               # i.e., when the response is split into pieces - each returning only some of the list of modules
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             sections_found_thus_far.append(p_response)
@@ -103,7 +110,7 @@ def create_sections_in_course(course_id, section_names):
        for section_name in section_names:
               #course_section[name]
               payload={'course_section[name]': section_name}
-              r = requests.post(url, headers = header, data=payload)
+              r = canvas_client.post(url, headers = header, data=payload)
               if Verbose_Flag:
                      print("status code: {0}, result of creating section: {1}".format(r.status_code, r.text))
 
@@ -115,26 +122,46 @@ def create_sections_in_course(course_id, section_names):
 
        return sections_found_thus_far
 
+# returns True if the section was deleted
 def delete_sections_by_id(section_id):
-       sections_found_thus_far=[]
-       # Use the Canvas API to create sections for this course
-       #POST /api/v1/courses/:course_id/sections
+       # Use the Canvas API to delete a section
+       #DELETE /api/v1/sections/:id
 
        url = "{0}/sections/{1}".format(baseUrl, section_id)
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.delete(url, headers = header)
+       r = canvas_client.delete(url, headers = header)
        if Verbose_Flag:
               print("status code: {0}, result of deleting a section: {1}".format(r.status_code, r.text))
 
-       if r.status_code == requests.codes.ok:
-              page_response=r.json()
-
-              for p_response in page_response:  
-                     sections_found_thus_far.append(p_response)
-
-       return sections_found_thus_far
+       return r.status_code == requests.codes.ok
+
+# delete the sections concurrently, reporting the progress as each deletion finishes
+# returns the list of the sections that could not be deleted
+def delete_sections(sections_to_delete):
+       number_done=0
+       failures=[]
+
+       def report(arguments, result):
+              nonlocal number_done
+              number_done=number_done+1
+              s=sections_by_id[arguments[0]]
+              # an exception raised by a deletion is returned by fan_out() as its result
+              if isinstance(result, Exception):
+                     reason="{0}: {1}".format(type(result).__name__, result)
+              else:
+                     reason="not deleted by Canvas"
+              if result is True:
+                     print("deleted section id={0} with name={1} ({2} of {3})".format(s['id'], s['name'], number_done, len(sections_to_delete)))
+              else:
+                     failures.append(s)
+                     print("failed to delete section id={0} with name={1} ({2} of {3}): {4}".format(s['id'], s['name'], number_done, len(sections_to_delete), reason))
+
+       sections_by_id={s['id']: s for s in sections_to_delete}
+       canvas_client.fan_out(delete_sections_by_id, [(s['id'],) for s in sections_to_delete], on_done=report)
+       print("deleted {0} of {1} sections".format(len(sections_to_delete)-len(failures), len(sections_to_delete)))
+       return failures
 
 
 def main():
@@ -158,10 +185,20 @@ def main():
                          help="Delete all sections in the course"
        )
 
+       parser.add_option('-n', '--dry-run',
+                         dest="dry_run",
+                         default=False,
+                         action="store_true",
+                         help="only list the sections that would be deleted"
+       )
+
        parser.add_option("--config", dest="config_filename",
                   help="read configuration from FILE", metavar="FILE")
 
+       canvas_client.add_options(parser)
+
        options, remainder = parser.parse_args()
+       canvas_client.set_options(options)
 
        Verbose_Flag=options.verbose
        if Verbose_Flag:
@@ -176,7 +213,7 @@ def main():
               print("Insuffient arguments - must provide course_id\n")
               sys.exit()
        if (len(remainder) < 2) and not options.all:
-              print("Insuffient arguments - must provide course_id and at least one section name\n")
+              print("Insuffient arguments - must provide course_id and at least one section id\n")
               sys.exit()
 
        course_id=remainder[0]
@@ -184,22 +221,28 @@ def main():
        # existing sections
        sections=sections_in_course(course_id)
 
+       sections_to_delete=[]
        if options.all:
               for s in sections:
-                     section_id=s['id']
-                     section_name=s['name']
-                     print("deleting section id={0} with name={1}".format(section_id, section_name))
-                     if section_id < 15000:
+                     if s['id'] < 15000:
+                            print("not deleting section id={0} with name={1}".format(s['id'], s['name']))
                             continue
-                     delete_sections_by_id(section_id)
+                     sections_to_delete.append(s)
        else:
+              sections_by_id={s['id']: s for s in sections}
               for i in range(1, len(remainder)):
                      section_id=int(remainder[i])
-                     for s in sections:
-                            if s['id'] == section_id:
-                                   section_name=s['name']
-                                   print("deleting section id={0} with name={1}".format(section_id, section_name))
-                                   delete_sections_by_id(section_id)
+                     if section_id in sections_by_id:
+                            sections_to_delete.append(sections_by_id[section_id])
+                     else:
+                            print("No section with id={}".format(section_id))
+
+       if options.dry_run:
+              for s in sections_to_delete:
+                     print("would delete section id={0} with name={1}".format(s['id'], s['name']))
+              print("{} sections would be deleted".format(len(sections_to_delete)))
+       elif sections_to_delete:
+              delete_sections(sections_to_delete)
 
 if __name__ == "__main__": main()
 
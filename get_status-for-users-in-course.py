@@ -35,6 +35,13 @@
 #
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
 #
+# The Status grades of all students are fetched with one listing of the submissions for the Status assignment,
+# the students' custom data is fetched concurrently (see canvas_client.fan_out()), and the Status grades
+# that need to be changed are set together with bulk update_grades requests.
+#
+# with the option '--mirror' the assignments and the students' Status grades are read from the local mirror of the
+# gradebook (see canvas_mirror.py), rather than fetched from Canvas
+#
 # Can also be called with an alternative configuration file:
 # ./custom-data-for-users-in-course.py --config config-test.json
 #
@@ -52,6 +59,8 @@
 # Based on get_status-for-users-in-course.py
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
+import canvas_mirror          # local mirror of the gradebook
 import pprint
 import optparse
 import sys
@@ -67,6 +76,8 @@ global baseUrl	# the base URL used for access to Canvas
 global header	# the header for all HTML requests
 global payload	# place to store additionally payload when needed for options to HTML requests
 
+grades_per_bulk_request=250     # number of students whose grades are set by one update_grades request
+
 # Based upon the options to the program, initialize the variables used to access Canvas gia HTML requests
 def initialize(options):
     global baseUrl, header, payload
@@ -80,6 +91,8 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
+            canvas_mirror.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -107,7 +120,7 @@ def put_user_custom_data_by_user_id(user_id, name_space, scope, data):
     payload={'ns': name_space,
              'data': data
     }
-    r = requests.put(url, headers = header, json=payload)
+    r = canvas_client.put(url, headers = header, json=payload)
     if Verbose_Flag:
         print("result of setting custom data: {}".format(r.text))
 
@@ -128,7 +141,7 @@ def get_user_custom_data_by_user_id(user_id, name_space, scope):
 
     payload={'ns': name_space }
 
-    r = requests.get(url, headers = header, json=payload)
+    r = canvas_client.get(url, headers = header, json=payload)
     if Verbose_Flag:
         print("result of getting custom data: {}".format(r.text))
 
@@ -151,7 +164,7 @@ def students_in_course(course_id):
     extra_parameters={'per_page': '100',
                       'type[]': 'StudentEnrollment',
                       }
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -165,7 +178,7 @@ def students_in_course(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of modules
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links.get('next', False):
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     user_found_thus_far.append(p_response)
@@ -178,7 +191,7 @@ def user_profile_url(user_id):
     if Verbose_Flag:
         print("user url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting profile: {}".format(r.text))
 
@@ -201,7 +214,7 @@ def sections_in_course(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting sections: {}".format(r.text))
 
@@ -215,7 +228,7 @@ def sections_in_course(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of modules
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links.get('next', False):
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     sections_found_thus_far.append(p_response)
@@ -231,7 +244,7 @@ def list_your_courses():
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting courses: {}".format(r.text))
 
@@ -245,7 +258,7 @@ def list_your_courses():
             # i.e., when the response is split into pieces - each returning only some of the list of modules
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links.get('next', False):
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 if Verbose_Flag:
                     print("result of getting courses for a paginated response: {}".format(r.text))
                 page_response = r.json()  
@@ -266,7 +279,7 @@ def enrollments_in_course(course_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -280,7 +293,7 @@ def enrollments_in_course(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of modules
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links.get('next', False):
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     user_found_thus_far.append(p_response)
@@ -296,7 +309,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
 
@@ -310,7 +323,7 @@ def list_assignments(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             if Verbose_Flag:
                 print("result of getting modules for a paginated response: {}".format(r.text))
             page_response = r.json()  
@@ -349,17 +362,46 @@ def assign_grade_for_assignment(course_id,assignment_id, user_id, grade, comment
         payload={'submission[posted_grade]': grade,
                  }
 
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of put assign_grade_for_assignment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
         page_response=r.json()
         if Verbose_Flag:
             print("inserted grade for assignment")
+        canvas_mirror.note_grade(assignment_id, user_id, grade)
         return True
     return False
 
 
+def submissions_for_assignment(course_id, assignment_id):
+    global Verbose_Flag
+    # Use the Canvas API to get the submissions of all students for an assignment
+    #GET /api/v1/courses/:course_id/assignments/:assignment_id/submissions
+
+    url = "{0}/courses/{1}/assignments/{2}/submissions".format(baseUrl,course_id, assignment_id)
+    if Verbose_Flag:
+        print("url: " + url)
+
+    extra_parameters={'per_page': '100'}
+    return canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
+
+# set the grades in grade_data (a dict of user_id to {'grade': ..., 'comment': ...}) with bulk requests
+# of up to grades_per_bulk_request students each, and wait for them to be completed
+def bulk_assign_grades(course_id, assignment_id, grade_data):
+    user_ids=list(grade_data)
+    for i in range(0, len(user_ids), grades_per_bulk_request):
+        chunk={user_id: grade_data[user_id] for user_id in user_ids[i:i+grades_per_bulk_request]}
+        progress=canvas_client.update_grades(baseUrl, header, course_id, assignment_id, chunk, Verbose_Flag)
+        if progress:
+            progress=canvas_client.wait_for_progress(baseUrl, header, progress, Verbose_Flag)
+        if not progress or progress['workflow_state'] != 'completed':
+            print("setting the grades of {0} students did not complete: {1}".format(len(chunk), progress))
+            continue
+        for user_id, g in chunk.items():
+            canvas_mirror.note_grade(assignment_id, user_id, g['grade'])
+        print("set the Status grade of {0} students".format(len(chunk)))
+
 def get_assignment_grade_by_id(course_id, user_id, assignment_id):
     global Verbose_Flag
 
@@ -377,7 +419,7 @@ def get_assignment_grade_by_id(course_id, user_id, assignment_id):
              'user_id':  user_id
              }
     
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
 
     if Verbose_Flag:
         print("result of getting a grade from gradebook: {}".format(r.text))
@@ -392,7 +434,7 @@ def get_assignment_grade_by_id(course_id, user_id, assignment_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             if Verbose_Flag:
                 print("result of getting modules for a paginated response: {}".format(r.text))
             page_response = r.json()  
@@ -494,7 +536,7 @@ def create_assignment(course_id, name, max_points, grading_type, description):
              'assignment[published]': 'true' # if not published it will not be in the gradebook
     }
 
-    r = requests.post(url, headers = header, data=payload)
+    r = canvas_client.post(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of post making an assignment: {}".format(r.text))
         print("r.status_code={}".format(r.status_code))
@@ -537,7 +579,11 @@ def main():
 
 
     
+    canvas_client.add_options(parser)
+    canvas_mirror.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -548,8 +594,8 @@ def main():
 
     initialize(options)
 
-    # create the following list to keep track of users already processed
-    already_processed_students=[]
+    # create the following set to keep track of users already processed
+    already_processed_students=set()
 
     if (len(remainder) < 1):
         print("Insuffient arguments - must provide account_id course_id\n")
@@ -557,7 +603,11 @@ def main():
               
     course_id=remainder[0]
 
-    assignments=list_assignments(course_id)
+    if canvas_mirror.wanted(options):
+        canvas_mirror.start(options, baseUrl, header, course_id)
+        assignments=canvas_mirror.assignments()
+    else:
+        assignments=list_assignments(course_id)
     # check for Status assignment
     status_assignment_id=None
     status_assignment_name='Status'
@@ -580,46 +630,59 @@ def main():
 
     maximum_for_student_update=0.200 # percent as a float
 
+    # students are listed once for each section they are enrolled in, process each student once
+    students=[]
     for user in all_student_enrollments_in_course:
         user_id=user['user_id']
+        if user_id and user_id not in already_processed_students:
+            already_processed_students.add(user_id)
+            students.append(user)
+
+    # the Status grades of all students, from one listing of the submissions for the Status assignment
+    # for example if a users's "grade": "10%", and the maximum points is 1, then their "score": 0.1
+    if canvas_mirror.enabled():
+        status_submissions=canvas_mirror.submissions(assignment_id=status_assignment_id)
+    else:
+        status_submissions=submissions_for_assignment(course_id, status_assignment_id)
+    students_grades={s['user_id']: s['grade'] for s in status_submissions}
+
+    # the students' own status, from their custom data - fetched concurrently
+    name_space='se.kth.canvas-app.status_'+course_id
+    students_statuses=canvas_client.check_results(canvas_client.fan_out(get_user_custom_data_by_user_id,
+                                                                        [(user['user_id'], name_space, []) for user in students]))
+
+    # the Status grades to update, all of which are set with one bulk request
+    grade_data=dict()
+    for user, students_status in zip(students, students_statuses):
+        user_id=user['user_id']
+        students_grade=students_grades.get(user_id)
+        users_name=user['user']['sortable_name']
+        print("{0}: students_grade={1}".format(users_name, students_grade))
+        if students_grade:
+            if students_grade[-1:] == '%':
+                students_grade_float=float(students_grade[:-1])/100.0
+            else:
+                students_grade_float=float(students_grade)/100.0
+
+        print("Existing custom data for user for course {0} is {1}".format(course_id, students_status))
+
+        if students_status:
+            students_status=students_status.get('data', None)
+            if students_status[-1:] == '%':
+                students_status_float=float(students_status[:-1])/100.0
+            else:
+                students_status_float=float(students_status)/100.0
+
+            print("students_status_float={0}".format(students_status_float))
+            if (students_status_float < maximum_for_student_update):
+                # as before, a student without a grade gets one, while an empty grade is left unchanged
+                if students_grade is None or (students_grade and (students_status_float > students_grade_float)):
+                    grade_data[user_id]={'grade': students_status_float, 'comment': None}
+
+        #result2=put_user_custom_data_by_user_id(user_id, 'se.kth.canvas-app.status_'+course_id, [], status_percent)
+        #print("Result of setting custom data for user for course {0} is {1}".format(course_id, result2))
 
-        if user_id not in already_processed_students:
-            if user_id:
-                # for example if a users's "grade": "10%", and the maximum points is 1, then their "score": 0.1
-                students_grade=get_a_grade(get_assignment_grade_by_id(course_id, user_id, status_assignment_id))
-                users_name=user['user']['sortable_name']
-                print("{0}: students_grade={1}".format(users_name, students_grade))
-                if students_grade:
-                    print("{0}: students_grade={1}".format(users_name, students_grade))
-                    if students_grade[-1:] == '%':
-                        students_grade_float=float(students_grade[:-1])/100.0
-                    else:
-                        students_grade_float=float(students_grade)/100.0
-
-                students_status=get_user_custom_data_by_user_id(user_id, 'se.kth.canvas-app.status_'+course_id,[])
-                print("Existing custom data for user for course {0} is {1}".format(course_id, students_status))
-
-                if students_status:
-                    students_status=students_status.get('data', None)
-                    if students_status[-1:] == '%':
-                        students_status_float=float(students_status[:-1])/100.0
-                    else:
-                        students_status_float=float(students_status)/100.0
-
-                    print("students_status_float={0}".format(students_status_float))
-                    if (students_status_float < maximum_for_student_update):
-                        if students_grade is None:
-                            comment=None
-                            assign_grade_for_assignment(course_id,status_assignment_id, user_id, students_status_float, comment)
-                            continue
-                        
-                        if students_grade and (students_status_float > students_grade_float ):
-                            comment=None
-                            assign_grade_for_assignment(course_id,status_assignment_id, user_id, students_status_float, comment)
-
-                #result2=put_user_custom_data_by_user_id(user_id, 'se.kth.canvas-app.status_'+course_id, [], status_percent)
-                #print("Result of setting custom data for user for course {0} is {1}".format(course_id, result2))
-
-                already_processed_students.append(user_id)
+    if grade_data:
+        bulk_assign_grades(course_id, status_assignment_id, grade_data)
 
 if __name__ == "__main__": main()
@@ -27,6 +27,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -65,6 +66,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -109,7 +111,7 @@ def enable_docx_submission_for_assignment(course_id, assignment_id, assignment):
                 something_to_edit=True
 
     if something_to_edit:
-        r = requests.put(url, params=parameters, headers = header)
+        r = canvas_client.put(url, params=parameters, headers = header)
         if Verbose_Flag:
             print("r.status_code={}".format(r.status_code))
         if r.status_code < int(300):
@@ -135,7 +137,7 @@ def submit_file_for_assignment(course_id, assignment_id, user_id, filename):
              'content-type': 'binary/octet-stream',
              'on_duplicate': 'overwrite'
     }
-    r = requests.post(url, params=extra_parameters, headers = header, data=payload)
+    r = canvas_client.post(url, params=extra_parameters, headers = header, data=payload)
     if Verbose_Flag:
         print("result of post: {}".format(r.text))
         print("r.status_code={}".format(r.status_code))
@@ -155,7 +157,7 @@ def submit_file_for_assignment(course_id, assignment_id, user_id, filename):
         key=page_response['upload_params']['key']
         print("upload_url={0}, key={1}, upload_params={2}".format(upload_url,key, upload_params))
 
-        r = requests.post(upload_url,params=upload_params, files={"file": open(filename, 'rb')})
+        r = canvas_client.post(upload_url,params=upload_params, files={"file": open(filename, 'rb')})
         if r.status_code < int(300):
             page_response=r.json()
             print("page_response={}".format(page_response))
@@ -174,7 +176,7 @@ def submit_file_for_assignment(course_id, assignment_id, user_id, filename):
                               'submission[user_id]': user_id
                               }
 
-            r = requests.post(url, params=extra_parameters, headers = header)
+            r = canvas_client.post(url, params=extra_parameters, headers = header)
             print("r.status_code={}".format(r.status_code))
             r.raise_for_status()
             if r.status_code < int(300):
@@ -202,7 +204,7 @@ def get_user(user_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if r.status_code == requests.codes.ok:
         page_response=r.json()
 
@@ -220,7 +222,7 @@ def users_in_course(course_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -234,7 +236,7 @@ def users_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             if r.status_code == requests.codes.ok:
                 for p_response in page_response:  
@@ -251,7 +253,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
 
@@ -265,7 +267,7 @@ def list_assignments(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of assignments
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             if Verbose_Flag:
                 print("result of getting assignments for a paginated response: {}".format(r.text))
             page_response = r.json()  
@@ -285,7 +287,7 @@ def list_ungraded_assignments(course_id):
 
     extra_parameters={'bucket': 'ungraded'
                       }
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
 
     if Verbose_Flag:
         print("result of getting ungraded assignments: {}".format(r.text))
@@ -300,7 +302,7 @@ def list_ungraded_assignments(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of assignments
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             if Verbose_Flag:
                 print("result of getting assignments for a paginated response: {}".format(r.text))
             page_response = r.json()  
@@ -320,8 +322,8 @@ def submission_for_assignment_by_user(course_id, assignment_id, user_id):
         print("url: {}".format(url))
 
     #extra_parameters={'student_ids[]': 'all'}
-    #r = requests.get(url, params=extra_parameters, headers = header)
-    r = requests.get(url, headers = header)
+    #r = canvas_client.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting submissions: {}".format(r.text))
         
@@ -369,7 +371,10 @@ def main():
     parser.add_option("--config", dest="config_filename",
                       help="read configuration from FILE", metavar="FILE")
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -410,8 +415,11 @@ def main():
             student_ids.add(e['user_id'])
 
     print("student_ids={}".format(student_ids))
-    for s in student_ids:
-        submission_info=submission_for_assignment_by_user(course_id, assignment_id, s)
+    # get the submissions of all of the students concurrently - the results are in the same order as student_ids
+    student_ids=list(student_ids)
+    submissions=canvas_client.check_results(canvas_client.fan_out(submission_for_assignment_by_user,
+                                                                  [(course_id, assignment_id, s) for s in student_ids]))
+    for s, submission_info in zip(student_ids, submissions):
         # when a submission has been answered with a text ebtry, the text is placed in the body isn HTML format.
         if not submission_info['body']:
             continue
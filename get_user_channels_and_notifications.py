@@ -23,6 +23,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -52,6 +53,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -71,7 +73,7 @@ def get_users_channels(user_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting user communication channels: {}".format(r.text))
 
@@ -81,7 +83,7 @@ def get_users_channels(user_id):
             found_thus_far.append(p_response)
 
             while r.links.get('next', False):
-                r = requests.get(r.links['next']['url'], headers=header)
+                r = canvas_client.get(r.links['next']['url'], headers=header)
                 page_response = r.json()  
                 for p_response in page_response:  
                     found_thus_far.append(p_response)
@@ -97,7 +99,7 @@ def get_users_notifications(user_id, channel_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting user preferences: {}".format(r.text))
 
@@ -114,7 +116,7 @@ def get_user_profile(user_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting user profile: {}".format(r.text))
 
@@ -148,7 +150,10 @@ def main():
                       help="testing mode for skipping files for some courses"
     )
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
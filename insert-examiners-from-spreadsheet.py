@@ -13,6 +13,17 @@
 # with the option '-C'or '--containers' use HTTP rather than HTTPS for access to Canvas
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
 #
+# The titles are matched after normalizing them (case, Unicode form, punctuation, and white space), using
+# an index of the titles in the course. With the option '-f' or '--fuzzy' a title with no exact match
+# is matched with the most similar title in the course, if the two titles have at least
+# fuzzy_match_threshold of their words in common (token set similarity).
+#
+# The current examiners of all students are fetched with one listing of the submissions for the
+# Examiner assignment, and only the examiners that have changed are written.
+#
+# with the option '--mirror' the custom columns, assignments, and current examiners are read from the local mirror
+# of the gradebook (see canvas_mirror.py), rather than fetched from Canvas
+#
 # Can also be called with an alternative configuration file:
 # ./insert-examiners-from-spreadsheet.py   --config config-test.json 25434   "/z3/maguire/Exjobs-2020/Master's thesis proposals P3 2021-20210220.xlsx"
 # ./insert-examiners-from-spreadsheet.py -v 25434   "/z3/maguire/Exjobs-2020/Master's thesis proposals P3 2021-20210220.xlsx"
@@ -25,6 +36,8 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
+import canvas_mirror          # local mirror of the gradebook
 import pprint
 import optparse
 import sys
@@ -40,6 +53,10 @@ import pandas as pd
 
 # to use math.isnan(x) function
 import math
+
+import re
+import unicodedata              # to normalize the titles
+import numpy as np              # for the matrix of title similarities
 #############################
 ###### EDIT THIS STUFF ######
 #############################
@@ -47,6 +64,8 @@ global baseUrl	# the base URL used for access to Canvas
 global header	# the header for all HTML requests
 global payload	# place to store additionally payload when needed for options to HTML requests
 
+fuzzy_match_threshold=0.8       # minimum token set similarity of two titles for them to match with --fuzzy
+
 # Based upon the options to the program, initialize the variables used to access Canvas gia HTML requests
 def initialize(options):
     global baseUrl, header, payload
@@ -60,6 +79,8 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
+            canvas_mirror.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -88,7 +109,7 @@ def users_in_course(course_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -102,7 +123,7 @@ def users_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             if r.status_code == requests.codes.ok:
                 for p_response in page_response:  
@@ -119,7 +140,7 @@ def list_custom_columns(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -133,7 +154,7 @@ def list_custom_columns(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 columns_found_thus_far.append(p_response)
@@ -150,6 +171,61 @@ def lookup_column_id(list_of_exiting_columns, column_name):
             return column['id']
     return False
 
+# Titles are compared after normalization: Unicode NFKC, case folded, punctuation removed, and
+# runs of whitespace collapsed to a single space
+def normalize_title(title):
+    title=unicodedata.normalize('NFKC', title).casefold()
+    title=re.sub(r'[^\w\s]', ' ', title)
+    return ' '.join(title.split())
+
+# return a dict mapping the normalized form of each title to the user_id of the student with this title
+def title_index(existing_title_data):
+    index=dict()
+    for td in existing_title_data: # data is a list with entries of the form: {'content': 'title', 'user_id': xxxx}
+        if not isinstance(td['content'], str):
+            continue
+        key=normalize_title(td['content'])
+        if key in index and index[key] != td['user_id']:
+            print("more than one student has the title '{0}': {1} and {2}".format(td['content'], index[key], td['user_id']))
+            continue
+        index[key]=td['user_id']
+    return index
+
+# For each of the (normalized) titles, find the most similar title in the index, using the token set
+# similarity (the Jaccard similarity of the sets of words) of the two titles. The similarities of all
+# pairs of titles are computed at once as a matrix product of the word incidence matrices.
+# Returns a dict of title -> (title in the index, similarity) for the titles with a match of at least threshold
+def fuzzy_matches(titles, index, threshold):
+    known_titles=list(index)
+    if not titles or not known_titles:
+        return dict()
+
+    titles_words=[set(t.split()) for t in titles]
+    known_titles_words=[set(t.split()) for t in known_titles]
+    vocabulary=dict()
+    for words in titles_words+known_titles_words:
+        for w in words:
+            vocabulary.setdefault(w, len(vocabulary))
+
+    def incidence_matrix(list_of_words):
+        m=np.zeros((len(list_of_words), len(vocabulary)), dtype=np.float32)
+        for i, words in enumerate(list_of_words):
+            m[i, [vocabulary[w] for w in words]]=1.0
+        return m
+
+    a=incidence_matrix(titles_words)
+    b=incidence_matrix(known_titles_words)
+    intersection=a @ b.T
+    union=a.sum(axis=1)[:, None]+b.sum(axis=1)[None, :]-intersection
+    similarity=np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+    best=similarity.argmax(axis=1)
+    matches=dict()
+    for i, t in enumerate(titles):
+        if similarity[i, best[i]] >= threshold:
+            matches[t]=(known_titles[best[i]], float(similarity[i, best[i]]))
+    return matches
+
 # [   {'content': 'COPEN|CTFYS|CSDA', 'user_id': 1877},
 #     {'content': 'CELTE|TSCRM', 'user_id': 9581},
 #     {'content': 'TMAIM', 'user_id': 42912}]
@@ -169,7 +245,7 @@ def list_custom_column_entries(course_id, column_number):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -183,7 +259,7 @@ def list_custom_column_entries(course_id, column_number):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 entries_found_thus_far.append(p_response)
@@ -206,7 +282,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
 
@@ -220,7 +296,7 @@ def list_assignments(course_id):
             # i.e., when the response is split into pieces - each returning only some of the list of assignments
             # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 if Verbose_Flag:
                     print("result of getting assignments for a paginated response: {}".format(r.text))
                 page_response = r.json()  
@@ -229,6 +305,18 @@ def list_assignments(course_id):
 
     return assignments_found_thus_far
 
+def submissions_for_assignment(course_id, assignment_id):
+    global Verbose_Flag
+    # Use the Canvas API to get the submissions of all students for an assignment
+    #GET /api/v1/courses/:course_id/assignments/:assignment_id/submissions
+
+    url = "{0}/courses/{1}/assignments/{2}/submissions".format(baseUrl,course_id, assignment_id)
+    if Verbose_Flag:
+        print("url: " + url)
+
+    extra_parameters={'per_page': '100'}
+    return canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
+
 def get_grade_for_assignment(course_id, assignment_id, user_id):
     global Verbose_Flag
     # Use the Canvas API to assign a grade for an assignment
@@ -245,7 +333,7 @@ def get_grade_for_assignment(course_id, assignment_id, user_id):
 
     payload={'include[]': 'submission_comments'}
 
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of getting assignment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -263,7 +351,7 @@ def get_course_info(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if r.status_code == requests.codes.ok:
         page_response=r.json()
         return page_response
@@ -281,7 +369,7 @@ def get_grading_standards(id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if r.status_code == requests.codes.ok:
         page_response=r.json()
         return page_response
@@ -323,13 +411,14 @@ def assign_grade_for_assignment(course_id, assignment_id, user_id, grade, commen
         payload={'submission[posted_grade]': grade,
                  }
 
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of put assign_grade_for_assignment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
         page_response=r.json()
         if Verbose_Flag:
             print("inserted grade for assignment")
+        canvas_mirror.note_grade(assignment_id, user_id, grade)
         return True
     return False
 
@@ -364,7 +453,18 @@ def main():
                       )
 
 
+    parser.add_option('-f', '--fuzzy',
+                      dest="fuzzy",
+                      default=False,
+                      action="store_true",
+                      help="also match titles that only approximately match a title in the course"
+                      )
+
+    canvas_client.add_options(parser)
+    canvas_mirror.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -401,7 +501,11 @@ def main():
         print("spreadsheet is missing a column with the name: {}".format(column_name))
         return
 
-    custon_columns_in_course=list_custom_columns(course_id)
+    if canvas_mirror.wanted(options):
+        canvas_mirror.start(options, baseUrl, header, course_id)
+        custon_columns_in_course=canvas_mirror.custom_columns()
+    else:
+        custon_columns_in_course=list_custom_columns(course_id)
     if Verbose_Flag:
         print("custon_columns_in_course={}".format(custon_columns_in_course))
 
@@ -414,12 +518,18 @@ def main():
         print("Canvas course is missing a column with the name: {}".format(target_column))
         return
 
-    existing_title_data=list_custom_column_entries(course_id, target_column_id)
+    if canvas_mirror.enabled():
+        existing_title_data=canvas_mirror.custom_column_data(target_column_id)
+    else:
+        existing_title_data=list_custom_column_entries(course_id, target_column_id)
     # data is a list with entries of the form: {'content': 'title', 'user_id': xxxx}
     if Verbose_Flag:
         print("existing_title_data={}".format(existing_title_data))
 
-    list_of_assignments=list_assignments(course_id)
+    if canvas_mirror.enabled():
+        list_of_assignments=canvas_mirror.assignments()
+    else:
+        list_of_assignments=list_assignments(course_id)
     if Verbose_Flag:
         print("list_of_assignments={}".format(list_of_assignments))
 
@@ -535,21 +645,38 @@ def main():
         }
 
 
+    # index the titles in the course by their normalized form, so each row of the spreadsheet is matched with one lookup
+    proposal_title_column='PROPOSAL TITLE'
+    titles_index=title_index(existing_title_data)
+    spreadsheet_titles=[normalize_title(t) if isinstance(t, str) else None for t in projects_df[proposal_title_column].values]
+
+    fuzzy_titles=dict()
+    if options.fuzzy:
+        unmatched_titles=sorted(set(t for t in spreadsheet_titles if t and t not in titles_index))
+        fuzzy_titles=fuzzy_matches(unmatched_titles, titles_index, fuzzy_match_threshold)
+        print("{0} of {1} titles without an exact match were matched approximately".format(len(fuzzy_titles), len(unmatched_titles)))
+
+    # the current examiner of each student, from one listing of the submissions for the Examiner assignment
+    if canvas_mirror.enabled():
+        examiner_submissions=canvas_mirror.submissions(assignment_id=assignment_id)
+    else:
+        examiner_submissions=submissions_for_assignment(course_id, assignment_id)
+    current_examiners={s['user_id']: s.get('grade') for s in examiner_submissions}
+
     for j in range(0,number_of_rows):
         if options.testing and (j > 2):
             break
-        proposal_title_column='PROPOSAL TITLE'
         title=projects_df[proposal_title_column].values[j]
         if isinstance(title, str):
             if Verbose_Flag:
                 print("title={}".format(title))
 
-            students_userid=False
-            for td in existing_title_data: # data is a list with entries of the form: {'content': 'title', 'user_id': xxxx}
-                if td['content'] == title:
-                    students_userid=td['user_id']
-                    break
-            
+            students_userid=titles_index.get(spreadsheet_titles[j], False)
+            if not students_userid and spreadsheet_titles[j] in fuzzy_titles:
+                matched_title, similarity=fuzzy_titles[spreadsheet_titles[j]]
+                students_userid=titles_index[matched_title]
+                print("title '{0}' approximately matches '{1}' (similarity {2:.2f})".format(title, matched_title, similarity))
+
             if students_userid:
                 s_name=students_name.get(students_userid, False)
                 if not s_name:
@@ -571,21 +698,19 @@ def main():
                         print("Could not find sorted name for examiner={}".format(examiner))
                         continue
 
-                    current_grade_info=get_grade_for_assignment(course_id, assignment_id, students_userid)
-                    if current_grade_info:
-                        existing_examiner=current_grade_info.get('grade', False)
+                    existing_examiner=current_examiners.get(students_userid)
+                    if existing_examiner == sorted_name:
+                        print("{0}: examiner is {1}".format(s_name, sorted_name))
+                    elif existing_examiner:
+                        # need to change the student's examiner
                         print("{0}: existing_examiner={1}".format(s_name, existing_examiner))
-                        if existing_examiner and (existing_examiner != sorted_name):
-                            # need to change the student's examiner
-                            assign_grade_for_assignment(course_id, assignment_id, students_userid, sorted_name, False)
+                        if assign_grade_for_assignment(course_id, assignment_id, students_userid, sorted_name, False):
+                            current_examiners[students_userid]=sorted_name
                             print("{0}: changed examiner from {1} to {2}".format(s_name, existing_examiner, sorted_name))
-                        else:
-                            print("{0}: examiner is {1}".format(s_name, sorted_name))
-                            assign_grade_for_assignment(course_id, assignment_id, students_userid, sorted_name, False)
-
                     else:
-                        print("no current_grade_info {0}: examiner is {1}".format(s_name, sorted_name))
-                        assign_grade_for_assignment(course_id, assignment_id, students_userid, sorted_name, False)
+                        print("no current examiner {0}: examiner is {1}".format(s_name, sorted_name))
+                        if assign_grade_for_assignment(course_id, assignment_id, students_userid, sorted_name, False):
+                            current_examiners[students_userid]=sorted_name
 
 if __name__ == "__main__": main()
 
@@ -7,6 +7,9 @@
 # Note that one can optionally strip a fixed prefix from the group names. For example, if each group name begins with "Project group" followed by space and a number
 # then # ./insert-group_column_in_gradebook.py 6433 New_groups "Project Groups" "Project group"
 # will simply insert the number with the leading space stripped.
+#
+# The entries of all of the group members are stored together with a few requests to
+# PUT /courses/:id/custom_gradebook_columns/data (see canvas_column_data.py), rather than one PUT per member.
 # 
 # with the option '-C'or '--containers' use HTTP rather than HTTPS for access to Canvas
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
@@ -24,6 +27,8 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
+import canvas_column_data     # bulk writes of custom column entries
 import optparse
 import sys
 
@@ -49,6 +54,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -96,7 +102,7 @@ def put_custom_column_entries(course_id, column_number, user_id, data_to_store):
         print("url: " + url)
 
     payload={'column_data[content]': data_to_store}
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
 
     if Verbose_Flag:
         print("result of putting data into custom_gradebook_column:  {}".format(r.text))
@@ -122,7 +128,7 @@ def list_custom_column_entries(course_id, column_number):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -136,7 +142,7 @@ def list_custom_column_entries(course_id, column_number):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 entries_found_thus_far.append(p_response)
@@ -152,7 +158,7 @@ def list_custom_columns(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -166,7 +172,7 @@ def list_custom_columns(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 columns_found_thus_far.append(p_response)
@@ -190,7 +196,7 @@ def insert_column_name(course_id, column_name):
     if Verbose_Flag:
         print("url: {}".format(url))
     payload={'column[title]': column_name}
-    r = requests.post(url, headers = header, data=payload)
+    r = canvas_client.post(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         if Verbose_Flag:
             print("result of post creating custom column:  {}".format(r.text))
@@ -211,7 +217,7 @@ def students_in_course(course_id):
     # enrollment_type[] should be set to 'student'
     # include[] perhaps include email, enrollments, avatar_url
     extra_parameters={'enrollment_type[]': 'student', 'include[]': 'enrollments'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting student enrollments: {}".format(r.text))
 
@@ -226,7 +232,7 @@ def students_in_course(course_id):
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         if 'link' in r.headers:
             while r.links['current']['url'] != r.links['last']['url']:  
-                r = requests.get(r.links['next']['url'], headers=header)  
+                r = canvas_client.get(r.links['next']['url'], headers=header)  
                 page_response = r.json()  
                 for p_response in page_response:  
                     students_found_thus_far.append(p_response)
@@ -242,7 +248,7 @@ def list_groups_in_course(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting groups: {}".format(r.text))
 
@@ -256,7 +262,7 @@ def list_groups_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 groups_found_thus_far.append(p_response)
@@ -274,7 +280,7 @@ def list_categories_in_course(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting group categories: {}".format(r.text))
 
@@ -288,7 +294,7 @@ def list_categories_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 groups_found_thus_far.append(p_response)
@@ -305,7 +311,7 @@ def members_of_group(group_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting group categories: {}".format(r.text))
 
@@ -319,7 +325,7 @@ def members_of_group(group_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 members_found_thus_far.append(p_response)
@@ -350,7 +356,10 @@ def main():
     )
 
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -410,9 +419,12 @@ def main():
                     if Verbose_Flag:
                         print("{0}: user_id is {1} and group name is {2}".format(m['name'], m['id'],  g['name']))
                     if prefix_to_remove:
-                        put_custom_column_entries(course_id, column_number, m['id'], g['name'][len(prefix_to_remove):].strip())
+                        canvas_column_data.queue(column_number, m['id'], g['name'][len(prefix_to_remove):].strip())
                     else:
-                        put_custom_column_entries(course_id, column_number, m['id'], g['name'])
+                        canvas_column_data.queue(column_number, m['id'], g['name'])
+
+        # store the entries of all of the members with a few bulk requests
+        canvas_column_data.flush(baseUrl, header, course_id, Verbose_Flag)
     else:
         print("No group set named {}".format(groupset_name))
 
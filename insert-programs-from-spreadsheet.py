@@ -16,6 +16,12 @@
 # with the option '-C'or '--containers' use HTTP rather than HTTPS for access to Canvas
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
 #
+# Each entry that has been stored is recorded in a journal (see canvas_journal.py), as soon as the bulk
+# request that carried it has completed; with the option
+# '--resume' an interrupted run continues with the entries that had not yet been stored.
+# The new and changed entries are stored together with a few requests to
+# PUT /courses/:id/custom_gradebook_columns/data (see canvas_column_data.py), rather than one PUT per student.
+#
 # Can also be called with an alternative configuration file:
 # ./insert-programs-from-spreadsheet.py  --config config-test.json 25434
 #
@@ -27,6 +33,9 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
+import canvas_journal         # record of the writes made, for --resume
+import canvas_column_data     # bulk writes of custom column entries
 import pprint
 import optparse
 import sys
@@ -62,6 +71,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -109,7 +119,7 @@ def put_custom_column_entries(course_id, column_number, user_id, data_to_store):
         print("url: " + url)
 
     payload={'column_data[content]': data_to_store}
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
 
     if Verbose_Flag:
         print("result of putting data into custom_gradebook_column:  {}".format(r.text))
@@ -133,7 +143,7 @@ def list_custom_column_entries(course_id, column_number):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -147,7 +157,7 @@ def list_custom_column_entries(course_id, column_number):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 entries_found_thus_far.append(p_response)
@@ -163,7 +173,7 @@ def list_custom_columns(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -177,7 +187,7 @@ def list_custom_columns(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 columns_found_thus_far.append(p_response)
@@ -201,7 +211,7 @@ def insert_column_name(course_id, column_name):
     if Verbose_Flag:
         print("url: {}".format(url))
     payload={'column[title]': column_name}
-    r = requests.post(url, headers = header, data=payload)
+    r = canvas_client.post(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         if Verbose_Flag:
             print("result of post creating custom column:  {}".format(r.text))
@@ -220,7 +230,7 @@ def users_in_course(course_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -234,7 +244,7 @@ def users_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             if r.status_code == requests.codes.ok:
                 for p_response in page_response:  
@@ -283,7 +293,11 @@ def main():
                       )
 
 
+    canvas_client.add_options(parser)
+    canvas_journal.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -303,6 +317,9 @@ def main():
         return
 
     course_id=remainder[0]
+    canvas_journal.start(options, course_id)
+    journal_endpoint='PUT /courses/:id/custom_gradebook_columns/:id/data/:id'
+
     list_of_columns=list_custom_columns(course_id)
 
     # example of a fillename: users_programs-25434
@@ -338,6 +355,7 @@ def main():
     if Verbose_Flag:
         print("number_of_rows={}".format(number_of_rows))
 
+    names_of_users=dict()               # user_id -> user's name, for the entries queued
     if students_df.dtypes[columns_from_spreadsheet[0]] == 'object': # if data values are strings these look like "objects"
         for j in range(0,number_of_rows):
             if options.testing and (j > 2):
@@ -365,25 +383,42 @@ def main():
             if isinstance(prog2, str) and len(prog2) > 0:
                 data_to_store="{0}|{1}|{2}".format(prog0, prog1, prog2)
 
+            journal_item="{0}/{1}".format(column_number, user_id)
+            if data_to_store and canvas_journal.completed(course_id, journal_endpoint, journal_item, data_to_store):
+                print("{0}: {1} already stored in an earlier run".format(user_name, data_to_store))
+                continue
+
             existing_program=get_users_existing_program(existing_program_data, user_id)
             if data_to_store:
                 if not existing_program:
-                    status=put_custom_column_entries(course_id, column_number, user_id, data_to_store)
-                    if status:
-                        print("{0}: {1}".format(user_name, data_to_store))
-                    else:
-                        print("failed to enter user {0}: {1}".format(user_name, data_to_store))
+                    canvas_column_data.queue(column_number, user_id, data_to_store)
+                    names_of_users[int(user_id)]=user_name
                 else:
                     if data_to_store != existing_program:
                         print("{0}: {1} updated prevous value of {2}".format(user_name, data_to_store, existing_program))
-                        status=put_custom_column_entries(course_id, column_number, user_id, data_to_store)
-                        if status:
-                            print("{0}: {1}".format(user_name, data_to_store))
-                        else:
-                            print("failed to enter user {0}: {1}".format(user_name, data_to_store))
+                        canvas_column_data.queue(column_number, user_id, data_to_store)
+                        names_of_users[int(user_id)]=user_name
+
+        # store all of the queued entries with a few bulk requests, recording each chunk as soon as it is stored
+        queued=canvas_column_data.pending()
+        stored_user_ids=set()
+        def record_stored_entries(entries):
+            for e in entries:
+                journal_item="{0}/{1}".format(e['column_id'], e['user_id'])
+                canvas_journal.record(course_id, journal_endpoint, journal_item, e['content'])
+                stored_user_ids.add(e['user_id'])
+                print("{0}: {1}".format(names_of_users[e['user_id']], e['content']))
+
+        canvas_column_data.flush(baseUrl, header, course_id, Verbose_Flag, on_stored=record_stored_entries)
+        if len(stored_user_ids) < queued:
+            for user_id, user_name in names_of_users.items():
+                if user_id not in stored_user_ids:
+                    print("failed to enter user {0}".format(user_name))
 
     else:
         print('unknown data type in column: ', column_name)
 
+    canvas_journal.close()
+
 if __name__ == "__main__": main()
 
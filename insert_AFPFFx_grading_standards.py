@@ -18,6 +18,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 import optparse
 import sys
 import json
@@ -44,6 +45,7 @@ def initialize(options):
        try:
               with open(config_file) as json_data_file:
                      configuration = json.load(json_data_file)
+                     canvas_client.initialize(configuration)
                      access_token=configuration["canvas"]["access_token"]
                      baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -87,7 +89,7 @@ def create_grading_standard(course_or_account, id, name, scale):
     if Verbose_Flag:
         print("payload={0}".format(payload))
 
-    r = requests.post(url, headers = header, json=payload)
+    r = canvas_client.post(url, headers = header, json=payload)
     if r.status_code == requests.codes.ok:
         page_response=r.json()
         print("inserted grading standard")
@@ -112,7 +114,7 @@ def get_grading_standards(course_or_account, id):
     if Verbose_Flag:
        print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if r.status_code == requests.codes.ok:
         page_response=r.json()
         return page_response
@@ -154,7 +156,10 @@ def main():
 
 
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     Force_Flag=options.force
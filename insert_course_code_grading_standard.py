@@ -28,6 +28,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -55,6 +56,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
             
@@ -85,7 +87,7 @@ def sections_in_course(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting sections: {}".format(r.text))
 
@@ -99,7 +101,7 @@ def sections_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 sections_found_thus_far.append(p_response)
@@ -116,7 +118,7 @@ def get_course_info(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if r.status_code == requests.codes.ok:
         page_response=r.json()
         return page_response
@@ -145,7 +147,7 @@ def create_grading_standard(id, name, scale):
     if Verbose_Flag:
         print("payload={0}".format(payload))
 
-    r = requests.post(url, headers = header, json=payload)
+    r = canvas_client.post(url, headers = header, json=payload)
     if r.status_code == requests.codes.ok:
         page_response=r.json()
         print("inserted grading standard")
@@ -167,7 +169,7 @@ def get_grading_standards(id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if r.status_code == requests.codes.ok:
         page_response=r.json()
         return page_response
@@ -217,7 +219,10 @@ def main():
 
 
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     Force_Flag=options.force
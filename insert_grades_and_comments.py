@@ -22,9 +22,26 @@
 # with the option '-C'or '--containers' use HTTP rather than HTTPS for access to Canvas
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
 #
+# Each grade that has been stored is recorded in a journal (see canvas_journal.py). If a run is
+# interrupted, run the program again with the option '--resume' to skip the students whose grades
+# were already stored; a student whose comment was stored, but not recorded in the journal, does
+# not get the comment a second time.
+#
+# The CSV file is read in chunks of csv_rows_per_chunk rows and only the ID, Student, grade, and comment columns
+# are kept, so very large exports (with many other assignment columns) can be used.
+#
+# With the option '-b' or '--bulk' the grades and comments are sent to Canvas in a few
+# update_grades requests (each for up to grades_per_bulk_request students) rather than with one
+# request per student; the program waits for Canvas to process them and then checks, using a
+# single listing of the submissions, that each student has the new grade and comment.
+#
 # Can also be called with an alternative configuration file:
 # ./insert_grades_and_comments.py  --config config-test.json course_id assignment_id file.csv
 #
+# ./insert_grades_and_comments.py  --resume course_id assignment_id file.csv
+#
+# ./insert_grades_and_comments.py  --bulk course_id assignment_id file.csv
+#
 # G. Q. Maguire Jr.
 #
 # based upon 2018.09.30 - Canvas-git/insert_grades_and_comments.py
@@ -33,6 +50,8 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
+import canvas_journal         # record of the writes made, for --resume
 from pprint import pprint
 import optparse
 import sys
@@ -52,6 +71,11 @@ import pandas as pd
 
 # to use math.isnan(x) function
 import math
+
+# number of students whose grades are sent in one update_grades request
+grades_per_bulk_request=250
+# number of rows of the CSV file read at a time
+csv_rows_per_chunk=1000
 #############################
 ###### EDIT THIS STUFF ######
 #############################
@@ -72,6 +96,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -105,7 +130,7 @@ def enrollments_in_course(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -119,7 +144,7 @@ def enrollments_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 users_found_thus_far.append(p_response)
@@ -138,7 +163,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -151,7 +176,7 @@ def list_assignments(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 assignments_found_thus_far.append(p_response)
@@ -168,7 +193,7 @@ def get_assignment_details(course_id, assignment_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignment: {}".format(r.text))
 
@@ -195,7 +220,7 @@ def get_grade_for_assignment(course_id, assignment_id, user_id):
 
     payload={'include[]': 'submission_comments'}
 
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of getting assignment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -233,7 +258,8 @@ def assign_grade_for_assignment(course_id, assignment_id, user_id, grade, commen
         payload={'submission[posted_grade]': grade,
         }
 
-    r = requests.put(url, headers = header, data=payload)
+    # setting a grade can be repeated safely, adding a comment cannot
+    r = canvas_client.put(url, headers = header, data=payload, idempotent=not comment)
     if Verbose_Flag:
         print("result of put assign_grade_for_assignment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -243,6 +269,111 @@ def assign_grade_for_assignment(course_id, assignment_id, user_id, grade, commen
         return True
     return False
 
+def submissions_for_assignment(course_id, assignment_id):
+    global Verbose_Flag
+    # Use the Canvas API to get the submissions (with their comments) of all students for an assignment
+    #GET /api/v1/courses/:course_id/assignments/:assignment_id/submissions
+
+    url = "{0}/courses/{1}/assignments/{2}/submissions".format(baseUrl,course_id, assignment_id)
+    if Verbose_Flag:
+       print("url: " + url)
+
+    extra_parameters={'include[]': 'submission_comments',
+                      'per_page': '100'
+                      }
+    return canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
+
+# returns True if the grade of the submission is the posted_grade
+def same_grade(posted_grade, submission):
+    if submission.get('grade') is not None and str(posted_grade) == str(submission['grade']):
+        return True
+    try:
+        return float(posted_grade) == float(submission.get('score'))
+    except (TypeError, ValueError):
+        return False
+
+def bulk_assign_grades(course_id, assignment_id, rows, resume, journal_endpoint):
+    grade_data=dict()
+    for user_id, name, new_grade, comment in rows:
+        journal_item="{0}/{1}".format(assignment_id, user_id)
+        journal_payload={'grade': new_grade, 'comment': comment}
+        if canvas_journal.completed(course_id, journal_endpoint, journal_item, journal_payload):
+            print("user_id={0}, name={1}: already stored in an earlier run".format(user_id, name))
+            continue
+        if isinstance(new_grade, float) and math.isnan(new_grade):
+            print("user_id={0}, name={1}: no grade given".format(user_id, name))
+            continue
+        grade_data[user_id]={'name': name,
+                             'grade': new_grade,
+                             'comment': comment if isinstance(comment, str) else None,
+                             'journal_item': journal_item,
+                             'journal_payload': journal_payload,
+                             }
+
+    user_ids=list(grade_data)
+    if resume and any(g['comment'] for g in grade_data.values()):
+        # an earlier run may have stored some of the comments without recording them, do not add them again
+        for s in submissions_for_assignment(course_id, assignment_id):
+            g=grade_data.get(s['user_id'])
+            if g and comment_already_made(s, g['comment']):
+                g['comment']=None
+
+    progresses=[]
+    for i in range(0, len(user_ids), grades_per_bulk_request):
+        some_user_ids=user_ids[i:i+grades_per_bulk_request]
+        progress=canvas_client.update_grades(baseUrl, header, course_id, assignment_id, {u: grade_data[u] for u in some_user_ids}, Verbose_Flag)
+        if progress:
+            progresses.append(progress)
+        print("sent grades for {0} of {1} students".format(min(i+grades_per_bulk_request, len(user_ids)), len(user_ids)))
+
+    for progress in progresses:
+        progress=canvas_client.wait_for_progress(baseUrl, header, progress, Verbose_Flag)
+        if progress and progress['workflow_state'] != 'completed':
+            print("job {0} {1}: {2}".format(progress['id'], progress['workflow_state'], progress.get('message')))
+
+    # check the result with a single listing of the submissions
+    submissions=dict()
+    for s in submissions_for_assignment(course_id, assignment_id):
+        submissions[s['user_id']]=s
+
+    number_ok=0
+    for user_id in user_ids:
+        g=grade_data[user_id]
+        s=submissions.get(user_id)
+        if s is None:
+            status="no submission found"
+        elif not same_grade(g['grade'], s):
+            status="grade is {}".format(s.get('grade'))
+        elif g['comment'] and not comment_already_made(s, g['comment']):
+            status="comment missing"
+        else:
+            status="ok"
+            number_ok=number_ok+1
+            canvas_journal.record(course_id, journal_endpoint, g['journal_item'], g['journal_payload'])
+        print("user_id={0}, name={1}, new_grade={2}: {3}".format(user_id, g['name'], g['grade'], status))
+    print("{0} of {1} grades verified".format(number_ok, len(user_ids)))
+
+# Yield the rows of the CSV file as tuples of (ID, Student, grade, comment), reading only these four
+# columns and only csv_rows_per_chunk rows at a time - so that the memory needed does not depend on the
+# number of rows or the number of other columns in the file
+def gradebook_rows(csv_file, grade_header, comments_header):
+    columns=['ID', 'Student', grade_header, comments_header]
+    # the ID is read as text, as the dtype of each chunk is inferred separately and a row without an ID
+    # (such as "Points Possible") would otherwise make the IDs of its chunk floats
+    for chunk in pd.read_csv(csv_file, sep=',', usecols=columns, dtype={'ID': str}, chunksize=csv_rows_per_chunk):
+        chunk['ID']=pd.to_numeric(chunk['ID'].str.strip(), errors='coerce')
+        chunk=chunk[chunk['ID'].notna()].astype({'ID': 'int64'})
+        yield from chunk[columns].itertuples(index=False, name=None)
+
+# returns True if the submission already has a comment with the text comment
+def comment_already_made(submission, comment):
+    if not submission or not isinstance(comment, str):
+        return False
+    for c in submission.get('submission_comments', []):
+        if c.get('comment') == comment:
+            return True
+    return False
+
 def main():
     global Verbose_Flag
     global Use_Local_Time_For_Output_Flag
@@ -271,7 +402,18 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    parser.add_option('-b', '--bulk',
+                      dest="bulk",
+                      default=False,
+                      action="store_true",
+                      help="send the grades in a few bulk requests and verify them afterwards"
+    )
+
+    canvas_client.add_options(parser)
+    canvas_journal.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -294,11 +436,13 @@ def main():
     csv_file=remainder[2]
    
     print("course_id={0}, assignment_id={1}, file_name='{2}'".format(course_id, assignment_id, csv_file))
+    canvas_journal.start(options, course_id)
+    journal_endpoint='PUT /courses/:id/assignments/:id/submissions/:id'
 
-    # read in the CSV entries (assumed to have been exported from the gradebook)
-    gradebook_df=pd.read_csv(csv_file, sep=',')
+    # read the column headings of the CSV file (assumed to have been exported from the gradebook), the rows are read later
+    headers=list(pd.read_csv(csv_file, sep=',', nrows=0))
     if Verbose_Flag:
-        print("gradebook_df={}".format(gradebook_df))
+        print("headers={}".format(headers))
 
     # get a list of the assignments in the courses
     assignments=list_assignments(course_id)
@@ -325,7 +469,6 @@ def main():
     grade_header=''
     comments_header=''
     match_count=0
-    headers=list(gradebook_df)
     for h in headers:
         if h.find(assignment_name) >= 0:
             match_count=match_count+1
@@ -338,24 +481,38 @@ def main():
     if len(grade_header) and len(comments_header) > 0:
         print("grade_header={0}, comments_header={1}".format(grade_header, comments_header))
 
-        for index, row in gradebook_df.iterrows():
-            name=row['Student']
-            user_id=row['ID']
-            new_grade=row[grade_header]
-            comment=row[comments_header]
-        
+        rows=gradebook_rows(csv_file, grade_header, comments_header)
+        if options.bulk:
+            bulk_assign_grades(course_id, assignment_id, rows, options.resume, journal_endpoint)
+            canvas_journal.close()
+            return
+
+        for user_id, name, new_grade, comment in rows:
             #if Verbose_Flag:
             print("user_id={0}, name={1}, new_grade={2}, comment={3}".format(user_id, name, new_grade, comment))
+            journal_item="{0}/{1}".format(assignment_id, user_id)
+            journal_payload={'grade': new_grade, 'comment': comment}
+            if canvas_journal.completed(course_id, journal_endpoint, journal_item, journal_payload):
+                print("already stored in an earlier run")
+                continue
+
             grade=get_grade_for_assignment(course_id, assignment_id, user_id)
             print("existing_grade={}".format(grade))
 
             Verbose_Flag=True
-            ag=assign_grade_for_assignment(course_id, assignment_id, user_id, new_grade,comment)
+            if options.resume and comment_already_made(grade, comment):
+                # the earlier run stored this comment, but stopped before recording it in the journal
+                ag=assign_grade_for_assignment(course_id, assignment_id, user_id, new_grade, None)
+            else:
+                ag=assign_grade_for_assignment(course_id, assignment_id, user_id, new_grade,comment)
             print("ag is {0}".format(ag))
+            if ag:
+                canvas_journal.record(course_id, journal_endpoint, journal_item, journal_payload)
 
             final_grade=get_grade_for_assignment(course_id, assignment_id, user_id)
             print("final_grade={}".format(final_grade))
 
+    canvas_journal.close()
 
 
 if __name__ == "__main__": main()
@@ -21,12 +21,23 @@
 #  as the assignment and comment name matching are done; hence, other columns are ignored.
 #
 #
+# The current submissions (with their comments) are fetched in a single listing and compared with
+# the rows of the CSV file, so that a grade is only stored if it differs from the grade in Canvas
+# and a comment is only added if the submission does not already have it; re-uploading a file in
+# which only a few rows have changed makes only a few writes. The CSV file is read (and compared) in chunks of
+# csv_rows_per_chunk rows, keeping only the Student, ID, grade, and comment columns, so very large exports can be used.
+# As a comment cannot be taken back, the program stops without making changes if the listing has fewer
+# submissions than there are students with a pseudo user ID, and skips any student without a listed submission.
+#
 # with the option '-C'or '--containers' use HTTP rather than HTTPS for access to Canvas
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
+# with the option "-n" or "--dry-run" the changes that would be made are listed, but not made
 #
 # Can also be called with an alternative configuration file:
 # ./insert_grades_and_comments.py  --config config-test.json course_id assignment_id file.csv
 #
+# ./insert_grades_and_comments_indirect.py --dry-run course_id assignment_id file.csv indirect_column_name
+#
 # G. Q. Maguire Jr.
 #
 # based upon 2018.09.30 - Canvas-git/insert_grades_and_comments.py
@@ -35,6 +46,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -54,6 +66,9 @@ import pandas as pd
 
 # to use math.isnan(x) function
 import math
+
+# number of rows of the CSV file read at a time
+csv_rows_per_chunk=1000
 #############################
 ###### EDIT THIS STUFF ######
 #############################
@@ -74,6 +89,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -107,7 +123,7 @@ def enrollments_in_course(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -121,7 +137,7 @@ def enrollments_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 users_found_thus_far.append(p_response)
@@ -140,7 +156,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -153,7 +169,7 @@ def list_assignments(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 assignments_found_thus_far.append(p_response)
@@ -170,7 +186,7 @@ def get_assignment_details(course_id, assignment_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignment: {}".format(r.text))
 
@@ -197,7 +213,7 @@ def get_grade_for_assignment(course_id, assignment_id, user_id):
 
     payload={'include[]': 'submission_comments'}
 
-    r = requests.get(url, headers = header, data=payload)
+    r = canvas_client.get(url, headers = header, data=payload)
     if Verbose_Flag:
         print("result of getting assignment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -235,7 +251,8 @@ def assign_grade_for_assignment(course_id, assignment_id, user_id, grade, commen
         payload={'submission[posted_grade]': grade,
         }
 
-    r = requests.put(url, headers = header, data=payload)
+    # setting a grade can be repeated safely, adding a comment cannot
+    r = canvas_client.put(url, headers = header, data=payload, idempotent=not comment)
     if Verbose_Flag:
         print("result of put assign_grade_for_assignment: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -246,6 +263,73 @@ def assign_grade_for_assignment(course_id, assignment_id, user_id, grade, commen
     return False
 
 
+def submissions_for_assignment(course_id, assignment_id):
+    global Verbose_Flag
+    # Use the Canvas API to get the submissions (with their comments) of all students for an assignment
+    #GET /api/v1/courses/:course_id/assignments/:assignment_id/submissions
+
+    url = "{0}/courses/{1}/assignments/{2}/submissions".format(baseUrl,course_id, assignment_id)
+    if Verbose_Flag:
+       print("url: " + url)
+
+    extra_parameters={'include[]': 'submission_comments',
+                      'per_page': '100'
+                      }
+    return canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
+
+# the current grades and the existing comments, as tables to compare the rows of the CSV file with
+def current_tables(submissions):
+    current_df=pd.DataFrame([{'user_id': s['user_id'], 'grade': s.get('grade'), 'score': s.get('score')}
+                             for s in submissions],
+                            columns=['user_id', 'grade', 'score'])
+    comments_df=pd.DataFrame([{'user_id': s['user_id'], 'comment': c.get('comment')}
+                              for s in submissions for c in (s.get('submission_comments') or [])],
+                             columns=['user_id', 'comment']).drop_duplicates()
+    return current_df, comments_df
+
+# Compare the rows of the spreadsheet with the current submissions and return a dataframe with a row
+# for each student whose grade differs from the one in Canvas (grade_changed) or who has a comment
+# that is not yet on the submission (new_comment)
+def changes_to_make(gradebook_df, grade_header, comments_header, pseudo_id_to_user_id, current_df, comments_df):
+    rows_df=pd.DataFrame({'name': gradebook_df['Student'],
+                          'pseudo_user_id': gradebook_df['ID'].astype(str),
+                          'new_grade': gradebook_df[grade_header],
+                          'comment': gradebook_df[comments_header],
+                          })
+    rows_df['user_id']=rows_df['pseudo_user_id'].map(pseudo_id_to_user_id) # translate from pseudo user ID to actual user_id
+    for pseudo_user_id in rows_df.loc[rows_df['user_id'].isna(), 'pseudo_user_id']:
+        print("No user_id for pseudo user ID: {0}".format(pseudo_user_id))
+    rows_df=rows_df[rows_df['user_id'].notna()].astype({'user_id': 'int64'})
+
+    # a student without a submission in the listing is skipped: as their existing comments are not
+    # known, posting the comment could add it a second time
+    merged_df=rows_df.merge(current_df, on='user_id', how='left', indicator=True)
+    for row in merged_df[merged_df['_merge'] == 'left_only'].itertuples(index=False):
+        print("No submission listed for user_id={0}, name={1} - skipping".format(row.user_id, row.name))
+    merged_df=merged_df[merged_df['_merge'] == 'both'].drop(columns='_merge')
+
+    # a grade is unchanged if it is the same number as the current score or the same text as the current grade
+    new_score=pd.to_numeric(merged_df['new_grade'], errors='coerce')
+    current_score=pd.to_numeric(merged_df['score'], errors='coerce')
+    same_grade=(new_score.notna() & (new_score == current_score)) | (merged_df['new_grade'].astype(str) == merged_df['grade'].astype(str))
+    merged_df['grade_changed']=merged_df['new_grade'].notna() & ~same_grade
+
+    has_comment=merged_df['comment'].map(lambda c: isinstance(c, str) and len(c) > 0)
+    known_comment=merged_df[['user_id', 'comment']].merge(comments_df, on=['user_id', 'comment'], how='left', indicator=True)['_merge'] == 'both'
+    merged_df['new_comment']=has_comment & ~known_comment.values
+
+    return merged_df[merged_df['grade_changed'] | merged_df['new_comment']]
+
+# Yield the CSV file as data frames of csv_rows_per_chunk rows, with only the Student, ID, grade, and
+# comment columns - so that the memory needed does not depend on the size of the file
+def gradebook_chunks(csv_file, grade_header, comments_header):
+    columns=['Student', 'ID', grade_header, comments_header]
+    # the ID is read as text, as the dtype of each chunk is inferred separately and a row without an ID
+    # (such as "Points Possible") would otherwise turn the IDs of its chunk into floats, e.g. '12345.0'
+    for chunk in pd.read_csv(csv_file, sep=',', usecols=columns, dtype={'ID': str}, chunksize=csv_rows_per_chunk):
+        chunk['ID']=chunk['ID'].str.strip()
+        yield chunk[chunk['ID'].notna() & (chunk['ID'] != '')]
+
 def list_custom_columns(course_id):
     global Verbose_Flag
     columns_found=[]
@@ -256,7 +340,7 @@ def list_custom_columns(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -269,7 +353,7 @@ def list_custom_columns(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 columns_found.append(p_response)
@@ -296,7 +380,7 @@ def get_custom_column_entries_all(course_id, column_number):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
     if r.status_code == requests.codes.ok:
@@ -309,7 +393,7 @@ def get_custom_column_entries_all(course_id, column_number):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 column_entries.append(p_response)
@@ -345,7 +429,17 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    parser.add_option('-n', '--dry-run',
+                      dest="dry_run",
+                      default=False,
+                      action="store_true",
+                      help="only list the changes that would be made"
+    )
+
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -370,10 +464,10 @@ def main():
    
     print("course_id={0}, assignment_id={1}, file_name='{2}'".format(course_id, assignment_id, csv_file))
 
-    # read in the CSV entries (assumed to have been exported from the gradebook)
-    gradebook_df=pd.read_csv(csv_file, sep=',')
+    # read the column headings of the CSV file (assumed to have been exported from the gradebook), the rows are read later
+    headers=list(pd.read_csv(csv_file, sep=',', nrows=0))
     if Verbose_Flag:
-        print("gradebook_df={}".format(gradebook_df))
+        print("headers={}".format(headers))
 
     # get a list of the assignments in the courses
     assignments=list_assignments(course_id)
@@ -408,7 +502,7 @@ def main():
 
     pseudo_id_to_user_id={}
     for e in c_entries:
-        pseudo_id_to_user_id[e['content']]=e['user_id']
+        pseudo_id_to_user_id[str(e['content'])]=e['user_id']
 
     if Verbose_Flag:
         print("pseudo_id_to_user_id is {}".format(pseudo_id_to_user_id))
@@ -416,7 +510,6 @@ def main():
     grade_header=''
     comments_header=''
     match_count=0
-    headers=list(gradebook_df)
     for h in headers:
         if h.find(assignment_name) >= 0:
             match_count=match_count+1
@@ -430,24 +523,42 @@ def main():
     if len(grade_header) and len(comments_header) > 0:
         print("grade_header={0}, comments_header={1}".format(grade_header, comments_header))
 
-        for index, row in gradebook_df.iterrows():
-            name=row['Student']
-            pseudo_user_id=row['ID']
-            user_id=pseudo_id_to_user_id.get(pseudo_user_id, False) # translate from pseudo user ID to actual user_id
-            if user_id:
-                new_grade=row[grade_header]
-                comment=row[comments_header]
-        
-                if Verbose_Flag:
-                    print("user_id={0}, name={1}, new_grade={2}, comment={3}".format(user_id, name, new_grade, comment))
-                grade=get_grade_for_assignment(course_id, assignment_id, user_id)
+        submissions=submissions_for_assignment(course_id, assignment_id)
+        # a short listing would make existing comments look new, and comments cannot be taken back
+        number_of_mapped_students=len(set(pseudo_id_to_user_id.values()))
+        if len(submissions) < number_of_mapped_students:
+            print("Only {0} submissions listed for {1} students with a pseudo user ID - stopping without making changes".format(len(submissions), number_of_mapped_students))
+            return
+        current_df, comments_df=current_tables(submissions)
+
+        number_of_rows=0
+        number_of_changes=0
+        for chunk_df in gradebook_chunks(csv_file, grade_header, comments_header):
+            changes_df=changes_to_make(chunk_df, grade_header, comments_header, pseudo_id_to_user_id, current_df, comments_df)
+            number_of_rows=number_of_rows+len(chunk_df)
+            number_of_changes=number_of_changes+len(changes_df)
+
+            for row in changes_df.itertuples(index=False):
+                user_id=row.user_id
+                comment=row.comment if row.new_comment else None
+                if row.grade_changed:
+                    print("user_id={0}, name={1}: grade {2} -> {3}".format(user_id, row.name, row.grade if pd.notna(row.grade) else 'none', row.new_grade))
+                if comment:
+                    print("user_id={0}, name={1}: new comment {2}".format(user_id, row.name, comment))
                 if Verbose_Flag:
-                    print("existing_grade={}".format(grade))
-                ag=assign_grade_for_assignment(course_id, assignment_id, user_id, new_grade,comment)
-                final_grade=get_grade_for_assignment(course_id, assignment_id, user_id)
-                if Verbose_Flag:
-                    print("final_grade={}".format(final_grade))
-            else:
-                print("No user_id for pseudo user ID: {pseudo_user_id}".format(pseudo_user_id))
+                    print("row={}".format(row))
+                if options.dry_run:
+                    continue
+
+                # the grade is sent even if only the comment is new, as posted_grade is always sent
+                if pd.notna(row.new_grade):
+                    new_grade=row.new_grade
+                else:
+                    new_grade=row.grade
+                ag=assign_grade_for_assignment(course_id, assignment_id, user_id, new_grade, comment)
+                if not ag:
+                    print("failed to store the grade for user_id={0}, name={1}".format(user_id, row.name))
+
+        print("{0} of {1} rows have changes".format(number_of_changes, number_of_rows))
 
 if __name__ == "__main__": main()
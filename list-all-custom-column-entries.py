@@ -5,6 +5,12 @@
 # Outputs an xlsx file of the form containing all of the custom columns: custom-column-entries-course_id-column-column_all.xlsx
 # The first column of the output will be user_id.
 #
+# The entries of all of the custom columns are fetched concurrently, collected in one long table
+# of (user_id, column, content), and turned into a table with a column per custom column with a
+# single pivot, which is then joined with the students (indexed by user_id).
+# with the option '--csv' and/or '--parquet' the custom columns with the names of the students are
+# also written to custom-column-entries-course_id-column-all.csv and/or .parquet
+#
 # with the option '-C'or '--containers' use HTTP rather than HTTPS for access to Canvas
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
 #
@@ -19,6 +25,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -50,6 +57,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -70,8 +78,6 @@ def initialize(options):
 ##############################################################################
 
 def list_custom_column_entries(course_id, column_number):
-    entries_found_thus_far=[]
-
     # Use the Canvas API to get the list of custom column entries for a specific column for the course
     #GET /api/v1/courses/:course_id/custom_gradebook_columns/:id/data
 
@@ -79,27 +85,33 @@ def list_custom_column_entries(course_id, column_number):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    extra_parameters={'per_page': '100'}
+    entries_found_thus_far=canvas_client.get_all_pages(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
-        print("result of getting custom_gradebook_columns: {}".format(r.text))
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-
-        for p_response in page_response:  
-            entries_found_thus_far.append(p_response)
-
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
-            page_response = r.json()  
-            for p_response in page_response:  
-                entries_found_thus_far.append(p_response)
+        print("result of getting custom_gradebook_columns: {}".format(entries_found_thus_far))
 
     return entries_found_thus_far
 
+# Fetch the entries of all of the columns concurrently and return them as one long table with
+# a row (user_id, column_id, content) for each entry
+def custom_column_entries_table(course_id, list_of_columns):
+    all_entries=canvas_client.check_results(canvas_client.fan_out(list_custom_column_entries,
+                                                                  [(course_id, column['id']) for column in list_of_columns]))
+    rows=[(e['user_id'], column['id'], e['content'])
+          for column, entries in zip(list_of_columns, all_entries)
+          for e in entries]
+    return pd.DataFrame(rows, columns=['user_id', 'column_id', 'content'])
+
+# Turn the long table into a table with a row per user and a column per custom column (in the
+# order of the custom columns), with the user_id as the first column. Users who have no entry in
+# a column get NaN, just as with an outer join of the columns.
+def pivot_custom_column_entries(entries_df, list_of_columns):
+    column_ids=[column['id'] for column in list_of_columns]
+    pivot_df=entries_df.pivot(index='user_id', columns='column_id', values='content')
+    pivot_df=pivot_df.reindex(columns=[c for c in column_ids if c in pivot_df.columns])
+    pivot_df.columns=[column['title'] for column in list_of_columns if column['id'] in pivot_df.columns]
+    return pivot_df.reset_index()
+
 def list_custom_columns(course_id):
     columns_found_thus_far=[]
     # Use the Canvas API to get the list of custom column for this course
@@ -109,7 +121,7 @@ def list_custom_columns(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -123,7 +135,7 @@ def list_custom_columns(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 columns_found_thus_far.append(p_response)
@@ -142,7 +154,7 @@ def users_in_course(course_id):
     extra_parameters={'per_page': '100',
                       'type': ['StudentEnrollment']
     }
-    r = requests.get(url, params=extra_parameters, headers = header)
+    r = canvas_client.get(url, params=extra_parameters, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -156,7 +168,7 @@ def users_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 users_found_thus_far.append(p_response)
@@ -177,7 +189,7 @@ def sections_in_course(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting sections: {}".format(r.text))
 
@@ -191,7 +203,7 @@ def sections_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             page_response = r.json()  
             for p_response in page_response:  
                 sections_found_thus_far.append(p_response)
@@ -221,7 +233,24 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    parser.add_option('--csv',
+                      dest="csv",
+                      default=False,
+                      action="store_true",
+                      help="also write the custom columns with the names of the students as a CSV file"
+    )
+
+    parser.add_option('--parquet',
+                      dest="parquet",
+                      default=False,
+                      action="store_true",
+                      help="also write the custom columns with the names of the students as a Parquet file"
+    )
+
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -298,55 +327,22 @@ def main():
     sections_df=pd.json_normalize(sections)
 
     # augment the users-df with section names
-    for index, row in  users_df.iterrows():
-        if Verbose_Flag:
-            print("index: {0}, row[user_id]: {1}".format(index, row['user_id']))
-
-        user_id=row['user_id']
-        if Verbose_Flag:
-            print("user_id: {}".format(user_id))
-
-        section_name=section_name_from_section_id(sections, row['course_section_id'])
-        users_df.at[index, 'Section_name']= section_name
+    section_names={section['id']: section['name'] for section in sections}
+    users_df['Section_name']=users_df['course_section_id'].map(section_names)
 
 
     list_of_columns=list_custom_columns(course_id)              
     if Verbose_Flag:
         print('list_of_columns: ', list_of_columns)
 
-    custom_columns_present=False
-    index=0
-    for column in list_of_columns:
-        column_name=column['title']
-        column_number=column['id']
-        
-        if Verbose_Flag:
-            print('column_name: ', column_name, '; column_number: ', column_number)
-
-        output=list_custom_column_entries(course_id, column_number)
-        if (output):
-            if Verbose_Flag:
-                print(output)
-
-            # the following was inspired by pbreach's answer on Jan 21 '14 at 18:17 in http://stackoverflow.com/questions/21104592/json-to-pandas-dataframe
-            # create a Panda dataframe from the output
-            df=pd.json_normalize(output)
-            df.rename(columns = {'content': column_name}, inplace = True)
-            index=index+1
-            
-            if index == 1:
-                if Verbose_Flag:
-                    print('index: ', index)
-                merge_df = df
-                custom_columns_present=True
-            else:
-                if Verbose_Flag:
-                    print('else index: ', index)
-                # Note that one has to do an outer join in case on of the columns does not have a matching entry.
-                # This works because the outer join uses the union of the keys from both inputs.
-                new_merge_df = pd.merge(merge_df, df, on='user_id', how='outer')
-                merge_df=new_merge_df
+    # fetch the entries of all of the columns at once and build the table of them with a single pivot
+    entries_df=custom_column_entries_table(course_id, list_of_columns)
+    if Verbose_Flag:
+        print("entries_df={}".format(entries_df))
 
+    custom_columns_present=len(entries_df) > 0
+    if custom_columns_present:
+        merge_df=pivot_custom_column_entries(entries_df, list_of_columns)
 
     #  based upon contribution by Ed Chum on Aug 4 '14 at 15:30 at http://stackoverflow.com/questions/25122099/move-column-by-name-to-front-of-table-in-pandas
     # get a list of columns
@@ -369,6 +365,7 @@ def main():
         # Convert the dataframe to an XlsxWriter Excel object.
         merge_df.to_excel(writer, sheet_name='Custom_Columns')
 
+        # Note that one has to do an outer join in case a student has no entries or an entry belongs to someone who is no longer a student.
         new_merge_df = pd.merge(merge_df, users_df, on='user_id', how='outer')
 
         # below are examples of some columns that might be dropped
@@ -380,6 +377,16 @@ def main():
         new_merge_df.drop(columns_to_drop,inplace=True,axis=1)
         new_merge_df.to_excel(writer, sheet_name='Custom_Columns_with_name')
 
+        # the same table in formats that are quicker to read with other programs
+        output_name='custom-column-entries-'+str(course_id)+'-column-all'
+        if options.csv:
+            new_merge_df.to_csv(output_name+'.csv', index=False)
+        if options.parquet:
+            try:
+                new_merge_df.to_parquet(output_name+'.parquet', index=False)
+            except ImportError:
+                print("writing Parquet files requires pyarrow or fastparquet to be installed")
+
         # Close the Pandas Excel writer and output the Excel file.
         writer.save()
     else:
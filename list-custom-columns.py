@@ -8,6 +8,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -39,6 +40,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -68,7 +70,7 @@ def list_custom_columns(course_id):
        if Verbose_Flag:
               print("url: " + url)
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
 
        if r.status_code == requests.codes.ok:
               page_response=r.json()
@@ -80,7 +82,7 @@ def list_custom_columns(course_id):
               # i.e., when the response is split into pieces - each returning only some of the list of modules
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             columns_found_thus_far.append(p_response)
@@ -108,7 +110,10 @@ def main():
                          help="for the container enviroment in the virtual machine"
        )
 
+       canvas_client.add_options(parser)
+
        options, remainder = parser.parse_args()
+       canvas_client.set_options(options)
 
        Verbose_Flag=options.verbose
        if Verbose_Flag:
@@ -14,6 +14,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -48,6 +49,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -80,8 +82,8 @@ def list_peer_review_assignments(course_id, assignment_id):
         print("url: " + url)
 
     payload={'include[]': "submission_comments"}
-    r = requests.get(url, headers = header, data=payload)
-    #r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header, data=payload)
+    #r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting peer review assignments: {}".format(r.text))
 
@@ -96,7 +98,7 @@ def list_peer_review_assignments(course_id, assignment_id):
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
 
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)
+            r = canvas_client.get(r.links['next']['url'], headers=header)
             page_response = r.json()  
             for p_response in page_response:  
                 peer_review_assignments_found_thus_far.append(p_response)
@@ -113,7 +115,7 @@ def sections_in_course(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting sections: {}".format(r.text))
 
@@ -127,7 +129,7 @@ def sections_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)
+            r = canvas_client.get(r.links['next']['url'], headers=header)
             page_response = r.json()  
             for p_response in page_response:  
                 sections_found_thus_far.append(p_response)
@@ -153,7 +155,7 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting assignments: {}".format(r.text))
 
@@ -167,7 +169,7 @@ def list_assignments(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)
+            r = canvas_client.get(r.links['next']['url'], headers=header)
             page_response = r.json()  
             for p_response in page_response: 
                 assignments_found_thus_far.append(p_response)
@@ -185,7 +187,7 @@ def list_custom_column_entries(course_id, column_number):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -199,7 +201,7 @@ def list_custom_column_entries(course_id, column_number):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)
+            r = canvas_client.get(r.links['next']['url'], headers=header)
             page_response = r.json()  
             for p_response in page_response:  
                 entries_found_thus_far.append(p_response)
@@ -216,7 +218,7 @@ def list_custom_columns(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting custom_gradebook_columns: {}".format(r.text))
 
@@ -230,7 +232,7 @@ def list_custom_columns(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)
+            r = canvas_client.get(r.links['next']['url'], headers=header)
             page_response = r.json()  
             for p_response in page_response:  
                 columns_found_thus_far.append(p_response)
@@ -255,7 +257,7 @@ def insert_column_name(course_id, column_name):
     if Verbose_Flag:
        print("url: " + url)
     payload={'column[title]': column_name}
-    r = requests.post(url, headers = header, data=payload)
+    r = canvas_client.post(url, headers = header, data=payload)
     print("result of post creating custom column: {}".format(r.text))
     if r.status_code == requests.codes.ok:
        print("result of inserting the item into the module: {}".format(r.text))
@@ -275,7 +277,7 @@ def users_in_course(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting enrollments: {}".format(r.text))
 
@@ -289,7 +291,7 @@ def users_in_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)
+            r = canvas_client.get(r.links['next']['url'], headers=header)
             page_response = r.json()  
             for p_response in page_response:  
                 user_found_thus_far.append(p_response)
@@ -317,7 +319,10 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -20,6 +20,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -61,6 +62,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -93,9 +95,8 @@ def convert_to_local_times(input_df, list_of_columns_to_convert):
         input_df['local_'+c]=working_list
 
 
-def get_page_views(user_id, start_date, end_date):
-    views_found_thus_far=[]
-
+# yield the page views of the user page by page, rather than collecting them all in a list
+def iterate_page_views(user_id, start_date, end_date):
     # Use the Canvas API
     #GET /api/v1/users/:user_id/page_views
     url = "{0}/users/{1}/page_views".format(baseUrl,user_id)
@@ -103,30 +104,10 @@ def get_page_views(user_id, start_date, end_date):
         print("url: " + url)
 
     extra_parameters={'start_time': start_date, 'end_time': end_date, 'per_page': 100}
-    r = requests.get(url, params=extra_parameters, headers = header)
-    if Verbose_Flag:
-        write_to_log("result of getting a user's page views: " + r.text)
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-        for p_response in page_response:  
-            views_found_thus_far.append(p_response)
-
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        #while r.links['current']['url'] != r.links['last']['url']:
-        if Verbose_Flag:
-            print("r.links={}".format(r.links))
-        while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
-            page_response = r.json()  
-            if Verbose_Flag:
-                print("got another page worth of views")
-            for p_response in page_response:  
-                views_found_thus_far.append(p_response)
-
-    return views_found_thus_far
+    return canvas_client.iterate_pages(url, params=extra_parameters, headers=header)
+
+def get_page_views(user_id, start_date, end_date):
+    return list(iterate_page_views(user_id, start_date, end_date))
 
 def main():
     global Verbose_Flag
@@ -152,7 +133,14 @@ def main():
                       help="testing mode for skipping files for some courses"
     )
 
+    parser.add_option('-j', '--jsonl',
+                      dest="jsonl_filename",
+                      help="write the page views as JSON Lines to FILE as they arrive, rather than a spreadsheet", metavar="FILE")
+
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -187,6 +175,11 @@ def main():
         print("end date: ", end_date.isoformat())
 
 
+    if options.jsonl_filename:
+        count=canvas_client.write_json_lines(iterate_page_views(user_id, start_date, end_date), options.jsonl_filename)
+        print("{0} page views written to {1}".format(count, options.jsonl_filename))
+        return
+
     page_views=get_page_views(user_id, start_date, end_date)
     if Verbose_Flag:
         print("page_views={0}".format(page_views))
@@ -26,6 +26,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -58,6 +59,7 @@ def initialize(options):
        try:
               with open(config_file) as json_data_file:
                      configuration = json.load(json_data_file)
+                     canvas_client.initialize(configuration)
                      access_token=configuration["canvas"]["access_token"]
                      baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -84,7 +86,7 @@ def sections_in_course(course_id):
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting sections: {}".format(r.text))
 
@@ -99,7 +101,7 @@ def sections_in_course(course_id):
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               #while r.links['current']['url'] != r.links['last']['url']:  
               while r.links.get('next', False):
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             sections_found_thus_far.append(p_response)
@@ -118,7 +120,7 @@ def students_in_course(course_id):
        extra_parameters={'per_page': '100',
                          'type': ['StudentEnrollment']
        }
-       r = requests.get(url, params=extra_parameters, headers = header)
+       r = canvas_client.get(url, params=extra_parameters, headers = header)
        if Verbose_Flag:
               print("result of getting enrollments: {}".format(r.text))
 
@@ -133,7 +135,7 @@ def students_in_course(course_id):
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               #while r.links['current']['url'] != r.links['last']['url']:  
               while r.links.get('next', False):
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             users_found_thus_far.append(p_response)
@@ -162,7 +164,10 @@ def main():
                          help="for the container enviroment in the virtual machine"
        )
 
+       canvas_client.add_options(parser)
+
        options, remainder = parser.parse_args()
+       canvas_client.set_options(options)
 
        Verbose_Flag=options.verbose
        if Verbose_Flag:
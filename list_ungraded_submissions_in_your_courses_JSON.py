@@ -18,6 +18,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -44,6 +45,7 @@ def initialize(options):
        try:
               with open(config_file) as json_data_file:
                      configuration = json.load(json_data_file)
+                     canvas_client.initialize(configuration)
                      access_token=configuration["canvas"]["access_token"]
                      baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -63,7 +65,7 @@ def list_your_courses():
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting courses: {}".format(r.text))
 
@@ -77,7 +79,7 @@ def list_your_courses():
               # i.e., when the response is split into pieces - each returning only some of the list of modules
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      if Verbose_Flag:
                             print("result of getting courses for a paginated response: {}".format(r.text))
                      page_response = r.json()  
@@ -94,7 +96,7 @@ def your_user_info():
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting your own user information: {}".format(r.text))
 
@@ -112,7 +114,7 @@ def sections_in_course(course_id):
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting sections: {}".format(r.text))
 
@@ -126,7 +128,7 @@ def sections_in_course(course_id):
               # i.e., when the response is split into pieces - each returning only some of the list of modules
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             sections_found_thus_far.append(p_response)
@@ -145,7 +147,7 @@ def enrollments_in_course(course_id):
        extra_parameters={'per_page': '100',
                          'type': ['StudentEnrollment']
        }
-       r = requests.get(url, params=extra_parameters, headers = header)
+       r = canvas_client.get(url, params=extra_parameters, headers = header)
        if Verbose_Flag:
               print("result of getting enrollments: {}".format(r.text))
 
@@ -159,7 +161,7 @@ def enrollments_in_course(course_id):
               # i.e., when the response is split into pieces - each returning only some of the list of modules
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             enrollments_found_thus_far.append(p_response)
@@ -178,7 +180,7 @@ def enrollments_in_section(section_id):
        extra_parameters={'per_page': '100',
                          'type': ['StudentEnrollment']
        }
-       r = requests.get(url, params=extra_parameters, headers = header)
+       r = canvas_client.get(url, params=extra_parameters, headers = header)
        if Verbose_Flag:
               print("result of getting enrollments in section: {}".format(r.text))
 
@@ -192,7 +194,7 @@ def enrollments_in_section(section_id):
               # i.e., when the response is split into pieces - each returning only some of the list of modules
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             enrollments_found_thus_far.append(p_response)
@@ -209,7 +211,7 @@ def list_assignments(course_id):
        if Verbose_Flag:
               print("url: {}".format(url))
 
-       r = requests.get(url, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting assignments: {}".format(r.text))
 
@@ -223,7 +225,7 @@ def list_assignments(course_id):
               # i.e., when the response is split into pieces - each returning only some of the list of assignments
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      if Verbose_Flag:
                             print("result of getting assignments for a paginated response: {}".format(r.text))
                      page_response = r.json()  
@@ -243,7 +245,7 @@ def list_ungraded_assignments(course_id):
 
        extra_parameters={'bucket': 'ungraded'
        }
-       r = requests.get(url, params=extra_parameters, headers = header)
+       r = canvas_client.get(url, params=extra_parameters, headers = header)
 
        if Verbose_Flag:
               print("result of getting ungraded assignments: {}".format(r.text))
@@ -258,7 +260,7 @@ def list_ungraded_assignments(course_id):
               # i.e., when the response is split into pieces - each returning only some of the list of assignments
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links['current']['url'] != r.links['last']['url']:  
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      if Verbose_Flag:
                             print("result of getting assignments for a paginated response: {}".format(r.text))
                             page_response = r.json()  
@@ -278,8 +280,8 @@ def submission_for_assignment_by_user(course_id, assignment_id, user_id):
               print("url: {}".format(url))
 
        #extra_parameters={'student_ids[]': 'all'}
-       #r = requests.get(url, params=extra_parameters, headers = header)
-       r = requests.get(url, headers = header)
+       #r = canvas_client.get(url, params=extra_parameters, headers = header)
+       r = canvas_client.get(url, headers = header)
        if Verbose_Flag:
               print("result of getting submissions: {}".format(r.text))
 
@@ -326,7 +328,10 @@ def main():
        parser.add_option("--config", dest="config_filename",
                   help="read configuration from FILE", metavar="FILE")
 
+       canvas_client.add_options(parser)
+
        options, remainder = parser.parse_args()
+       canvas_client.set_options(options)
 
        Verbose_Flag=options.verbose
        if Verbose_Flag:
@@ -444,14 +449,15 @@ def main():
 
               for assignment in assignments:
                      assignment_id=assignment['id']
-                     for enrollment in relevant_enrollments:
+                     # get the submissions of all of the relevant students concurrently - the results are in the same order as relevant_enrollments
+                     student_submissions=canvas_client.check_results(canvas_client.fan_out(submission_for_assignment_by_user,
+                                                                                           [(c_id, assignment_id, enrollment['user_id']) for enrollment in relevant_enrollments]))
+                     for enrollment, student_submission in zip(relevant_enrollments, student_submissions):
                             if Verbose_Flag:
                                    print("enrollment={0}".format(enrollment))
                             if Verbose_Flag:
                                    print("checking for ungraded assignment for student {0} on assignment {1} in course {2}".format(enrollment['user']['name'], assignment['name'], course_dict[c_id]['name']))
 
-                            student_submission=submission_for_assignment_by_user(c_id, assignment_id, enrollment['user_id'])
-
                             # if the grader_id is NULL then the submission has not been graded
                             if student_submission:
                                    # ignore unsubmitted assignments and ignore assignments that are not relevant for a student
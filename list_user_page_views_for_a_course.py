@@ -20,6 +20,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -61,6 +62,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             baseUrl="https://"+configuration["canvas"]["host"]+"/api/v1"
 
@@ -94,9 +96,8 @@ def convert_to_local_times(input_df, list_of_columns_to_convert):
         input_df['local_'+c]=working_list
 
 
-def get_page_views(user_id, start_date, end_date):
-    views_found_thus_far=[]
-
+# yield the page views of the user page by page, rather than collecting them all in a list
+def iterate_page_views(user_id, start_date, end_date):
     # Use the Canvas API
     #GET /api/v1/users/:user_id/page_views
     url = "{0}/users/{1}/page_views".format(baseUrl,user_id)
@@ -104,30 +105,10 @@ def get_page_views(user_id, start_date, end_date):
         print("url: " + url)
 
     extra_parameters={'start_time': start_date, 'end_time': end_date, 'per_page': 100}
-    r = requests.get(url, params=extra_parameters, headers = header)
-    if Verbose_Flag:
-        write_to_log("result of getting a user's page views: " + r.text)
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-        for p_response in page_response:  
-            views_found_thus_far.append(p_response)
+    return canvas_client.iterate_pages(url, params=extra_parameters, headers=header)
 
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        #while r.links['current']['url'] != r.links['last']['url']:
-        if Verbose_Flag:
-            print("r.links={}".format(r.links))
-        while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
-            page_response = r.json()  
-            if Verbose_Flag:
-                print("got another page worth of views")
-            for p_response in page_response:  
-                views_found_thus_far.append(p_response)
-
-    return views_found_thus_far
+def get_page_views(user_id, start_date, end_date):
+    return list(iterate_page_views(user_id, start_date, end_date))
 
 def users_in_course(course_id):
        user_found_thus_far=[]
@@ -139,7 +120,7 @@ def users_in_course(course_id):
               print("url: {}".format(url))
 
        extra_parameters={'per_page': '100'}
-       r = requests.get(url, params=extra_parameters, headers = header)
+       r = canvas_client.get(url, params=extra_parameters, headers = header)
        if Verbose_Flag:
               print("result of getting enrollments: {}".format(r.text))
 
@@ -153,7 +134,7 @@ def users_in_course(course_id):
               # i.e., when the response is split into pieces - each returning only some of the list of modules
               # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
               while r.links.get('next', False):
-                     r = requests.get(r.links['next']['url'], headers=header)  
+                     r = canvas_client.get(r.links['next']['url'], headers=header)  
                      page_response = r.json()  
                      for p_response in page_response:  
                             user_found_thus_far.append(p_response)
@@ -183,7 +164,14 @@ def main():
                       help="testing mode for skipping files for some courses"
     )
 
+    parser.add_option('-j', '--jsonl',
+                      dest="jsonl_filename",
+                      help="write the page views as JSON Lines to FILE as they arrive, rather than a spreadsheet", metavar="FILE")
+
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -226,15 +214,36 @@ def main():
 
     page_views_summary=[]
 
+    # only process each user_id once
+    user_ids=[]
     users_processed=set()
     users=users_in_course(course_id)
     for u in users:
         user_id = u['user_id']
-        # only process each user_id once
         if user_id in users_processed:
             continue
         users_processed.add(user_id)
+        user_ids.append(user_id)
+
+    # the page views of all of the users, counting those of each user as they arrive
+    def page_views_of_all_users():
+        for user_id in user_ids:
+            number_of_views=0
+            for v in iterate_page_views(user_id, start_date, end_date):
+                number_of_views=number_of_views+1
+                yield v
+            print("{0} page views for user_id: {1}".format(number_of_views, user_id))
+            page_views_summary.append({"user_id": user_id, "page_views": number_of_views})
+
+    # with the JSON Lines option the page views of all users are written to a single file as they arrive
+    # otherwise the page views of each user are output to a sheet of the spreadsheet
+    if options.jsonl_filename:
+        canvas_client.write_json_lines(page_views_of_all_users(), options.jsonl_filename)
+        users_for_sheets=[]
+    else:
+        users_for_sheets=user_ids
 
+    for user_id in users_for_sheets:
         page_views=get_page_views(user_id, start_date, end_date)
         if not page_views:
             print("no page views by user: {}".format(user_id))
@@ -259,6 +268,10 @@ def main():
         page_views_summary_df.to_excel(writer, sheet_name='Summary')
 
 
+    if options.jsonl_filename:
+        page_views_summary_df=pd.json_normalize(page_views_summary)
+        page_views_summary_df.to_excel(writer, sheet_name='Summary')
+
     # Close the Pandas Excel writer and output the Excel file.
     writer.save()
 
@@ -0,0 +1,1125 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# -*- mode: python; python-indent-offset: 4 -*-
+#
+# ./mock_canvas_server.py [--port PORT] [--students N] [--latency MS]
+#
+# A local stand-in for a Canvas server, so that the programs in this directory can be run and
+# benchmarked without touching a production Canvas instance. It implements (a simplified form of)
+# the endpoints that the programs use for a single synthetic course:
+#   enrollments, sections, assignments, submissions (including update_grades and the multiple
+#   student listing, with submitted_since and graded_since), custom_gradebook_columns (including
+#   the column data and the bulk data endpoint), pages, page_views, gradebook_history/feed (newest
+#   first), groups and group categories, calendar_events, content_migrations, users (self,
+#   profile, and custom_data), courses, accounts, modules, and progress
+# and POST /api/graphql for the queries made by canvas_graphql.py
+#
+# Lists are paginated in the same way as Canvas does it: the per_page parameter (default 10,
+# maximum 100) and page=N, with a Link header giving the current, next, prev, first, and last pages.
+# Each response carries ETag, X-Request-Cost, and X-Rate-Limit-Remaining headers and a GET with a
+# matching If-None-Match gets a 304 response.
+#
+# Any course id refers to the same synthetic course. The data are generated deterministically from
+# the number of students (--students, for example 10, 1000, or 20000) and writes (PUT/POST/DELETE)
+# are kept in memory for the lifetime of the server.
+#
+# The server records the number of calls and the number of bytes returned per endpoint template
+# (e.g., /courses/:id/assignments/:id/submissions/:id). These statistics are returned by GET /__stats
+# and reset by POST /__reset; see benchmark_scripts.py
+#
+# To run a program against the server, use a configuration file such as:
+# {
+#     "canvas":{
+#         "access_token": "mock",
+#         "host": "127.0.0.1:8000"
+#     },
+#     "client":{
+#         "http_only": 1
+#     }
+# }
+#
+# Example:
+# ./mock_canvas_server.py --students 1000 --latency 50
+#
+# 2026.10.18
+#
+
+import optparse
+import sys
+import json
+import re
+import time
+import hashlib
+import threading
+import itertools
+import datetime
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+default_per_page=10
+max_per_page=100
+
+course_codes=['II122X', 'II142X', 'II225X', 'II246X']
+students_per_section=50
+students_per_group=4
+views_per_user=25
+
+# names of the assignments, the first ones are those used by II2210-grades_to_report.py
+assignment_definitions=[
+    ('Ethical Research (with quiz)', 'points', 10),
+    ('Professionalism and Ethics for ICT students (with quiz)', 'points', 10),
+    ('Ethical Research: Human Subjects and Computer Issues (with quiz)', 'points', 10),
+    ('Sustainable Development/Hållbar Utveckling (with quiz)', 'points', 10),
+    ('LADOK - PRO1 (Onlinequiz)', 'pass_fail', 0),
+    ('Written opposition: before final seminar - with peer review', 'pass_fail', 0),
+    ('Final report', 'letter_grade', 0),
+    ('Course code', 'letter_grade', 0),
+    ('Examiner', 'letter_grade', 0),
+    ('Status', 'points', 100),
+]
+
+column_titles=['Notes', 'Program', 'Group', 'Examiner', 'title']
+
+base_time=datetime.datetime(2021, 1, 11, 8, 0, 0, tzinfo=datetime.timezone.utc)
+
+def iso(t):
+    return t.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def parse_iso(s):
+    t=datetime.datetime.fromisoformat(s.replace('Z', '+00:00'))
+    if t.tzinfo is None:
+        t=t.replace(tzinfo=datetime.timezone.utc)
+    return t
+
+# a deterministic pseudo random integer in [0, n) for the given values
+def choose(n, *values):
+    h=hashlib.md5(repr(values).encode('utf-8')).digest()
+    return int.from_bytes(h[0:4], 'big') % n
+
+# Synthetic data
+data_lock=threading.Lock()
+
+def generate_data(number_of_students):
+    d=dict()
+    d['number_of_students']=number_of_students
+    number_of_teachers=min(20, max(2, number_of_students // 100))
+
+    d['users']=dict()
+    d['teachers']=[]
+    for i in range(number_of_teachers):
+        u={'id': 100+i,
+           'name': "Teacher {}".format(i),
+           'sortable_name': "{0:02d}, Teacher".format(i),
+           'short_name': "Teacher {}".format(i),
+           'login_id': "t{}@example.com".format(i),
+           'sis_user_id': "t{0:05d}".format(i),
+           'integration_id': None,
+           }
+        d['users'][u['id']]=u
+        d['teachers'].append(u['id'])
+
+    d['students']=[]
+    for i in range(number_of_students):
+        u={'id': 10000+i,
+           'name': "Student {}".format(i),
+           'sortable_name': "{0:05d}, Student".format(i),
+           'short_name': "Student {}".format(i),
+           'login_id': "s{}@example.com".format(i),
+           'sis_user_id': "u1{0:05d}".format(i),
+           'integration_id': None,
+           }
+        d['users'][u['id']]=u
+        d['students'].append(u['id'])
+
+    number_of_sections=max(1, (number_of_students+students_per_section-1) // students_per_section)
+    d['sections']=[]
+    for k in range(number_of_sections):
+        code=course_codes[k % len(course_codes)]
+        d['sections'].append({'id': 2000+k,
+                              'name': "Section {0} {1}".format(k, code),
+                              'sis_section_id': "{0}VT21{1}".format(code, k),
+                              'course_id': 1,
+                              'start_at': None,
+                              'end_at': None,
+                              'integration_id': None,
+                              'nonxlist_course_id': None,
+                              'sis_course_id': None,
+                              'sis_import_id': None,
+                              })
+
+    d['enrollments']=[]
+    enrollment_id=itertools.count(50000)
+    for t in d['teachers']:
+        d['enrollments'].append(make_enrollment(d, next(enrollment_id), t, d['sections'][0], 'TeacherEnrollment'))
+    for i, s in enumerate(d['students']):
+        d['enrollments'].append(make_enrollment(d, next(enrollment_id), s, d['sections'][i // students_per_section], 'StudentEnrollment'))
+    d['next_enrollment_id']=enrollment_id
+
+    d['assignments']=[]
+    for k, (name, grading_type, points) in enumerate(assignment_definitions):
+        d['assignments'].append({'id': 3000+k,
+                                 'name': name,
+                                 'course_id': 1,
+                                 'points_possible': points,
+                                 'grading_type': grading_type,
+                                 'grading_standard_id': None,
+                                 'due_at': iso(base_time+datetime.timedelta(weeks=k+1)),
+                                 'allowed_attempts': -1,
+                                 'submission_types': ['online_text_entry'],
+                                 'published': True,
+                                 'needs_grading_count': 0,
+                                 })
+
+    d['columns']=[]
+    for k, title in enumerate(column_titles):
+        d['columns'].append({'id': 4000+k, 'title': title, 'position': k+1,
+                             'hidden': False, 'read_only': False, 'teacher_notes': False})
+    d['column_data']=dict()             # {column_id: {user_id: content}}
+    for c in d['columns']:
+        d['column_data'][c['id']]=dict()
+    for i, s in enumerate(d['students']):
+        d['column_data'][4001][s]=['CINTE', 'TCOMK', 'TIVNM'][i % 3]
+        d['column_data'][4004][s]="Thesis proposal {}".format(i // students_per_group)
+
+    d['groups']=[]
+    d['group_members']=dict()
+    for g in range((number_of_students+students_per_group-1) // students_per_group):
+        members=d['students'][g*students_per_group:(g+1)*students_per_group]
+        d['groups'].append({'id': 6000+g,
+                            'name': "Project group {}".format(g),
+                            'group_category_id': 7000,
+                            'members_count': len(members),
+                            'course_id': 1,
+                            })
+        d['group_members'][6000+g]=members
+    d['group_categories']=[{'id': 7000, 'name': 'Project Groups', 'course_id': 1}]
+
+    d['pages']=[]
+    for k in range(30):
+        d['pages'].append({'page_id': 8000+k,
+                           'url': "page-{}".format(k),
+                           'title': "Page {}".format(k),
+                           'created_at': iso(base_time),
+                           'updated_at': iso(base_time+datetime.timedelta(days=k)),
+                           'published': True,
+                           'front_page': k == 0,
+                           'body': "<p>This is page {0}.</p>{1}".format(k, "<p>Some text.</p>"*k),
+                           })
+
+    d['modules']=[]
+    for k in range(5):
+        d['modules'].append({'id': 9000+k, 'name': "Module {}".format(k), 'position': k+1,
+                             'items_count': 3, 'published': True})
+
+    # one calendar event per 10 groups, each with a child event per group booked in it
+    d['calendar_events']=[]
+    for e in range((len(d['groups'])+9) // 10):
+        start=base_time+datetime.timedelta(days=30+e)
+        child_events=[]
+        for j, g in enumerate(d['groups'][e*10:(e+1)*10]):
+            if j % 2 == 0:
+                context_code="group_{}".format(g['id'])
+            else:
+                context_code="user_{}".format(d['group_members'][g['id']][0])
+            child_events.append({'id': 11000+e*10+j,
+                                 'start_at': iso(start+datetime.timedelta(minutes=45*j)),
+                                 'end_at': iso(start+datetime.timedelta(minutes=45*j+40)),
+                                 'context_code': context_code,
+                                 })
+        d['calendar_events'].append({'id': 10000+e,
+                                     'title': "Final seminar {}".format(e),
+                                     'start_at': iso(start),
+                                     'end_at': iso(start+datetime.timedelta(hours=8)),
+                                     'context_code': 'course_1',
+                                     'child_events': child_events,
+                                     'child_events_count': len(child_events),
+                                     })
+
+    d['submission_changes']=dict()      # {(assignment_id, user_id): dict of changed fields}
+    d['submission_comments']=dict()     # {(assignment_id, user_id): list of comments}
+    d['custom_data']=dict()             # {(user_id, scope): data}
+    d['content_migrations']=[]
+    d['progress']=dict()
+    d['next_id']=itertools.count(100000)
+    return d
+
+def make_enrollment(d, enrollment_id, user_id, section, enrollment_type):
+    u=d['users'][user_id]
+    return {'id': enrollment_id,
+            'user_id': user_id,
+            'course_id': 1,
+            'type': enrollment_type,
+            'role': enrollment_type,
+            'role_id': 3 if enrollment_type == 'StudentEnrollment' else 4,
+            'enrollment_state': 'active',
+            'course_section_id': section['id'],
+            'sis_section_id': section['sis_section_id'],
+            'sis_user_id': u['sis_user_id'],
+            'section_integration_id': None,
+            'course_integration_id': None,
+            'associated_user_id': None,
+            'created_at': iso(base_time),
+            'updated_at': iso(base_time),
+            'start_at': None,
+            'end_at': None,
+            'sis_course_id': None,
+            'sis_account_id': None,
+            'root_account_id': 1,
+            'limit_privileges_to_course_section': False,
+            'last_activity_at': None,
+            'last_attended_at': None,
+            'total_activity_time': 0,
+            'html_url': "https://canvas.example.com/courses/1/users/{}".format(user_id),
+            'grades': {'html_url': "https://canvas.example.com/courses/1/grades/{}".format(user_id),
+                       'current_grade': None, 'current_score': None, 'final_grade': None, 'final_score': None,
+                       'unposted_current_grade': None, 'unposted_current_score': None,
+                       'unposted_final_grade': None, 'unposted_final_score': None},
+            'user': {'id': user_id,
+                     'created_at': iso(base_time),
+                     'name': u['name'],
+                     'sortable_name': u['sortable_name'],
+                     'short_name': u['short_name'],
+                     'login_id': u['login_id'],
+                     'sis_user_id': u['sis_user_id'],
+                     'integration_id': None,
+                     },
+            }
+
+def assignment_by_id(d, assignment_id):
+    for a in d['assignments']:
+        if a['id'] == assignment_id:
+            return a
+    return None
+
+# the submission of a student for an assignment - generated from the ids, plus any changes made
+def submission(d, assignment_id, user_id):
+    a=assignment_by_id(d, assignment_id)
+    state=['graded', 'graded', 'graded', 'submitted', 'unsubmitted'][choose(5, assignment_id, user_id)]
+    score=None
+    grade=None
+    if state == 'graded':
+        if a['grading_type'] == 'points':
+            score=float(a['points_possible'] - choose(3, 'score', assignment_id, user_id))
+            grade=str(score)
+        elif a['grading_type'] == 'pass_fail':
+            grade='complete'
+        elif a['name'] == 'Course code':
+            grade=None
+            state='unsubmitted'
+        elif a['name'] == 'Examiner':
+            grade="{0:02d}, Teacher".format(choose(len(d['teachers']), 'examiner', user_id))
+        else:
+            grade='ABCDEF'[choose(6, 'grade', assignment_id, user_id)]
+    submitted_at=None
+    if state != 'unsubmitted':
+        submitted_at=iso(base_time+datetime.timedelta(weeks=1, hours=choose(24*14, 'submitted', assignment_id, user_id)))
+    s={'id': assignment_id*100000+user_id,
+       'assignment_id': assignment_id,
+       'user_id': user_id,
+       'workflow_state': state,
+       'score': score,
+       'grade': grade,
+       'entered_score': score,
+       'entered_grade': grade,
+       'grader_id': d['teachers'][0] if state == 'graded' else None,
+       'graded_at': submitted_at if state == 'graded' else None,
+       'submitted_at': submitted_at,
+       'attempt': 1 if submitted_at else None,
+       'excused': False,
+       'late': False,
+       'missing': False,
+       'body': "<p>Answer by student {0} to assignment {1}</p>".format(user_id, assignment_id) if submitted_at else None,
+       }
+    s.update(d['submission_changes'].get((assignment_id, user_id), {}))
+    return s
+
+def set_grade(d, assignment_id, user_id, posted_grade, comment=None):
+    changes=d['submission_changes'].setdefault((assignment_id, user_id), {})
+    if posted_grade is not None:
+        try:
+            score=float(posted_grade)
+        except ValueError:
+            score=None
+        changes.update({'grade': posted_grade, 'entered_grade': posted_grade,
+                        'score': score, 'entered_score': score,
+                        'workflow_state': 'graded', 'grader_id': d['teachers'][0],
+                        'graded_at': iso(datetime.datetime.now(datetime.timezone.utc))})
+    if comment:
+        d['submission_comments'].setdefault((assignment_id, user_id), []).append(
+            {'id': next(d['next_id']), 'author_id': d['teachers'][0], 'comment': comment,
+             'created_at': iso(datetime.datetime.now(datetime.timezone.utc))})
+
+def submission_with_includes(d, assignment_id, user_id, query):
+    s=submission(d, assignment_id, user_id)
+    includes=query_list(query, 'include[]')
+    if 'submission_comments' in includes:
+        s['submission_comments']=d['submission_comments'].get((assignment_id, user_id), [])
+    if 'user' in includes:
+        u=d['users'][user_id]
+        s['user']={'id': user_id, 'name': u['name'], 'sortable_name': u['sortable_name']}
+    return s
+
+def page_view(d, user_id, i):
+    t=base_time+datetime.timedelta(minutes=37*i+choose(30, 'view', user_id, i))
+    return {'id': "{0}-{1}".format(user_id, i),
+            'url': "https://canvas.example.com/courses/1/pages/page-{}".format(i % 30),
+            'context_type': 'Course',
+            'asset_type': 'wiki_page',
+            'controller': 'wiki_pages',
+            'action': 'show',
+            'interaction_seconds': choose(300, 'seconds', user_id, i),
+            'created_at': iso(t),
+            'updated_at': iso(t),
+            'user_agent': 'Mozilla/5.0',
+            'participated': False,
+            'links': {'user': user_id, 'context': 1, 'asset': None, 'real_user': None, 'account': 1},
+            }
+
+# gradebook history entries for the graded submissions, built when first asked for
+def gradebook_feed(d):
+    if 'feed' not in d:
+        feed=[]
+        for a in d['assignments']:
+            for user_id in d['students']:
+                s=submission(d, a['id'], user_id)
+                if s['workflow_state'] != 'graded':
+                    continue
+                u=d['users'][user_id]
+                feed.append({'id': s['id'],
+                             'assignment_id': a['id'],
+                             'assignment_name': a['name'],
+                             'user_id': user_id,
+                             'user_name': u['name'],
+                             'attempt': s['attempt'],
+                             'submitted_at': s['submitted_at'],
+                             'graded_at': s['graded_at'],
+                             'grader_id': s['grader_id'],
+                             'entered_score': s['entered_score'],
+                             'entered_grade': s['entered_grade'],
+                             'grade': s['grade'],
+                             'score': s['score'],
+                             'current_grade': s['grade'],
+                             'current_graded_at': s['graded_at'],
+                             'workflow_state': 'graded',
+                             })
+        # as in Canvas, the most recent grading comes first
+        feed.sort(key=lambda e: e['graded_at'] or '', reverse=True)
+        d['feed']=feed
+    return d['feed']
+
+# a list whose entries are only computed when a page of it is returned, so that listing the
+# submissions of 20000 students does not compute all of them for each page
+class LazyList:
+    def __init__(self, length, entry):
+        self.length=length
+        self.entry=entry
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        return [self.entry(i) for i in range(*index.indices(self.length))]
+
+def query_list(query, name):
+    return [v for k, v in query if k == name]
+
+def query_value(query, name, default=None):
+    values=query_list(query, name)
+    if values:
+        return values[-1]
+    return default
+
+# the work is done at once, but the Progress is only reported as completed when it is next asked for,
+# so that the programs' polling is exercised
+def new_progress(d):
+    progress_id=next(d['next_id'])
+    p={'id': progress_id,
+       'workflow_state': 'queued',
+       'completion': 0,
+       'message': None,
+       'url': "/api/v1/progress/{}".format(progress_id),
+       }
+    d['progress'][progress_id]=p
+    return p
+
+# Statistics per endpoint template
+statistics=dict()
+statistics_lock=threading.Lock()
+
+def record(method, template, status, number_of_bytes):
+    key="{0} {1}".format(method, template)
+    with statistics_lock:
+        e=statistics.setdefault(key, {'calls': 0, 'bytes': 0, 'status': {}})
+        e['calls']=e['calls']+1
+        e['bytes']=e['bytes']+number_of_bytes
+        e['status'][str(status)]=e['status'].get(str(status), 0)+1
+
+def endpoint_template(path):
+    return re.sub(r'/(\d+|self|sis_user_id:[^/]*|page-\d+)(?=/|$)', '/:id', path)
+
+# Request handlers
+# each handler is called as handler(d, match, query, body) and returns (status, response) where
+# a response that is a list is paginated
+routes=[]
+
+def route(method, pattern):
+    def register(handler):
+        routes.append((method, re.compile('^'+pattern+'$'), handler))
+        return handler
+    return register
+
+@route('GET', r'/users/self')
+def get_self(d, m, query, body):
+    return 200, d['users'][d['teachers'][0]]
+
+@route('GET', r'/users/(\d+)')
+def get_user(d, m, query, body):
+    u=d['users'].get(int(m.group(1)))
+    return (200, u) if u else (404, {'errors': [{'message': 'The specified resource does not exist.'}]})
+
+@route('GET', r'/users/(\d+|self)/profile')
+def get_profile(d, m, query, body):
+    user_id=d['teachers'][0] if m.group(1) == 'self' else int(m.group(1))
+    u=d['users'].get(user_id)
+    if not u:
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    profile=dict(u)
+    profile['primary_email']=u['login_id']
+    profile['avatar_url']="https://canvas.example.com/images/messages/avatar-50.png"
+    return 200, profile
+
+@route('GET', r'/users/(\d+|self)/page_views')
+def get_page_views(d, m, query, body):
+    user_id=d['teachers'][0] if m.group(1) == 'self' else int(m.group(1))
+    return 200, [page_view(d, user_id, i) for i in range(views_per_user)]
+
+@route('GET', r'/users/(\d+)/custom_data(?:/(.*))?')
+def get_custom_data(d, m, query, body):
+    data=d['custom_data'].get((int(m.group(1)), m.group(2) or ''), None)
+    if data is None:
+        return 400, {'message': 'no data for scope'}
+    return 200, {'data': data}
+
+@route('PUT', r'/users/(\d+)/custom_data(?:/(.*))?')
+def put_custom_data(d, m, query, body):
+    data=query_value(body, 'data', '')
+    d['custom_data'][(int(m.group(1)), m.group(2) or '')]=data
+    return 200, {'data': data}
+
+@route('GET', r'/courses')
+def get_courses(d, m, query, body):
+    return 200, [get_course(d, None, query, body)[1]]
+
+@route('GET', r'/courses/(\d+)')
+def get_course(d, m, query, body):
+    return 200, {'id': 1, 'name': 'Mock course', 'course_code': 'II2202', 'workflow_state': 'available',
+                 'account_id': 1, 'enrollment_term_id': 1, 'start_at': iso(base_time), 'end_at': None,
+                 'enrollments': [{'type': 'teacher', 'role': 'TeacherEnrollment', 'user_id': d['teachers'][0]}]}
+
+@route('GET', r'/accounts')
+def get_accounts(d, m, query, body):
+    return 200, [{'id': 1, 'name': 'Mock account', 'parent_account_id': None, 'root_account_id': None}]
+
+@route('GET', r'/accounts/(\d+)/+sub_accounts')
+def get_sub_accounts(d, m, query, body):
+    return 200, []
+
+@route('GET', r'/accounts/(\d+)/users')
+def get_account_users(d, m, query, body):
+    return 200, [d['users'][u] for u in d['teachers']+d['students']]
+
+@route('GET', r'/accounts/(\d+)/courses')
+def get_account_courses(d, m, query, body):
+    return get_courses(d, m, query, body)
+
+@route('GET', r'/courses/(\d+)/(enrollments|users)')
+def get_enrollments(d, m, query, body):
+    types=query_list(query, 'type[]')+query_list(query, 'enrollment_type[]')+query_list(query, 'enrollment_type')
+    wanted=set()
+    for t in types:
+        t=t.lower()
+        for e_type in ['student', 'teacher', 'ta', 'observer', 'designer']:
+            if t.startswith(e_type):
+                wanted.add(e_type)
+    enrollments=[e for e in d['enrollments']
+                 if not wanted or e['type'].lower().replace('enrollment', '') in wanted]
+    if m.group(2) == 'users':
+        return 200, [d['users'][e['user_id']] for e in enrollments]
+    return 200, enrollments
+
+@route('POST', r'/sections/(\d+)/enrollments')
+def post_section_enrollment(d, m, query, body):
+    section=[s for s in d['sections'] if s['id'] == int(m.group(1))]
+    user_id=int(query_value(body, 'enrollment[user_id]'))
+    if not section or user_id not in d['users']:
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    e=make_enrollment(d, next(d['next_enrollment_id']), user_id, section[0],
+                      query_value(body, 'enrollment[type]', 'StudentEnrollment'))
+    d['enrollments'].append(e)
+    return 200, e
+
+@route('POST', r'/courses/(\d+)/enrollments')
+def post_course_enrollment(d, m, query, body):
+    section_id=query_value(body, 'enrollment[course_section_id]')
+    section=[s for s in d['sections'] if section_id and s['id'] == int(section_id)] or d['sections'][:1]
+    user_id=int(query_value(body, 'enrollment[user_id]'))
+    if user_id not in d['users']:
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    e=make_enrollment(d, next(d['next_enrollment_id']), user_id, section[0],
+                      query_value(body, 'enrollment[type]', 'StudentEnrollment'))
+    d['enrollments'].append(e)
+    return 200, e
+
+@route('GET', r'/sections/(\d+)/enrollments')
+def get_section_enrollments(d, m, query, body):
+    return 200, [e for e in d['enrollments'] if e['course_section_id'] == int(m.group(1))]
+
+@route('GET', r'/courses/(\d+)/sections')
+def get_sections(d, m, query, body):
+    return 200, d['sections']
+
+@route('POST', r'/courses/(\d+)/sections')
+def post_section(d, m, query, body):
+    s={'id': next(d['next_id']), 'name': query_value(body, 'course_section[name]', ''),
+       'sis_section_id': None, 'course_id': 1, 'start_at': None, 'end_at': None,
+       'integration_id': None, 'nonxlist_course_id': None}
+    d['sections'].append(s)
+    return 200, s
+
+@route('DELETE', r'/sections/(\d+)')
+def delete_section(d, m, query, body):
+    for s in d['sections']:
+        if s['id'] == int(m.group(1)):
+            d['sections'].remove(s)
+            return 200, s
+    return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+
+@route('GET', r'/courses/(\d+)/assignments')
+def get_assignments(d, m, query, body):
+    return 200, d['assignments']
+
+@route('GET', r'/courses/(\d+)/assignments/(\d+)')
+def get_assignment(d, m, query, body):
+    a=assignment_by_id(d, int(m.group(2)))
+    return (200, a) if a else (404, {'errors': [{'message': 'The specified resource does not exist.'}]})
+
+@route('POST', r'/courses/(\d+)/assignments')
+def post_assignment(d, m, query, body):
+    a={'id': next(d['next_id']),
+       'name': query_value(body, 'assignment[name]', ''),
+       'course_id': 1,
+       'points_possible': float(query_value(body, 'assignment[points_possible]', 0) or 0),
+       'grading_type': query_value(body, 'assignment[grading_type]', 'points'),
+       'grading_standard_id': None,
+       'due_at': None,
+       'allowed_attempts': -1,
+       'submission_types': [query_value(body, 'assignment[submission_types][]', 'none')],
+       'published': True,
+       'needs_grading_count': 0,
+       }
+    d['assignments'].append(a)
+    return 200, a
+
+@route('GET', r'/courses/(\d+)/assignments/(\d+)/submissions')
+def get_submissions(d, m, query, body):
+    assignment_id=int(m.group(2))
+    if not assignment_by_id(d, assignment_id):
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    students=d['students']
+    return 200, LazyList(len(students), lambda i: submission_with_includes(d, assignment_id, students[i], query))
+
+@route('GET', r'/courses/(\d+)/students/submissions')
+def get_students_submissions(d, m, query, body):
+    assignment_ids=[int(a) for a in query_list(query, 'assignment_ids[]')] or [a['id'] for a in d['assignments']]
+    student_ids=query_list(query, 'student_ids[]')
+    if not student_ids or 'all' in student_ids:
+        students=d['students']
+    else:
+        students=[int(s) for s in student_ids]
+    submitted_since=query_value(query, 'submitted_since')
+    graded_since=query_value(query, 'graded_since')
+    if submitted_since or graded_since:
+        since=lambda t, limit: t is not None and parse_iso(t) >= parse_iso(limit)
+        return 200, [s for s in (submission_with_includes(d, a, u, query) for u in students for a in assignment_ids)
+                     if (submitted_since and since(s['submitted_at'], submitted_since)) or
+                        (graded_since and since(s['graded_at'], graded_since))]
+    return 200, LazyList(len(students)*len(assignment_ids),
+                         lambda i: submission_with_includes(d, assignment_ids[i % len(assignment_ids)], students[i // len(assignment_ids)], query))
+
+@route('GET', r'/courses/(\d+)/assignments/(\d+)/submissions/(\d+)')
+def get_submission(d, m, query, body):
+    assignment_id=int(m.group(2))
+    user_id=int(m.group(3))
+    if not assignment_by_id(d, assignment_id) or user_id not in d['users']:
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    return 200, submission_with_includes(d, assignment_id, user_id, query+body)
+
+@route('PUT', r'/courses/(\d+)/assignments/(\d+)/submissions/(\d+)')
+def put_submission(d, m, query, body):
+    assignment_id=int(m.group(2))
+    user_id=int(m.group(3))
+    if not assignment_by_id(d, assignment_id) or user_id not in d['users']:
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    set_grade(d, assignment_id, user_id, query_value(body, 'submission[posted_grade]'), query_value(body, 'comment[text_comment]'))
+    d.pop('feed', None)
+    return 200, submission(d, assignment_id, user_id)
+
+@route('POST', r'/courses/(\d+)/assignments/(\d+)/submissions/update_grades')
+def post_update_grades(d, m, query, body):
+    assignment_id=int(m.group(2))
+    if not assignment_by_id(d, assignment_id):
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    updates=dict()
+    for k, v in body:
+        match=re.match(r'grade_data\[(\d+)\]\[(posted_grade|text_comment)\]', k)
+        if match:
+            updates.setdefault(int(match.group(1)), {})[match.group(2)]=v
+    for user_id, u in updates.items():
+        set_grade(d, assignment_id, user_id, u.get('posted_grade'), u.get('text_comment'))
+    d.pop('feed', None)
+    return 200, new_progress(d)
+
+@route('GET', r'/courses/(\d+)/assignments/(\d+)/peer_reviews')
+def get_peer_reviews(d, m, query, body):
+    students=d['students']
+    reviews=[]
+    for i, user_id in enumerate(students):
+        if len(students) > 1:
+            reviews.append({'id': next(d['next_id']), 'user_id': user_id,
+                            'assessor_id': students[(i+students_per_group) % len(students)],
+                            'asset_id': int(m.group(2))*100000+user_id, 'asset_type': 'Submission',
+                            'workflow_state': 'assigned'})
+    return 200, reviews
+
+@route('GET', r'/courses/(\d+)/gradebook_history/feed')
+def get_gradebook_feed(d, m, query, body):
+    feed=gradebook_feed(d)
+    user_id=query_value(query, 'user_id')
+    assignment_id=query_value(query, 'assignment_id')
+    if user_id:
+        feed=[e for e in feed if e['user_id'] == int(user_id)]
+    if assignment_id:
+        feed=[e for e in feed if e['assignment_id'] == int(assignment_id)]
+    return 200, feed
+
+@route('GET', r'/courses/(\d+)/custom_gradebook_columns')
+def get_columns(d, m, query, body):
+    return 200, d['columns']
+
+@route('POST', r'/courses/(\d+)/custom_gradebook_columns')
+def post_column(d, m, query, body):
+    c={'id': next(d['next_id']), 'title': query_value(body, 'column[title]', ''),
+       'position': len(d['columns'])+1, 'hidden': False, 'read_only': False, 'teacher_notes': False}
+    d['columns'].append(c)
+    d['column_data'][c['id']]=dict()
+    return 200, c
+
+@route('PUT', r'/courses/(\d+)/custom_gradebook_columns/(\d+)')
+def put_column(d, m, query, body):
+    for c in d['columns']:
+        if c['id'] == int(m.group(2)):
+            for k, v in body:
+                match=re.match(r'column\[(\w+)\]', k)
+                if match:
+                    c[match.group(1)]=v
+            return 200, c
+    return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+
+@route('DELETE', r'/courses/(\d+)/custom_gradebook_columns/(\d+)')
+def delete_column(d, m, query, body):
+    for c in d['columns']:
+        if c['id'] == int(m.group(2)):
+            d['columns'].remove(c)
+            d['column_data'].pop(c['id'], None)
+            return 200, c
+    return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+
+@route('GET', r'/courses/(\d+)/custom_gradebook_columns/(\d+)/data')
+def get_column_data(d, m, query, body):
+    data=d['column_data'].get(int(m.group(2)))
+    if data is None:
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    return 200, [{'user_id': u, 'content': c} for u, c in sorted(data.items())]
+
+@route('PUT', r'/courses/(\d+)/custom_gradebook_columns/(\d+)/data/(\d+)')
+def put_column_data(d, m, query, body):
+    data=d['column_data'].get(int(m.group(2)))
+    if data is None:
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    content=query_value(body, 'column_data[content]', '')
+    data[int(m.group(3))]=content
+    return 200, {'user_id': int(m.group(3)), 'content': content}
+
+@route('PUT', r'/courses/(\d+)/custom_gradebook_columns/data')
+def put_column_data_bulk(d, m, query, body):
+    if isinstance(body, dict):
+        entries=body.get('column_data', [])
+    else:
+        # form encoded: column_data[][column_id]=...&column_data[][user_id]=...&column_data[][content]=...
+        entries=[]
+        for k, v in body:
+            match=re.match(r'column_data\[\]\[(\w+)\]', k)
+            if match:
+                if not entries or match.group(1) in entries[-1]:
+                    entries.append({})
+                entries[-1][match.group(1)]=v
+    for e in entries:
+        data=d['column_data'].get(int(e['column_id']))
+        if data is not None:
+            data[int(e['user_id'])]=e.get('content', '')
+    return 200, new_progress(d)
+
+@route('GET', r'/progress/(\d+)')
+def get_progress(d, m, query, body):
+    p=d['progress'].get(int(m.group(1)))
+    if not p:
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    p.update({'workflow_state': 'completed', 'completion': 100})
+    return 200, p
+
+@route('GET', r'/courses/(\d+)/pages')
+def get_pages(d, m, query, body):
+    return 200, [{k: v for k, v in p.items() if k != 'body'} for p in d['pages']]
+
+@route('GET', r'/courses/(\d+)/pages/([^/]+)')
+def get_page(d, m, query, body):
+    for p in d['pages']:
+        if p['url'] == m.group(2) or str(p['page_id']) == m.group(2):
+            return 200, p
+    return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+
+@route('GET', r'/courses/(\d+)/front_page')
+def get_front_page(d, m, query, body):
+    return 200, d['pages'][0]
+
+@route('GET', r'/courses/(\d+)/modules')
+def get_modules(d, m, query, body):
+    return 200, d['modules']
+
+@route('GET', r'/courses/(\d+)/modules/(\d+)/items')
+def get_module_items(d, m, query, body):
+    module_id=int(m.group(2))
+    return 200, [{'id': module_id*10+k, 'module_id': module_id, 'position': k+1, 'title': "Item {}".format(k),
+                  'type': 'Page', 'page_url': "page-{}".format(k), 'indent': 0, 'published': True}
+                 for k in range(3)]
+
+@route('GET', r'/courses/(\d+)/groups')
+def get_groups(d, m, query, body):
+    return 200, d['groups']
+
+@route('GET', r'/courses/(\d+)/group_categories')
+def get_group_categories(d, m, query, body):
+    return 200, d['group_categories']
+
+@route('GET', r'/group_categories/(\d+)/groups')
+def get_category_groups(d, m, query, body):
+    return 200, [g for g in d['groups'] if g['group_category_id'] == int(m.group(1))]
+
+@route('GET', r'/groups/(\d+)/users')
+def get_group_users(d, m, query, body):
+    members=d['group_members'].get(int(m.group(1)))
+    if members is None:
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    return 200, [d['users'][u] for u in members]
+
+@route('GET', r'/groups/(\d+)/memberships')
+def get_group_memberships(d, m, query, body):
+    group_id=int(m.group(1))
+    members=d['group_members'].get(group_id)
+    if members is None:
+        return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+    return 200, [{'id': group_id*10+k, 'group_id': group_id, 'user_id': u, 'workflow_state': 'accepted'}
+                 for k, u in enumerate(members)]
+
+@route('GET', r'/calendar_events')
+def get_calendar_events(d, m, query, body):
+    return 200, d['calendar_events']
+
+@route('GET', r'/calendar_events/(\d+)')
+def get_calendar_event(d, m, query, body):
+    for e in d['calendar_events']:
+        if e['id'] == int(m.group(1)):
+            return 200, e
+    return 404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+
+@route('POST', r'/calendar_events')
+def post_calendar_event(d, m, query, body):
+    e={'id': next(d['next_id']), 'title': query_value(body, 'calendar_event[title]', ''),
+       'start_at': query_value(body, 'calendar_event[start_at]'), 'end_at': query_value(body, 'calendar_event[end_at]'),
+       'context_code': query_value(body, 'calendar_event[context_code]'), 'child_events': [], 'child_events_count': 0}
+    d['calendar_events'].append(e)
+    return 200, e
+
+@route('GET', r'/courses/(\d+)/content_migrations')
+def get_content_migrations(d, m, query, body):
+    return 200, d['content_migrations']
+
+@route('POST', r'/courses/(\d+)/content_migrations')
+def post_content_migration(d, m, query, body):
+    p=new_progress(d)
+    c={'id': next(d['next_id']), 'migration_type': query_value(body, 'migration_type'),
+       'workflow_state': 'completed', 'progress_url': p['url'], 'migration_issues_count': 0}
+    d['content_migrations'].append(c)
+    return 200, c
+
+@route('GET', r'/courses/(\d+)/content_migrations/(\d+)/migration_issues')
+def get_migration_issues(d, m, query, body):
+    return 200, []
+
+# GraphQL - the queries of canvas_graphql.py are recognized by their operation name rather than
+# parsed, and the connections are paginated with cursors that are the offsets of the next node
+def graphql_connection(entries, variables, node):
+    first=min(max_per_page, int(variables.get('first') or max_per_page))
+    offset=int(variables.get('after') or 0)
+    page=entries[offset:offset+first]
+    return {'nodes': [node(e) for e in page],
+            'pageInfo': {'hasNextPage': offset+len(page) < len(entries),
+                         'endCursor': str(offset+len(page))}}
+
+def graphql_enrollment(d, e, avatars):
+    u=e['user']
+    user={'_id': str(u['id']), 'name': u['name'], 'sortableName': u['sortable_name'],
+          'shortName': u['short_name'], 'sisId': u['sis_user_id'], 'loginId': u['login_id'],
+          'integrationId': u['integration_id'], 'createdAt': u['created_at']}
+    if avatars:
+        user['avatarUrl']="https://canvas.example.com/images/messages/avatar-50.png"
+    g=e['grades']
+    return {'_id': str(e['id']), 'type': e['type'], 'state': e['enrollment_state'],
+            'createdAt': e['created_at'], 'updatedAt': e['updated_at'],
+            'startAt': e['start_at'], 'endAt': e['end_at'],
+            'lastActivityAt': e['last_activity_at'], 'totalActivityTime': e['total_activity_time'],
+            'limitPrivilegesToCourseSection': e['limit_privileges_to_course_section'],
+            'htmlUrl': e['html_url'], 'associatedUser': None,
+            'section': {'_id': str(e['course_section_id']), 'sisId': e['sis_section_id']},
+            'grades': {'htmlUrl': g['html_url'],
+                       'currentGrade': g['current_grade'], 'currentScore': g['current_score'],
+                       'finalGrade': g['final_grade'], 'finalScore': g['final_score'],
+                       'unpostedCurrentGrade': g['unposted_current_grade'],
+                       'unpostedCurrentScore': g['unposted_current_score'],
+                       'unpostedFinalGrade': g['unposted_final_grade'],
+                       'unpostedFinalScore': g['unposted_final_score']},
+            'user': user}
+
+def graphql_submission(d, s):
+    a=assignment_by_id(d, s['assignment_id'])
+    u=d['users'][s['user_id']]
+    return {'_id': str(s['id']), 'attempt': s['attempt'], 'state': s['workflow_state'],
+            'score': s['score'], 'grade': s['grade'],
+            'enteredScore': s['entered_score'], 'enteredGrade': s['entered_grade'],
+            'submittedAt': s['submitted_at'], 'gradedAt': s['graded_at'],
+            'late': s['late'], 'missing': s['missing'], 'excused': s['excused'],
+            'assignment': {'_id': str(a['id']), 'name': a['name']},
+            'user': {'_id': str(u['id']), 'name': u['name'], 'sortableName': u['sortable_name']}}
+
+@route('POST', r'/api/graphql')
+def post_graphql(d, m, query, body):
+    if not isinstance(body, dict):
+        return 400, {'errors': [{'message': 'expected a JSON body'}]}
+    operation=re.search(r'query\s+(\w+)', body.get('query', ''))
+    variables=body.get('variables') or {}
+    operation=operation.group(1) if operation else None
+
+    course={'_id': '1', 'sisId': None}
+    if operation == 'CourseEnrollments':
+        avatars=variables.get('avatars', False)
+        course['enrollmentsConnection']=graphql_connection(d['enrollments'], variables,
+                                                           lambda e: graphql_enrollment(d, e, avatars))
+    elif operation == 'CourseSections':
+        course['sectionsConnection']=graphql_connection(d['sections'], variables,
+                                                        lambda s: {'_id': str(s['id']), 'name': s['name'],
+                                                                   'sisId': s['sis_section_id'],
+                                                                   'integrationId': s['integration_id'],
+                                                                   'startAt': s['start_at'], 'endAt': s['end_at']})
+    elif operation == 'CourseSubmissions':
+        students=d['students']
+        submissions=LazyList(len(d['assignments'])*len(students),
+                             lambda i: submission(d, d['assignments'][i // len(students)]['id'], students[i % len(students)]))
+        course['submissionsConnection']=graphql_connection(submissions, variables, lambda s: graphql_submission(d, s))
+    else:
+        return 200, {'errors': [{'message': "unsupported operation {}".format(operation)}]}
+    return 200, {'data': {'course': course}}
+
+class MockCanvasHandler(BaseHTTPRequestHandler):
+    protocol_version='HTTP/1.1'         # keep-alive, as Canvas does
+    disable_nagle_algorithm=True        # otherwise each response on a kept-alive connection waits for a delayed ACK
+    wbufsize=64*1024                    # send the headers and the body together
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def read_body(self):
+        length=int(self.headers.get('Content-Length', 0) or 0)
+        raw=self.rfile.read(length) if length else b''
+        if 'json' in self.headers.get('Content-Type', ''):
+            try:
+                return json.loads(raw.decode('utf-8') or '{}')
+            except ValueError:
+                return {}
+        return parse_qsl(raw.decode('utf-8'), keep_blank_values=True)
+
+    def send(self, status, body_bytes, extra_headers=[]):
+        self.send_response(status)
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.send_header('X-Request-Cost', '1.0')
+        self.send_header('X-Rate-Limit-Remaining', '700.0')
+        self.send_header('Content-Length', str(len(body_bytes)))
+        self.end_headers()
+        if body_bytes:
+            self.wfile.write(body_bytes)
+
+    def handle_method(self, method):
+        parts=urlsplit(self.path)
+        path=parts.path
+        query=parse_qsl(parts.query, keep_blank_values=True)
+
+        if path == '/__stats' and method == 'GET':
+            with statistics_lock:
+                body=json.dumps(statistics).encode('utf-8')
+            self.send(200, body, [('Content-Type', 'application/json')])
+            return
+        if path == '/__reset' and method == 'POST':
+            self.read_body()
+            with statistics_lock:
+                statistics.clear()
+            self.send(200, b'{}', [('Content-Type', 'application/json')])
+            return
+
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+
+        # the body must always be read, as some programs send form data with a GET
+        body=self.read_body()
+        if method == 'GET':
+            if not isinstance(body, dict):
+                query=query+body
+            body=[]
+        elif not isinstance(body, dict):
+            body=body+query
+
+        if path.startswith('/api/v1'):
+            path=path[len('/api/v1'):]
+        path=path.rstrip('/') or '/'
+        template=endpoint_template(path)
+
+        for route_method, pattern, handler in routes:
+            if route_method != method:
+                continue
+            m=pattern.match(path)
+            if m:
+                with data_lock:
+                    status, response=handler(self.server.data, m, query, body)
+                break
+        else:
+            status, response=404, {'errors': [{'message': 'The specified resource does not exist.'}]}
+
+        headers=[('Content-Type', 'application/json; charset=utf-8')]
+        if isinstance(response, (list, LazyList)):
+            response, link=paginate(self, parts, query, response)
+            if link:
+                headers.append(('Link', link))
+
+        body_bytes=json.dumps(response).encode('utf-8')
+        if method == 'GET' and status == 200:
+            etag='W/"{}"'.format(hashlib.md5(body_bytes).hexdigest())
+            headers.append(('ETag', etag))
+            if self.headers.get('If-None-Match') == etag:
+                record(method, template, 304, 0)
+                self.send(304, b'', [('ETag', etag)])
+                return
+
+        record(method, template, status, len(body_bytes))
+        self.send(status, body_bytes, headers)
+
+    def do_GET(self):
+        self.handle_method('GET')
+
+    def do_PUT(self):
+        self.handle_method('PUT')
+
+    def do_POST(self):
+        self.handle_method('POST')
+
+    def do_DELETE(self):
+        self.handle_method('DELETE')
+
+# return the requested page of entries and the Link header for it
+def paginate(handler, parts, query, entries):
+    try:
+        per_page=min(max_per_page, max(1, int(query_value(query, 'per_page', default_per_page))))
+    except ValueError:
+        per_page=default_per_page
+    try:
+        page=max(1, int(query_value(query, 'page', 1)))
+    except ValueError:
+        page=1
+    last_page=max(1, (len(entries)+per_page-1) // per_page)
+
+    base="http://{0}{1}".format(handler.headers.get('Host', 'localhost'), parts.path)
+    other_parameters=[(k, v) for k, v in query if k not in ['page', 'per_page']]
+    def page_url(n):
+        return "{0}?{1}".format(base, urlencode(other_parameters+[('page', n), ('per_page', per_page)]))
+
+    links=['<{}>; rel="current"'.format(page_url(page))]
+    if page < last_page:
+        links.append('<{}>; rel="next"'.format(page_url(page+1)))
+    if page > 1:
+        links.append('<{}>; rel="prev"'.format(page_url(page-1)))
+    links.append('<{}>; rel="first"'.format(page_url(1)))
+    links.append('<{}>; rel="last"'.format(page_url(last_page)))
+    return entries[(page-1)*per_page:page*per_page], ','.join(links)
+
+def start_server(port=0, number_of_students=10, latency=0.0, verbose=False):
+    server=ThreadingHTTPServer(('127.0.0.1', port), MockCanvasHandler)
+    server.daemon_threads=True
+    server.data=generate_data(number_of_students)
+    server.latency=latency
+    server.verbose=verbose
+    thread=threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main():
+    parser = optparse.OptionParser()
+
+    parser.add_option('-v', '--verbose',
+                      dest="verbose",
+                      default=False,
+                      action="store_true",
+                      help="log each request"
+    )
+
+    parser.add_option('-p', '--port',
+                      dest="port",
+                      default=8000,
+                      type="int",
+                      help="port to listen on"
+    )
+
+    parser.add_option('-s', '--students',
+                      dest="students",
+                      default=10,
+                      type="int",
+                      help="number of students in the synthetic course"
+    )
+
+    parser.add_option('-l', '--latency',
+                      dest="latency",
+                      default=0,
+                      type="float",
+                      help="added latency of each request in milliseconds"
+    )
+
+    options, remainder = parser.parse_args()
+
+    server=start_server(options.port, options.students, options.latency/1000.0, options.verbose)
+    print("mock Canvas server with {0} students listening on http://127.0.0.1:{1}/api/v1".format(options.students, server.server_port))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__": main()
@@ -24,6 +24,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -52,6 +53,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -79,7 +81,7 @@ def list_features_for_course(course_id):
     if Verbose_Flag:
         print("url: " + url)
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting list of features: {}".format(r.text))
 
@@ -97,7 +99,7 @@ def list_features_for_course(course_id):
         # i.e., when the response is split into pieces - each returning only some of the list of modules
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
         while r.links['current']['url'] != r.links['last']['url']:  
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             response = r.json()  
             for f_response in response:  
                 list_of_all_features.append(f_response)
@@ -112,7 +114,7 @@ def set_features_for_course(course_id, feature, state):
         print("url: {}".format(url))
 
     payload={'state': state }
-    r = requests.put(url, headers = header, json=payload)
+    r = canvas_client.put(url, headers = header, json=payload)
     if Verbose_Flag:
         print("result of setting feature: {}".format(r.text))
 
@@ -150,7 +152,10 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
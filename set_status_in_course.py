@@ -34,6 +34,7 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 import pprint
 import optparse
 import sys
@@ -62,6 +63,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -89,7 +91,7 @@ def put_user_custom_data_by_user_id(user_id, name_space, scope, data):
     payload={'ns': name_space,
              'data': data
     }
-    r = requests.put(url, headers = header, json=payload)
+    r = canvas_client.put(url, headers = header, json=payload)
     if Verbose_Flag:
         print("result of setting custom data: {}".format(r.text))
 
@@ -110,7 +112,7 @@ def get_user_custom_data_by_user_id(user_id, name_space, scope):
 
     payload={'ns': name_space }
 
-    r = requests.get(url, headers = header, json=payload)
+    r = canvas_client.get(url, headers = header, json=payload)
     if Verbose_Flag:
         print("result of getting custom data: {}".format(r.text))
 
@@ -151,7 +153,10 @@ def main():
 
 
     
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -23,6 +23,7 @@ import argparse
 import os			# to make OS calls, here to get time zone info
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
 
 # Use Python Pandas to create XLSX files
 import pandas as pd
@@ -65,6 +66,7 @@ def initialize(args):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
 
             if args["containers"]:
@@ -84,8 +86,6 @@ def initialize(args):
 def list_of_accounts():
     global Verbose_Flag
     global course_id
-    
-    entries_found_thus_far=[]
 
     # Use the Canvas API to get the list of accounts this user can see
     # GET /api/v1/accounts
@@ -94,35 +94,16 @@ def list_of_accounts():
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
-
+    # when Canvas returns a numeric "last" link the remaining pages are fetched concurrently
+    entries_found_thus_far=canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
     if Verbose_Flag:
-        print("result of getting accounts: {}".format(r.text))
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-
-        for p_response in page_response:  
-            entries_found_thus_far.append(p_response)
-
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
-            if Verbose_Flag:
-                print("result of getting accounts for a paginated response: {}".format(r.text))
-            page_response = r.json()  
-            for p_response in page_response:  
-                entries_found_thus_far.append(p_response)
+        print("result of getting accounts: {}".format(entries_found_thus_far))
 
     return entries_found_thus_far
 
 def list_of_subaccounts(account_id):
     global Verbose_Flag
     global course_id
-    
-    entries_found_thus_far=[]
 
     #Get the sub-accounts of an accountAccountsController#sub_accounts
     #GET /api/v1/accounts/:account_id/sub_accounts
@@ -131,36 +112,18 @@ def list_of_subaccounts(account_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
-
+    # when Canvas returns a numeric "last" link the remaining pages are fetched concurrently
+    entries_found_thus_far=canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
     if Verbose_Flag:
-        print("result of getting accounts: {}".format(r.text))
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-
-        for p_response in page_response:  
-            entries_found_thus_far.append(p_response)
-
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
-            if Verbose_Flag:
-                print("result of getting accounts for a paginated response: {}".format(r.text))
-            page_response = r.json()  
-            for p_response in page_response:  
-                entries_found_thus_far.append(p_response)
+        print("result of getting sub-accounts: {}".format(entries_found_thus_far))
 
     return entries_found_thus_far
 
 
+# yields the users page by page, as an account can have hundreds of thousands of users
 def users_in_account(account_id):
     global Verbose_Flag
     global course_id
-    
-    entries_found_thus_far=[]
 
     # Use the Canvas API to get the list of users known to the system
     # GET /api/v1/accounts/:account_id/users
@@ -169,36 +132,13 @@ def users_in_account(account_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
-
-    if Verbose_Flag:
-        print("result of getting gradebook feed: {}".format(r.text))
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-
-        for p_response in page_response:  
-            entries_found_thus_far.append(p_response)
-
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
-            if Verbose_Flag:
-                print("result of getting useers in an account for a paginated response: {}".format(r.text))
-            page_response = r.json()  
-            for p_response in page_response:  
-                entries_found_thus_far.append(p_response)
-
-    return entries_found_thus_far
+    # when Canvas returns a numeric "last" link the remaining pages are fetched concurrently
+    return canvas_client.iterate_pages(url, params=extra_parameters, headers=header)
 
 
 def courses_in_account(account_id):
     global Verbose_Flag
     global course_id
-    
-    entries_found_thus_far=[]
 
     #List active courses in an accountAccountsController#courses_api
     #GET /api/v1/accounts/:account_id/courses
@@ -207,33 +147,15 @@ def courses_in_account(account_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
-
+    # when Canvas returns a numeric "last" link the remaining pages are fetched concurrently
+    entries_found_thus_far=canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
     if Verbose_Flag:
-        print("result of getting gradebook feed: {}".format(r.text))
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-
-        for p_response in page_response:  
-            entries_found_thus_far.append(p_response)
-
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
-            if Verbose_Flag:
-                print("result of getting useers in an account for a paginated response: {}".format(r.text))
-            page_response = r.json()  
-            for p_response in page_response:  
-                entries_found_thus_far.append(p_response)
+        print("result of getting courses in an account: {}".format(entries_found_thus_far))
 
     return entries_found_thus_far
 
 def list_assignments(course_id):
     global Verbose_Flag
-    entries_found_thus_far=[]
 
     # Use the Canvas API to get the list of assignments for the course
     #GET /api/v1/courses/:course_id/assignments
@@ -241,26 +163,10 @@ def list_assignments(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    extra_parameters={'per_page': '100'}
+    entries_found_thus_far=canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
     if Verbose_Flag:
-        print("result of getting assignments: {}".format(r.text))
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-
-        for p_response in page_response:  
-            entries_found_thus_far.append(p_response)
-
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
-            if Verbose_Flag:
-                print("result of getting modules for a paginated response: {}".format(r.text))
-            page_response = r.json()  
-            for p_response in page_response:  
-                entries_found_thus_far.append(p_response)
+        print("result of getting assignments: {}".format(entries_found_thus_far))
 
     return entries_found_thus_far
 
@@ -288,7 +194,13 @@ def main(argv):
                       action="store_true",
                       help="for the container enviroment in the virtual machine, uses http and not https")
 
+    argp.add_argument('-j', '--jsonl', type=str, default=None,
+                      help="write the users of the accounts as JSON Lines to this file as they arrive")
+
+    canvas_client.add_options(argp)
+
     args = vars(argp.parse_args(argv))
+    canvas_client.set_options(args)
 
     Verbose_Flag=args["verbose"]
 
@@ -322,22 +234,32 @@ def main(argv):
     else:
         print("No subaccounts")
 
-    users_per_account=dict()
+    # the users are counted as they arrive, only their ids are kept
     count_users_per_account=[]
     unique_users=set()
-    for a in accounts:
-        users_per_account[a['id']]=users_in_account(a['id'])
-        count_users_per_account.append(
-            {
-                'account_id': a['id'],
-                'account_name': a['name'],
-                'count':      len(users_per_account[a['id']])
-            }
-        )
-        for u in users_per_account:
-            for u1 in users_per_account[u]:
-               unique_users.add(u1['id'])
-        
+    def users_of_all_accounts():
+        for a in accounts:
+            number_of_users=0
+            for u in users_in_account(a['id']):
+                number_of_users=number_of_users+1
+                unique_users.add(u['id'])
+                yield u
+
+            count_users_per_account.append(
+                {
+                    'account_id': a['id'],
+                    'account_name': a['name'],
+                    'count':      number_of_users
+                }
+            )
+
+    # with the JSON Lines option the users are also written to a file as they arrive
+    if args["jsonl"]:
+        canvas_client.write_json_lines(users_of_all_accounts(), args["jsonl"])
+    else:
+        for u in users_of_all_accounts(): # only count them
+            pass
+
     print("len unique_users={0}".format(len(unique_users)))
 
     
@@ -9,6 +9,7 @@
 #
 
 import csv, requests, time
+import canvas_client          # pooled access to the Canvas API
 from pprint import pprint
 import optparse
 import sys
@@ -38,6 +39,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -79,7 +81,7 @@ def update_column_name(course_id, column_id, column_name):
     if Verbose_Flag:
         print("url: {}".format(url))
     payload={'column[title]': column_name}
-    r = requests.put(url, headers = header, data=payload)
+    r = canvas_client.put(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         if Verbose_Flag:
             print("result of updating custom column:  {}".format(r.text))
@@ -105,7 +107,7 @@ def insert_column_name(course_id, column_name):
     if Verbose_Flag:
         print("url: {}".format(url))
     payload={'column[title]': column_name}
-    r = requests.post(url, headers = header, data=payload)
+    r = canvas_client.post(url, headers = header, data=payload)
     if r.status_code == requests.codes.ok:
         if Verbose_Flag:
             print("result of post creating custom column:  {}".format(r.text))
@@ -137,7 +139,10 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
     
     Verbose_Flag=options.verbose
     if Verbose_Flag:
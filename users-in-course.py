@@ -9,6 +9,8 @@
 # --avatar flag include the avatar URLs
 # -p or --picture flag include pictures
 # -s or --size specification size the pictures (and enable pictures if not separately specified)
+# -g or --graphql get the enrollments, avatars, and sections via the GraphQL API in a few queries
+#                 (rather than one request per user for the avatars)
 #
 # with the option "-v" or "--verbose" you get lots of output - showing in detail the operations of the program
 #
@@ -34,6 +36,8 @@
 #
 
 import requests, time
+import canvas_client          # pooled access to the Canvas API
+import canvas_graphql         # bulk access via the Canvas GraphQL API
 import pprint
 import optparse
 import sys
@@ -74,6 +78,7 @@ def initialize(options):
     try:
         with open(config_file) as json_data_file:
             configuration = json.load(json_data_file)
+            canvas_client.initialize(configuration)
             access_token=configuration["canvas"]["access_token"]
             if options.containers:
                 baseUrl="http://"+configuration["canvas"]["host"]+"/api/v1"
@@ -93,7 +98,6 @@ selected_user_data={}
 
 
 def users_in_course(course_id):
-    user_found_thus_far=[]
     # Use the Canvas API to get the list of users enrolled in this course
     #GET /api/v1/courses/:course_id/enrollments
 
@@ -102,24 +106,10 @@ def users_in_course(course_id):
         print("url: {}".format(url))
 
     extra_parameters={'per_page': '100'}
-    r = requests.get(url, params=extra_parameters, headers = header)
+    # the pages of the response are fetched concurrently when Canvas says how many pages there are
+    user_found_thus_far=canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
     if Verbose_Flag:
-        print("result of getting enrollments: {}".format(r.text))
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-
-        for p_response in page_response:  
-            user_found_thus_far.append(p_response)
-
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
-            page_response = r.json()  
-            for p_response in page_response:  
-                user_found_thus_far.append(p_response)
+        print("result of getting enrollments: {}".format(user_found_thus_far))
     return user_found_thus_far
 
 def user_profile_url(user_id):
@@ -130,7 +120,7 @@ def user_profile_url(user_id):
     if Verbose_Flag:
         print("user url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting profile: {}".format(r.text))
 
@@ -145,7 +135,6 @@ def section_name_from_section_id(sections_info, section_id):
             return i['name']
 
 def sections_in_course(course_id):
-    sections_found_thus_far=[]
     # Use the Canvas API to get the list of sections for this course
     #GET /api/v1/courses/:course_id/sections
 
@@ -153,24 +142,10 @@ def sections_in_course(course_id):
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    extra_parameters={'per_page': '100'}
+    sections_found_thus_far=canvas_client.get_all_pages(url, params=extra_parameters, headers=header)
     if Verbose_Flag:
-        print("result of getting sections: {}".format(r.text))
-
-    if r.status_code == requests.codes.ok:
-        page_response=r.json()
-
-        for p_response in page_response:  
-            sections_found_thus_far.append(p_response)
-
-        # the following is needed when the reponse has been paginated
-        # i.e., when the response is split into pieces - each returning only some of the list of modules
-        # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
-        while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
-            page_response = r.json()  
-            for p_response in page_response:  
-                sections_found_thus_far.append(p_response)
+        print("result of getting sections: {}".format(sections_found_thus_far))
 
     return sections_found_thus_far
 
@@ -183,7 +158,7 @@ def list_your_courses():
     if Verbose_Flag:
         print("url: {}".format(url))
 
-    r = requests.get(url, headers = header)
+    r = canvas_client.get(url, headers = header)
     if Verbose_Flag:
         print("result of getting courses: {}".format(r.text))
 
@@ -198,7 +173,7 @@ def list_your_courses():
         # see "Handling Pagination" - Discussion created by tyler.clair@usu.edu on Apr 27, 2015, https://community.canvaslms.com/thread/1500
 
         while r.links.get('next', False):
-            r = requests.get(r.links['next']['url'], headers=header)  
+            r = canvas_client.get(r.links['next']['url'], headers=header)  
             if Verbose_Flag:
                 print("result of getting courses for a paginated response: {}".format(r.text))
             page_response = r.json()  
@@ -280,7 +255,17 @@ def main():
                       help="for the container enviroment in the virtual machine"
     )
 
+    parser.add_option('-g', '--graphql',
+                      dest="graphql",
+                      default=False,
+                      action="store_true",
+                      help="get the users, avatars, and sections using the GraphQL API"
+    )
+
+    canvas_client.add_options(parser)
+
     options, remainder = parser.parse_args()
+    canvas_client.set_options(options)
 
     Verbose_Flag=options.verbose
     if Verbose_Flag:
@@ -306,11 +291,19 @@ def main():
         print("Insuffient arguments - must provide course_id\n")
     else:
         course_id=remainder[0]
-        users=users_in_course(course_id)
+        if options.graphql:
+            users=canvas_graphql.course_enrollments(baseUrl, header, course_id, avatars=options.avatar)
+        else:
+            users=users_in_course(course_id)
         if options.testing:     # if testing only get the list of users and then return
             return
         
         if (users):
+            users_avatars=dict() # to remember a user's avatar to avoid looking it up again
+            if options.graphql and options.avatar: # the avatars came with the enrollments
+                for u in users:
+                    users_avatars[u['user_id']]=u['user'].pop('avatar_url', None)
+
             users_df=pd.json_normalize(users)
                      
             # below are examples of some columns that might be dropped
@@ -324,11 +317,11 @@ def main():
 
             # Get the xlsxwriter workbook and worksheet objects.
     
-            sections=sections_in_course(course_id)
+            if options.graphql:
+                sections=canvas_graphql.course_sections(baseUrl, header, course_id)
+            else:
+                sections=sections_in_course(course_id)
             sections_df=pd.json_normalize(sections)
-            
-            if options.avatar:
-                users_avatars=dict() # to remember a user's avatar to avoid looking it up again
 
             for index, row in  users_df.iterrows():
                 if Verbose_Flag:
@@ -349,7 +342,7 @@ def main():
                             print("profiles: {}".format(profiles['avatar_url']))
                         user_avatar=profiles['avatar_url']
                         users_avatars[user_id]=user_avatar
-                        users_df.at[index, 'avatar_url']=user_avatar
+                    users_df.at[index, 'avatar_url']=user_avatar
 
                 if Picture_Flag: # if necessary add a picture column
                     users_df['pictures']=''